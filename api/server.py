@@ -1,13 +1,55 @@
-from fastapi import FastAPI, HTTPException
+import time
+# Início do import: o tempo até o módulo ficar pronto é reportado em /stats e /metrics
+_IMPORT_STARTED = time.perf_counter()
+
+import json
+import logging
+from contextlib import asynccontextmanager
+from typing import List
+from fastapi import Depends, FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
-from core.gatekeeper import Gatekeeper
-from core.humanizer import Humanizer
-from core.sourcing_agent import SourcingAgent
-from core.connectors.web3_rpc_connector import OnChainVerifier
+from core.config import load_env
+from core.engine import SentinelEngine
+from core.metrics import get_metrics
 import os
 
-app = FastAPI()
+load_env()
+
+# Segundos gastos importando a API (fastapi + core; ccxt e web3 só carregam no primeiro uso)
+STARTUP = {"import_seconds": round(time.perf_counter() - _IMPORT_STARTED, 4), "lifespan_seconds": None}
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Um único motor por processo: conectores, registries e caches ficam aquecidos
+    started = time.perf_counter()
+    engine = SentinelEngine()
+    await engine.startup()
+    app.state.engine = engine
+    STARTUP["lifespan_seconds"] = round(time.perf_counter() - started, 4)
+    metrics = get_metrics()
+    for phase in ("import", "lifespan"):
+        metrics.gauge_set("startup_seconds", STARTUP[f"{phase}_seconds"], phase=phase)
+    logging.info(f"API pronta: import {STARTUP['import_seconds'] * 1000:.0f} ms, lifespan {STARTUP['lifespan_seconds'] * 1000:.0f} ms.")
+    # Bot do Telegram no mesmo processo, chamando o motor diretamente (BOT_EMBEDDED=1)
+    bot_app = None
+    if os.getenv("BOT_EMBEDDED", "").lower() in ("1", "true", "yes"):
+        from bot.telegram_bot import start_embedded
+        bot_app = await start_embedded(engine)
+    try:
+        yield
+    finally:
+        if bot_app is not None:
+            from bot.telegram_bot import stop_embedded
+            await stop_embedded(bot_app)
+        await engine.shutdown()
+
+def get_engine(request: Request) -> SentinelEngine:
+    """Dependência do motor. Testes podem sobrescrever via app.dependency_overrides."""
+    return request.app.state.engine
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -23,6 +65,9 @@ class CheckRequest(BaseModel):
     network: str
     address: str
 
+class BatchCheckRequest(BaseModel):
+    items: List[CheckRequest]
+
 class IntentRequest(BaseModel):
     text: str
 
@@ -30,55 +75,67 @@ class IntentRequest(BaseModel):
 def home():
     return {"status": "SafeSentinel Command Center API Operational"}
 
+@app.get("/stats")
+def stats(engine: SentinelEngine = Depends(get_engine)):
+    return {**engine.stats(), "startup": STARTUP}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Métricas no formato texto do Prometheus (spans por estágio, upstreams, caches)."""
+    return PlainTextResponse(get_metrics().render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 @app.post("/extract")
-async def extract_intent(req: IntentRequest):
-    hm = Humanizer()
-    intent = hm.extract_intent(req.text)
+async def extract_intent(req: IntentRequest, engine: SentinelEngine = Depends(get_engine)):
+    intent = await engine.extract_intent(req.text)
     if not intent:
         raise HTTPException(status_code=400, detail="Não foi possível entender a intenção.")
     return intent
 
 @app.post("/check")
-async def check_transfer(req: CheckRequest):
+async def check_transfer(req: CheckRequest, engine: SentinelEngine = Depends(get_engine)):
     try:
-        gk = Gatekeeper()
-        hm = Humanizer()
-        rpc = OnChainVerifier()
-
-        # 1. Validação On-Chain (RPC)
-        on_chain_data = rpc.verify_address(req.address, req.network)
-
-        # 2. Lógica de Negócio (Gatekeeper)
-        gk_res = gk.check_compatibility(req.origin, req.destination, req.asset, req.network, req.address)
-        
-        gk_res.update({
-            "asset": req.asset,
-            "origin_exchange": req.origin,
-            "destination": req.destination,
-            "selected_network": req.network,
-            "on_chain": on_chain_data
-        })
-
-        if gk_res['status'] != 'SAFE':
-            explanation = hm.humanize_risk(gk_res)
-            return {
-                "status": gk_res['status'],
-                "risk_level": gk_res['risk'],
-                "title": "Alerta de Segurança",
-                "message": explanation,
-                "on_chain": on_chain_data
-            }
-        
-        return {
-            "status": "SAFE",
-            "risk_level": "LOW",
-            "title": "Caminho Seguro",
-            "message": "A rota selecionada foi validada e está livre de riscos conhecidos.",
-            "on_chain": on_chain_data
-        }
+        return await engine.check_transfer(req.asset, req.origin, req.destination, req.network, req.address)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/check/stream")
+async def check_transfer_stream(req: CheckRequest, format: str = "sse", engine: SentinelEngine = Depends(get_engine)):
+    """
+    Veredito determinístico imediato, explicação da MarIA em seguida.
+    format=sse (text/event-stream) ou format=ndjson ({"event": ..., "data": ...} por linha).
+    """
+    if format not in ("sse", "ndjson"):
+        raise HTTPException(status_code=400, detail="Formato inválido (use sse ou ndjson).")
+
+    def encode(event, data):
+        if format == "sse":
+            return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+        return json.dumps({"event": event, "data": data}, ensure_ascii=False) + "\n"
+
+    async def stream():
+        events = engine.check_transfer_stream(req.asset, req.origin, req.destination, req.network, req.address)
+        try:
+            async for event, data in events:
+                yield encode(event, data)
+        except Exception as e:
+            yield encode("error", {"detail": str(e)})
+
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(stream(), media_type=media_type, headers={"Cache-Control": "no-cache"})
+
+@app.post("/check/batch")
+async def check_batch(req: BatchCheckRequest, engine: SentinelEngine = Depends(get_engine)):
+    """Valida vários envios; cada veredito é enviado (NDJSON) assim que fica pronto, com seu 'index'."""
+    max_items = int(os.getenv("CHECK_BATCH_MAX_ITEMS", 10000))
+    if len(req.items) > max_items:
+        raise HTTPException(status_code=413, detail=f"Máximo de {max_items} itens por lote.")
+
+    async def stream():
+        async for result in engine.check_batch(req.items):
+            yield json.dumps(result, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
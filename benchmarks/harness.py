@@ -0,0 +1,175 @@
+import asyncio
+import gc
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Métricas onde valor maior é melhor (as demais são latência/memória: menor é melhor)
+HIGHER_IS_BETTER = {"throughput_rps"}
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 3) if seconds is not None else None
+
+
+async def measure_latency(call, requests, concurrency):
+    """Executa 'requests' chamadas com até 'concurrency' simultâneas: latências (s) e tempo total."""
+    latencies = [0.0] * requests
+    counter = iter(range(requests))
+
+    async def worker():
+        for i in counter:
+            start = time.perf_counter()
+            await call(i)
+            latencies[i] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, requests))))
+    return latencies, time.perf_counter() - start
+
+
+async def measure_allocations(call, requests):
+    """
+    Memória por requisição (em série, com tracemalloc ligado só nesta fase):
+    pico alocado acima do estado inicial e o que ficou retido ao final.
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        peaks = []
+        baseline, _ = tracemalloc.get_traced_memory()
+        for i in range(requests):
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            await call(i)
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - before)
+        gc.collect()
+        retained, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "alloc_peak_kib": round(sum(peaks) / len(peaks) / 1024, 2),
+        "retained_b_per_req": round((retained - baseline) / requests, 1)
+    }
+
+
+async def run_suite(suite, requests=500, concurrency=16, cold_samples=5, alloc_requests=100):
+    """
+    Cold: primeira requisição de um sistema recém-montado (caches e snapshots vazios), repetida 'cold_samples' vezes.
+    Warm: 'requests' requisições num sistema já aquecido, com 'concurrency' simultâneas.
+    """
+    cold = []
+    for _ in range(cold_samples):
+        call, close = await suite.build()
+        try:
+            start = time.perf_counter()
+            await call(0)
+            cold.append(time.perf_counter() - start)
+        finally:
+            await close()
+
+    call, close = await suite.build()
+    try:
+        # Aquecimento: passa uma vez por todos os cenários
+        for i in range(suite.warmup):
+            await call(i)
+        latencies, wall = await measure_latency(call, requests, concurrency)
+        allocations = await measure_allocations(call, min(alloc_requests, requests))
+    finally:
+        await close()
+
+    return {
+        "cold": {
+            "samples": len(cold),
+            "p50_ms": _ms(percentile(cold, 0.5)),
+            "max_ms": _ms(max(cold) if cold else None)
+        },
+        "warm": {
+            "requests": requests,
+            "concurrency": concurrency,
+            "p50_ms": _ms(percentile(latencies, 0.5)),
+            "p95_ms": _ms(percentile(latencies, 0.95)),
+            "p99_ms": _ms(percentile(latencies, 0.99)),
+            "throughput_rps": round(requests / wall, 1),
+            **allocations
+        }
+    }
+
+
+def measure_startup(samples=3):
+    """
+    Cold start da API em processos novos (benchmarks/startup.py): import do módulo,
+    lifespan e primeiro GET /. Tudo offline: replay sem gravações e caches temporários.
+    """
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "startup.py")
+    runs = []
+    for _ in range(samples):
+        with tempfile.TemporaryDirectory(prefix="safesentinel-startup-") as workdir:
+            env = {
+                **os.environ,
+                "TRANSPORT_MODE": "replay",
+                "CASSETTE_DIR": os.path.join(workdir, "cassettes"),
+                "CACHE_BACKEND": "memory",
+                "CAPABILITY_SNAPSHOT": os.path.join(workdir, "capabilities.bin"),
+                "CCXT_SNAPSHOT_DIR": os.path.join(workdir, "ccxt"),
+                "METRICS_ENABLED": "1"
+            }
+            output = subprocess.run([sys.executable, script], env=env, capture_output=True, text=True, check=True).stdout
+            runs.append({"cold": json.loads(output.strip().splitlines()[-1])})
+    merged = merge_runs(runs)
+    merged["cold"]["samples"] = samples
+    return merged
+
+
+def merge_runs(runs):
+    """Combina várias execuções de run_suite pela mediana de cada métrica (reduz o ruído da máquina)."""
+    merged = {}
+    for phase in runs[0]:
+        merged[phase] = {}
+        for metric in runs[0][phase]:
+            values = [run[phase][metric] for run in runs if run[phase][metric] is not None]
+            merged[phase][metric] = percentile(values, 0.5) if values else None
+    return merged
+
+
+def compare(current, baseline, tolerance=0.25, min_delta_ms=0.5):
+    """
+    Regressões de 'current' em relação a 'baseline' (mesmo formato de run_suite por suíte).
+    Uma métrica regride se piorar mais que 'tolerance' (fração); diferenças de latência
+    abaixo de 'min_delta_ms' são ruído e não contam.
+    """
+    regressions = []
+    for suite, phases in current.items():
+        for phase, metrics in phases.items():
+            reference = baseline.get(suite, {}).get(phase, {})
+            for metric, value in metrics.items():
+                ref = reference.get(metric)
+                if not isinstance(value, (int, float)) or not isinstance(ref, (int, float)) or ref <= 0:
+                    continue
+                # Parâmetros da execução e o máximo de poucas amostras não indicam regressão
+                if metric in ("samples", "requests", "concurrency", "max_ms"):
+                    continue
+                if metric in HIGHER_IS_BETTER:
+                    worse = value < ref * (1 - tolerance)
+                else:
+                    worse = value > ref * (1 + tolerance)
+                    if metric.endswith("_ms") and value - ref < min_delta_ms:
+                        worse = False
+                if worse:
+                    regressions.append({
+                        "suite": suite, "phase": phase, "metric": metric,
+                        "baseline": ref, "current": value, "change": round(value / ref - 1, 3)
+                    })
+    return regressions
@@ -0,0 +1,110 @@
+import sys
+import os
+import json
+import asyncio
+import argparse
+import logging
+import platform
+import subprocess
+import time
+
+# Adicionar o diretório raiz ao PYTHONPATH
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.harness import compare, measure_startup, merge_runs, run_suite
+from benchmarks.suites import SUITES
+
+BASELINE = os.path.join(os.path.dirname(__file__), "baselines", "default.json")
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(results):
+    startup = results.get("startup")
+    if startup:
+        cold = startup["cold"]
+        print(f"startup: import {cold['import_ms']:.0f} ms, lifespan {cold['lifespan_ms']:.0f} ms, "
+              f"primeiro GET / em {cold['first_response_ms']:.0f} ms")
+    header = f"{'suíte':<12}{'cold p50':>10}{'p50':>9}{'p95':>9}{'p99':>9}{'req/s':>10}{'KiB/req':>10}"
+    print(header)
+    print("-" * len(header))
+    for name, r in results.items():
+        if name == "startup":
+            continue
+        warm = r["warm"]
+        print(f"{name:<12}{r['cold']['p50_ms']:>10.2f}{warm['p50_ms']:>9.3f}{warm['p95_ms']:>9.3f}"
+              f"{warm['p99_ms']:>9.3f}{warm['throughput_rps']:>10.1f}{warm['alloc_peak_kib']:>10.1f}")
+    print("(latências em ms)")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmarks offline (exchanges, RPC e LLM servidos por stand-ins locais).")
+    parser.add_argument("--suite", action="append", choices=sorted(SUITES), help="Suítes a executar (padrão: todas)")
+    parser.add_argument("--requests", type=int, default=500, help="Requisições na fase warm")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--cold-samples", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=3, help="Execuções por suíte (vale a mediana de cada métrica)")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Latência simulada de cada ida ao upstream")
+    parser.add_argument("--startup-samples", type=int, default=3, help="Processos novos medidos no cold start da API (0: não mede)")
+    parser.add_argument("--save", nargs="?", const=BASELINE, help="Grava os resultados como baseline")
+    parser.add_argument("--compare", nargs="?", const=BASELINE, help="Compara com um baseline; sai com 1 se houver regressão")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Piora tolerada por métrica (fração)")
+    parser.add_argument("--min-delta-ms", type=float, default=0.5, help="Diferenças de latência menores que isso são ruído")
+    args = parser.parse_args()
+
+    # Avisos esperados dos stand-ins (ex.: exchange em manutenção) não entram na medição
+    logging.disable(logging.WARNING)
+
+    results = {}
+    if args.startup_samples:
+        print("⏱  startup...", file=sys.stderr)
+        results["startup"] = measure_startup(args.startup_samples)
+    for name in args.suite or sorted(SUITES):
+        suite = SUITES[name](latency=args.latency_ms / 1000)
+        print(f"⏱  {name}...", file=sys.stderr)
+        runs = [await run_suite(suite, args.requests, args.concurrency, args.cold_samples) for _ in range(args.repeat)]
+        results[name] = merge_runs(runs)
+
+    print_report(results)
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": {
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "cold_samples": args.cold_samples,
+            "repeat": args.repeat,
+            "startup_samples": args.startup_samples,
+            "latency_ms": args.latency_ms
+        },
+        "results": results
+    }
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Baseline gravado em {args.save}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("params") != report["params"]:
+            print(f"⚠️  Parâmetros diferentes do baseline: {baseline.get('params')}")
+        regressions = compare(results, baseline.get("results", {}), args.tolerance, args.min_delta_ms)
+        for r in regressions:
+            print(f"❌ {r['suite']}/{r['phase']} {r['metric']}: {r['baseline']} → {r['current']} ({r['change']:+.0%})")
+        if regressions:
+            sys.exit(1)
+        print(f"✅ Sem regressões acima de {args.tolerance:.0%} em relação a {args.compare}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,96 @@
+import asyncio
+import json
+import os
+import httpx
+from core.http_client import HTTPClient
+
+# Respostas gravadas das exchanges, dos RPCs e da LLM (ver fixtures/)
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES, f"{name}.json"), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class FakeExchange:
+    """Exchange da ccxt servindo load_markets/fetch_currencies a partir das respostas gravadas."""
+    def __init__(self, exchange_id, recorded, latency=0.0):
+        self.id = exchange_id
+        self.rateLimit = recorded["rateLimit"]
+        self.has = {"fetchCurrencies": recorded["fetchCurrencies"]}
+        self.recorded = recorded["currencies"]
+        self.latency = latency
+        self.currencies = None
+        self.calls = 0
+
+    async def _upstream(self):
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    async def load_markets(self, reload=False):
+        await self._upstream()
+        self.currencies = self.recorded
+        return {}
+
+    async def fetch_currencies(self):
+        await self._upstream()
+        return json.loads(json.dumps(self.recorded))
+
+    async def close(self):
+        pass
+
+
+def exchange_standins(latency=0.0):
+    return {ex: FakeExchange(ex, recorded, latency) for ex, recorded in load_fixture("exchanges").items()}
+
+
+def install_exchanges(ccxt_conn, latency=0.0):
+    """Registra as exchanges gravadas no CCXTConnector (get_exchange_instance as encontra prontas)."""
+    ccxt_conn.exchanges.update(exchange_standins(latency))
+
+
+def rpc_transport(latency=0.0):
+    """Transporte httpx que responde JSON-RPC (simples e batch) com os resultados gravados."""
+    recorded = load_fixture("rpc")
+
+    def answer(call):
+        method, params = call["method"], call.get("params", [])
+        if method == "eth_getCode":
+            result = recorded["eth_getCode"].get(params[0].lower(), "0x")
+        elif method in recorded:
+            result = recorded[method]
+        else:
+            return {"jsonrpc": "2.0", "id": call.get("id"), "error": {"code": -32601, "message": "method not found"}}
+        return {"jsonrpc": "2.0", "id": call.get("id"), "result": result}
+
+    async def handler(request):
+        if latency:
+            await asyncio.sleep(latency)
+        body = json.loads(request.content)
+        data = [answer(c) for c in body] if isinstance(body, list) else answer(body)
+        return httpx.Response(200, json=data)
+
+    return httpx.MockTransport(handler)
+
+
+def llm_transport(latency=0.0):
+    """Transporte httpx que responde a chat completions com a resposta gravada da LLM."""
+    recorded = load_fixture("llm")
+
+    async def handler(request):
+        if latency:
+            await asyncio.sleep(latency)
+        return httpx.Response(200, json=recorded)
+
+    return httpx.MockTransport(handler)
+
+
+async def install_rpc(verifier, transport):
+    """Troca o cliente HTTP de cada endpoint do OnChainVerifier pelo transporte local."""
+    for net in verifier.rpcs:
+        router = verifier.get_pool(net)
+        for pool in router.pools:
+            await pool.client.aclose()
+            pool.client = HTTPClient(max_connections=pool.client.max_per_host, retries=0, transport=transport)
@@ -0,0 +1,34 @@
+import sys
+import os
+import time
+import json
+import asyncio
+
+# Executado num processo novo por measure_startup: mede do import da API até o primeiro GET /
+_STARTED = time.perf_counter()
+
+# Adicionar o diretório raiz ao PYTHONPATH
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+async def main():
+    import httpx
+    from api.server import app
+    imported = time.perf_counter()
+
+    async with app.router.lifespan_context(app):
+        ready = time.perf_counter()
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+            response = await client.get("/")
+            response.raise_for_status()
+        answered = time.perf_counter()
+
+    print(json.dumps({
+        "import_ms": round((imported - _STARTED) * 1000, 3),
+        "lifespan_ms": round((ready - imported) * 1000, 3),
+        "first_response_ms": round((answered - _STARTED) * 1000, 3)
+    }))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
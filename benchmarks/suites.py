@@ -0,0 +1,110 @@
+import abc
+import os
+import tempfile
+import httpx
+from benchmarks.standins import install_exchanges, install_rpc, llm_transport, load_fixture, rpc_transport
+from core.cache import PersistentLRUCache
+from core.connectors.ccxt_connector import CCXTConnector
+from core.connectors.web3_rpc_connector import OnChainVerifier
+from core.gatekeeper import Gatekeeper
+from core.http_client import HTTPClient, set_http_client
+from core.shared_cache import MemoryBackend, SharedCache, set_shared_cache
+
+
+class Suite(abc.ABC):
+    """
+    Um alvo de benchmark. build() monta um sistema novo (caches vazios) sobre os
+    stand-ins locais e devolve (call, close): call(i) executa a i-ésima requisição.
+    """
+    name = None
+
+    def __init__(self, latency=0.0):
+        # Latência simulada de cada ida ao upstream (segundos)
+        self.latency = latency
+        self.warmup = 1
+
+    @abc.abstractmethod
+    async def build(self):
+        """Devolve (call, close) de um sistema novo."""
+
+
+class GatekeeperSuite(Suite):
+    """Gatekeeper.check_compatibility pelo caminho ao vivo da CCXT (sem matriz de capacidades)."""
+    name = "gatekeeper"
+
+    async def build(self):
+        scenarios = load_fixture("scenarios")
+        self.warmup = len(scenarios)
+        cache = SharedCache(MemoryBackend())
+        # Diretório de snapshots vazio: a primeira requisição é de fato fria
+        conn = CCXTConnector(shared_cache=cache, snapshot_dir=tempfile.mkdtemp(prefix="safesentinel-bench-"))
+        install_exchanges(conn, self.latency)
+        gatekeeper = Gatekeeper(ccxt_conn=conn)
+
+        async def call(i):
+            s = scenarios[i % len(scenarios)]
+            return await gatekeeper.check_compatibility(s["origin"], s["destination"], s["asset"], s["network"], s["address"])
+
+        async def close():
+            await conn.close()
+            gatekeeper.blacklist.close()
+
+        return call, close
+
+
+class OnChainSuite(Suite):
+    """OnChainVerifier.verify_address (eth_getCode) contra o RPC gravado."""
+    name = "on_chain"
+
+    async def build(self):
+        addresses = list(load_fixture("rpc")["eth_getCode"])
+        self.warmup = len(addresses)
+        verifier = OnChainVerifier(shared_cache=SharedCache(MemoryBackend()))
+        await install_rpc(verifier, rpc_transport(self.latency))
+
+        async def call(i):
+            return await verifier.verify_address(addresses[i % len(addresses)], "ERC20")
+
+        return call, verifier.close
+
+
+class CheckRouteSuite(Suite):
+    """Rota /check completa (FastAPI + SentinelEngine), com exchanges, RPC e LLM locais."""
+    name = "check"
+
+    async def build(self):
+        # Caminhos em disco isolados: nenhum snapshot ou cache de execuções anteriores
+        workdir = tempfile.mkdtemp(prefix="safesentinel-bench-")
+        os.environ["CAPABILITY_SNAPSHOT"] = os.path.join(workdir, "capabilities.bin")
+        os.environ["CCXT_SNAPSHOT_DIR"] = os.path.join(workdir, "ccxt")
+        from api.server import app, get_engine
+        from core.engine import SentinelEngine
+
+        scenarios = load_fixture("scenarios")
+        self.warmup = len(scenarios)
+        set_shared_cache(SharedCache(MemoryBackend()))
+        set_http_client(HTTPClient(retries=0, transport=llm_transport(self.latency)))
+        engine = SentinelEngine()
+        install_exchanges(engine.ccxt_conn, self.latency)
+        await install_rpc(engine.rpc, rpc_transport(self.latency))
+        engine.humanizer.api_key = "benchmark"
+        engine.humanizer.cache = PersistentLRUCache(path=os.path.join(workdir, "humanizer.json"))
+        await engine.startup()
+        app.dependency_overrides[get_engine] = lambda: engine
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+
+        async def call(i):
+            response = await client.post("/check", json=scenarios[i % len(scenarios)])
+            response.raise_for_status()
+            return response.json()
+
+        async def close():
+            await client.aclose()
+            app.dependency_overrides.pop(get_engine, None)
+            # Fecha também o cliente HTTP e o cache compartilhado instalados acima
+            await engine.shutdown()
+
+        return call, close
+
+
+SUITES = {suite.name: suite for suite in (GatekeeperSuite, OnChainSuite, CheckRouteSuite)}
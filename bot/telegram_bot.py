@@ -1,7 +1,7 @@
 import os
 import logging
-import httpx
-from dotenv import load_dotenv
+import tempfile
+from fastapi.encoders import jsonable_encoder
 from telegram import Update
 from telegram.constants import ParseMode
 from telegram.helpers import escape_markdown
@@ -12,15 +12,67 @@ from telegram.ext import (
     MessageHandler,
     filters,
 )
+from core.config import load_env
 from core.humanizer import Humanizer
+from core.http_client import close_http_client, get_http_client
+from core.metrics import get_metrics, start_metrics_server
+from core.shared_cache import close_shared_cache
 
-load_dotenv()
+try:
+    import fcntl
+except ImportError:  # Windows: sem trava entre processos (vale WEB_CONCURRENCY)
+    fcntl = None
+
+load_env()
 
 # Configuração de logs
 logging.basicConfig(level=logging.INFO)
 
 FASTAPI_URL = os.getenv("FASTAPI_URL", "http://localhost:8000")
+# Quantas mensagens são processadas ao mesmo tempo
+BOT_CONCURRENT_UPDATES = int(os.getenv("BOT_CONCURRENT_UPDATES", 32))
+# "http": chama FASTAPI_URL/check; "inprocess": usa o SentinelEngine no próprio processo
+BOT_CHECK_MODE = os.getenv("BOT_CHECK_MODE", "http").lower()
+# Porta do GET /metrics do processo do bot (vazio: desligado; embutido na API, vale o /metrics da API)
+BOT_METRICS_PORT = os.getenv("BOT_METRICS_PORT")
 hm = Humanizer()
+# Motor in-process (modo "inprocess" ou bot embutido na API)
+engine = None
+_owns_engine = False
+_metrics_server = None
+# Trava do polling do bot embutido: um único processo do host chama getUpdates
+BOT_LOCK_PATH = os.getenv("BOT_LOCK_PATH") or os.path.join(tempfile.gettempdir(), "safesentinel-telegram-bot.lock")
+_polling_lock = None
+
+async def extract_intent(text):
+    with get_metrics().span("bot.extract_intent"):
+        if engine is not None:
+            return await engine.extract_intent(text)
+        return await hm.extract_intent(text)
+
+async def check_route(intent):
+    """
+    Resposta de /check para a intenção. Nos dois modos o formato é o mesmo da API
+    (inclusive o corpo {"detail": ...} de um erro 500).
+    """
+    payload = {
+        "asset": intent['asset'],
+        "origin": intent['origin'],
+        "destination": intent['destination'],
+        "network": intent['network'],
+        "address": intent.get('address') or "0x0000000000000000000000000000000000000000"
+    }
+    with get_metrics().span("bot.check_route", mode="inprocess" if engine is not None else "http"):
+        if engine is not None:
+            try:
+                res = await engine.check_transfer(**payload)
+            except Exception as e:
+                res = {"detail": str(e)}
+            # Mesma serialização que o FastAPI aplica na resposta HTTP
+            return jsonable_encoder(res)
+
+        response = await get_http_client().post(f"{FASTAPI_URL}/check", json=payload, timeout=30.0)
+        return response.json()
 
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     msg = (
@@ -40,7 +92,7 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     await update.message.reply_chat_action("typing")
     
     # 1. Extrair Intenção via IA
-    intent = hm.extract_intent(text)
+    intent = await extract_intent(text)
     
     if not isinstance(intent, dict) or not intent.get('asset'):
         await update.message.reply_text("Entendi que você quer fazer uma transferência, mas qual é o Token e a Rede?")
@@ -61,34 +113,25 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     await update.message.reply_text(status_msg, parse_mode=ParseMode.MARKDOWN_V2)
 
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(f"{FASTAPI_URL}/check", json={
-                "asset": intent['asset'],
-                "origin": intent['origin'],
-                "destination": intent['destination'],
-                "network": intent['network'],
-                "address": intent.get('address') or "0x0000000000000000000000000000000000000000"
-            }, timeout=30.0)
-            
-            res = response.json()
-            status_emoji = "✅" if res.get('risk_level') == "LOW" else "🚨" if res.get('risk_level') == "CRITICAL" else "⚠️"
-            
-            title = res.get('title', 'Resultado da Análise')
-            message = res.get('message', 'Sem detalhes adicionais.')
-            solution = res.get('solution')
-
-            report = f"{status_emoji} *{escape_markdown(title, version=2)}*\n\n"
-            report += f"{escape_markdown(message, version=2)}\n\n"
-            
-            if solution:
-                report += f"💡 *Ação Sugerida:*\n{escape_markdown(solution, version=2)}"
-            
-            try:
-                await update.message.reply_text(report, parse_mode=ParseMode.MARKDOWN_V2)
-            except Exception as e:
-                logging.error(f"Erro ao enviar Markdown: {e}")
-                # Fallback para texto plano se o Markdown falhar
-                await update.message.reply_text(report.replace("*", "").replace("_", "").replace("\\", ""))
+        res = await check_route(intent)
+        status_emoji = "✅" if res.get('risk_level') == "LOW" else "🚨" if res.get('risk_level') == "CRITICAL" else "⚠️"
+
+        title = res.get('title', 'Resultado da Análise')
+        message = res.get('message', 'Sem detalhes adicionais.')
+        solution = res.get('solution')
+
+        report = f"{status_emoji} *{escape_markdown(title, version=2)}*\n\n"
+        report += f"{escape_markdown(message, version=2)}\n\n"
+
+        if solution:
+            report += f"💡 *Ação Sugerida:*\n{escape_markdown(solution, version=2)}"
+
+        try:
+            await update.message.reply_text(report, parse_mode=ParseMode.MARKDOWN_V2)
+        except Exception as e:
+            logging.error(f"Erro ao enviar Markdown: {e}")
+            # Fallback para texto plano se o Markdown falhar
+            await update.message.reply_text(report.replace("*", "").replace("_", "").replace("\\", ""))
 
     except Exception as e:
         logging.error(f"Erro no handle_message: {e}")
@@ -116,14 +159,113 @@ async def report_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         parse_mode=ParseMode.MARKDOWN_V2
     )
 
-if __name__ == '__main__':
-    TOKEN_BOT = os.getenv("TELEGRAM_BOT_TOKEN")
-    app = ApplicationBuilder().token(TOKEN_BOT).build()
+async def post_init(app) -> None:
+    global engine, _owns_engine, _metrics_server
+    if BOT_METRICS_PORT:
+        _metrics_server = await start_metrics_server(int(BOT_METRICS_PORT))
+    if BOT_CHECK_MODE == "inprocess" and engine is None:
+        from core.engine import SentinelEngine
+        engine = SentinelEngine()
+        await engine.startup()
+        _owns_engine = True
 
+async def post_shutdown(app) -> None:
+    global engine, _owns_engine, _metrics_server
+    if _metrics_server is not None:
+        _metrics_server.close()
+        _metrics_server = None
+    await hm.aclose()
+    if _owns_engine:
+        await engine.shutdown()
+        engine, _owns_engine = None, False
+    await close_http_client()
+    await close_shared_cache()
+
+def build_application(token):
+    app = (
+        ApplicationBuilder()
+        .token(token)
+        .concurrent_updates(BOT_CONCURRENT_UPDATES)
+        .post_init(post_init)
+        .post_shutdown(post_shutdown)
+        .build()
+    )
     app.add_handler(CommandHandler('start', start))
     app.add_handler(CommandHandler('find', find_command))
     app.add_handler(CommandHandler('report', report_command))
     app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message))
+    return app
+
+def acquire_polling_lock(path=None):
+    """
+    Trava exclusiva (fcntl.flock, sem esperar) para o polling. Retorna o descritor, ou None se
+    outro processo já faz o polling: dois getUpdates com o mesmo token levam 409 Conflict
+    e updates se perdem. Sem fcntl, só aceita um único worker (WEB_CONCURRENCY).
+    """
+    if fcntl is None:
+        return -1 if int(os.getenv("WEB_CONCURRENCY", 1)) <= 1 else None
+    fd = os.open(path or BOT_LOCK_PATH, os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        os.close(fd)
+        return None
+    return fd
+
+def release_polling_lock(fd):
+    if fd is not None and fd >= 0:
+        os.close(fd)
+
+async def start_embedded(shared_engine, token=None):
+    """
+    Sobe o bot (polling) dentro de um processo que já tem um SentinelEngine, como a API:
+    as verificações usam o mesmo motor e os mesmos caches aquecidos.
+    Com vários workers, só o que obtiver a trava de BOT_LOCK_PATH sobe o bot (retorna None nos demais).
+    """
+    global engine, _polling_lock
+    _polling_lock = acquire_polling_lock()
+    if _polling_lock is None:
+        logging.info("Bot embutido já está em execução em outro processo; este worker não fará polling.")
+        return None
+    engine = shared_engine
+    app = build_application(token or os.getenv("TELEGRAM_BOT_TOKEN"))
+    await app.initialize()
+    await app.start()
+    await app.updater.start_polling()
+    return app
+
+async def stop_embedded(app):
+    global engine, _polling_lock
+    await app.updater.stop()
+    await app.stop()
+    await app.shutdown()
+    await hm.aclose()
+    engine = None
+    release_polling_lock(_polling_lock)
+    _polling_lock = None
+
+def run(app):
+    """
+    Polling por padrão; com BOT_WEBHOOK_URL definido, recebe as atualizações por webhook
+    (requer python-telegram-bot[webhooks]).
+    """
+    webhook_url = os.getenv("BOT_WEBHOOK_URL")
+    if not webhook_url:
+        app.run_polling()
+        return
+    url_path = os.getenv("BOT_WEBHOOK_PATH", "telegram")
+    app.run_webhook(
+        listen=os.getenv("BOT_WEBHOOK_LISTEN", "0.0.0.0"),
+        port=int(os.getenv("BOT_WEBHOOK_PORT", 8443)),
+        url_path=url_path,
+        webhook_url=f"{webhook_url.rstrip('/')}/{url_path}",
+        secret_token=os.getenv("BOT_WEBHOOK_SECRET") or None,
+        max_connections=BOT_CONCURRENT_UPDATES
+    )
+
+if __name__ == '__main__':
+    TOKEN_BOT = os.getenv("TELEGRAM_BOT_TOKEN")
+    app = build_application(TOKEN_BOT)
 
     print("🤖 SafeTransfer Conversational Bot is running...")
-    app.run_polling()
+    run(app)
@@ -0,0 +1,166 @@
+import hashlib
+import re
+from eth_hash.auto import keccak
+
+# Família de endereço esperada para cada rede
+NETWORK_FAMILIES = {
+    "ERC20": "EVM", "BEP20": "EVM", "POLYGON": "EVM", "ARBITRUM": "EVM", "OPTIMISM": "EVM",
+    "TRC20": "TRON", "TRX": "TRON",
+    "SOL": "SOLANA", "SOLANA": "SOLANA"
+}
+
+# Formato de endereço por família (ordem = prioridade na detecção)
+ADDRESS_PATTERNS = {
+    "EVM": r"^0x[a-fA-F0-9]{40}$",
+    "TRON": r"^T[a-zA-Z0-9]{33}$",
+    "SOLANA": r"^[1-9A-HJ-NP-Za-km-z]{32,44}$"
+}
+
+# Resultados da validação (None = válido)
+INVALID_FORMAT = "INVALID_FORMAT"
+INVALID_CHECKSUM = "INVALID_CHECKSUM"
+
+BASE58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+_BASE58_INDEX = {c: i for i, c in enumerate(BASE58_ALPHABET)}
+# Pares de caracteres -> valor (metade das iterações na decodificação)
+_BASE58_PAIRS = {a + b: i * 58 + j for a, i in _BASE58_INDEX.items() for b, j in _BASE58_INDEX.items()}
+TRON_PREFIX = 0x41
+
+
+def base58_decode(text):
+    """Decodifica base58 (alfabeto Bitcoin). Retorna None se houver caractere inválido."""
+    pairs = _BASE58_PAIRS
+    n = 0
+    try:
+        if len(text) & 1:
+            n = _BASE58_INDEX[text[0]]
+            start = 1
+        else:
+            start = 0
+        for i in range(start, len(text), 2):
+            n = n * 3364 + pairs[text[i:i + 2]]
+    except KeyError:
+        return None
+    leading = len(text) - len(text.lstrip("1"))
+    return b"\x00" * leading + (n.to_bytes((n.bit_length() + 7) // 8, "big") if n else b"")
+
+
+def _check_evm(address):
+    body = address[2:]
+    # Tudo minúsculo ou tudo maiúsculo: endereço sem checksum (aceito)
+    if body.islower() or body.isupper() or body.isdigit():
+        return None
+    digest = keccak(body.lower().encode("ascii")).hex()
+    for char, nibble in zip(body, digest):
+        if char.isalpha() and (char.isupper() != (nibble >= "8")):
+            return INVALID_CHECKSUM
+    return None
+
+
+def to_checksum_address(address):
+    """Endereço EVM no formato EIP-55 (mesmo resultado de Web3.to_checksum_address, sem importar a web3)."""
+    if not isinstance(address, str) or not re.fullmatch(ADDRESS_PATTERNS["EVM"], address):
+        raise ValueError(f"Endereço EVM inválido: {address!r}")
+    body = address[2:].lower()
+    digest = keccak(body.encode("ascii")).hex()
+    return "0x" + "".join(char.upper() if nibble >= "8" else char for char, nibble in zip(body, digest))
+
+
+def _check_tron(address):
+    raw = base58_decode(address)
+    if raw is None or len(raw) != 25 or raw[0] != TRON_PREFIX:
+        return INVALID_FORMAT
+    payload, checksum = raw[:21], raw[21:]
+    if hashlib.sha256(hashlib.sha256(payload).digest()).digest()[:4] != checksum:
+        return INVALID_CHECKSUM
+    return None
+
+
+def _check_solana(address):
+    raw = base58_decode(address)
+    if raw is None or len(raw) != 32:
+        return INVALID_FORMAT
+    return None
+
+
+CHECKSUMS = {"EVM": _check_evm, "TRON": _check_tron, "SOLANA": _check_solana}
+
+
+class AddressValidator:
+    """
+    Validação de endereços por família de rede: formato (regex pré-compilada)
+    e checksum (EIP-55, base58check da Tron, 32 bytes da Solana).
+    As APIs em lote agrupam os endereços por família e validam cada grupo de uma vez.
+    """
+    def __init__(self, families=None, patterns=None):
+        self.families = dict(families or NETWORK_FAMILIES)
+        patterns = dict(patterns or ADDRESS_PATTERNS)
+        self.patterns = {family: re.compile(pattern) for family, pattern in patterns.items()}
+        # Classificador único: o grupo que casou identifica a família
+        alternatives = "|".join(f"(?P<{family}>{pattern.strip('^$')})" for family, pattern in patterns.items())
+        self.dispatcher = re.compile(f"^(?:{alternatives})$")
+
+    def family_for(self, network, default="EVM"):
+        return self.families.get(network.upper(), default)
+
+    def classify(self, address):
+        """Família do endereço pelo formato (None se não reconhecido)."""
+        match = self.dispatcher.match(address)
+        return match.lastgroup if match else None
+
+    def check(self, address, family=None):
+        """None se válido; senão INVALID_FORMAT ou INVALID_CHECKSUM. Sem família, usa a detectada."""
+        if family is None:
+            family = self.classify(address)
+            if family is None:
+                return INVALID_FORMAT
+        else:
+            pattern = self.patterns.get(family)
+            if pattern is None:
+                return None
+            if not pattern.match(address):
+                return INVALID_FORMAT
+        checksum = CHECKSUMS.get(family)
+        return checksum(address) if checksum else None
+
+    def validate(self, address, network):
+        return self.check(address, self.family_for(network))
+
+    def validate_batch(self, pairs):
+        """
+        Valida uma sequência de (endereço, rede). Retorna uma lista alinhada à entrada
+        com None (válido), INVALID_FORMAT ou INVALID_CHECKSUM.
+        """
+        pairs = list(pairs)
+        results = [None] * len(pairs)
+        groups = {}
+        network_families = {}
+        for i, (_, network) in enumerate(pairs):
+            family = network_families.get(network)
+            if family is None:
+                family = network_families[network] = self.family_for(network)
+            groups.setdefault(family, []).append(i)
+        for family, positions in groups.items():
+            self._check_group(family, [pairs[i][0] for i in positions], positions, results)
+        return results
+
+    def validate_many(self, addresses, network=None):
+        """Mesma rede para todos os endereços (ou família detectada, se network=None)."""
+        addresses = list(addresses)
+        if network is not None:
+            results = [None] * len(addresses)
+            self._check_group(self.family_for(network), addresses, range(len(addresses)), results)
+            return results
+        return [self.check(address) for address in addresses]
+
+    def _check_group(self, family, addresses, positions, results):
+        pattern = self.patterns.get(family)
+        if pattern is None:
+            return
+        match = pattern.match
+        checksum = CHECKSUMS.get(family)
+        for i, address in zip(positions, addresses):
+            if not match(address):
+                results[i] = INVALID_FORMAT
+            elif checksum:
+                results[i] = checksum(address)
@@ -0,0 +1,194 @@
+import hashlib
+import json
+import math
+import mmap
+import os
+import struct
+import tempfile
+
+# Layout do arquivo (little-endian):
+#   header | bloom filter (m bits) | tabela hash (n_slots * SLOT) | registros
+# Cada slot guarda o digest de 16 bytes do endereço normalizado e o offset
+# do registro JSON correspondente. Digest zerado marca slot vazio.
+# Registros idênticos (mesmo threat_type/description) são gravados uma única vez;
+# o endereço é reconstituído a partir da consulta.
+MAGIC = b"SSBL"
+VERSION = 1
+HEADER = struct.Struct("<4sHBxQQQQQQ")
+SLOT = struct.Struct("<16sQ")
+RECORD_LEN = struct.Struct("<I")
+EMPTY_DIGEST = b"\x00" * 16
+MAX_LOAD = 0.7
+BLOOM_FP_RATE = 0.01
+
+
+def normalize_address(address):
+    """Endereços EVM (hex) são case-insensitive; base58 (Tron/Solana) não."""
+    addr = str(address).strip()
+    if addr[:2] in ("0x", "0X"):
+        return addr.lower()
+    return addr
+
+
+def _digest(normalized):
+    digest = hashlib.blake2b(normalized.encode("utf-8"), digest_size=16).digest()
+    return digest if digest != EMPTY_DIGEST else b"\x00" * 15 + b"\x01"
+
+
+class BlacklistStore:
+    """
+    Blacklist indexada em arquivo mapeável em memória (mmap).
+    Lookup em tempo constante, com bloom filter na frente para descartar
+    o caso comum ("não listado") sem tocar na tabela principal.
+    """
+    def __init__(self, buffer, source=None):
+        self._buf = buffer
+        self.source = source
+        magic, version, k, n, m, n_slots, bloom_off, table_off, records_off = HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"Blacklist em formato desconhecido: {source}")
+        self.k = k
+        self.n_entries = n
+        self.bloom_bits = m
+        self.n_slots = n_slots
+        self._bloom_off = bloom_off
+        self._table_off = table_off
+        self._records_off = records_off
+
+    def __len__(self):
+        return self.n_entries
+
+    def __contains__(self, address):
+        return self.lookup(address) is not None
+
+    def _bloom_positions(self, digest):
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        m = self.bloom_bits
+        return ((h1 + i * h2) % m for i in range(self.k))
+
+    def might_contain(self, digest):
+        if not self.n_entries:
+            return False
+        buf, off = self._buf, self._bloom_off
+        for pos in self._bloom_positions(digest):
+            if not buf[off + (pos >> 3)] & (1 << (pos & 7)):
+                return False
+        return True
+
+    def lookup(self, address):
+        """Retorna o registro da blacklist para o endereço, ou None."""
+        digest = _digest(normalize_address(address))
+        if not self.might_contain(digest):
+            return None
+
+        mask = self.n_slots - 1
+        slot = int.from_bytes(digest[8:], "little") & mask
+        while True:
+            stored, record_off = SLOT.unpack_from(self._buf, self._table_off + slot * SLOT.size)
+            if stored == EMPTY_DIGEST:
+                return None
+            if stored == digest:
+                start = self._records_off + record_off
+                (length,) = RECORD_LEN.unpack_from(self._buf, start)
+                start += RECORD_LEN.size
+                entry = json.loads(bytes(self._buf[start:start + length]))
+                entry["address"] = normalize_address(address)
+                return entry
+            slot = (slot + 1) & mask
+
+    def close(self):
+        if isinstance(self._buf, mmap.mmap):
+            self._buf.close()
+
+    @classmethod
+    def open(cls, path):
+        with open(path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            return cls(buffer, source=path)
+        except (ValueError, struct.error):
+            buffer.close()
+            raise
+
+    @classmethod
+    def build(cls, entries, path=None):
+        """
+        Compila entradas {'address', 'threat_type', 'description'} no formato indexado.
+        Com 'path', grava o arquivo de forma atômica e o abre via mmap; sem, mantém em memória.
+        Endereços duplicados mantêm a primeira ocorrência.
+        """
+        digests = {}
+        offsets = {}
+        records = bytearray()
+        for entry in entries:
+            digest = _digest(normalize_address(entry["address"]))
+            if digest in digests:
+                continue
+            fields = {key: value for key, value in entry.items() if key != "address"}
+            payload = json.dumps(fields, ensure_ascii=False, separators=(",", ":"), sort_keys=True).encode("utf-8")
+            if payload not in offsets:
+                offsets[payload] = len(records)
+                records += RECORD_LEN.pack(len(payload)) + payload
+            digests[digest] = offsets[payload]
+
+        n = len(digests)
+        m = max(64, int(math.ceil(-n * math.log(BLOOM_FP_RATE) / (math.log(2) ** 2) / 64)) * 64)
+        k = max(1, round(m / max(n, 1) * math.log(2))) if n else 1
+        n_slots = 1 << max(4, math.ceil(math.log2(max(n, 1) / MAX_LOAD)))
+
+        bloom_off = HEADER.size
+        table_off = bloom_off + m // 8
+        records_off = table_off + n_slots * SLOT.size
+
+        buf = bytearray(records_off)
+        HEADER.pack_into(buf, 0, MAGIC, VERSION, min(k, 255), n, m, n_slots, bloom_off, table_off, records_off)
+        store = cls(buf)
+        mask = n_slots - 1
+        for digest, record_off in digests.items():
+            for pos in store._bloom_positions(digest):
+                buf[bloom_off + (pos >> 3)] |= 1 << (pos & 7)
+            slot = int.from_bytes(digest[8:], "little") & mask
+            while buf[table_off + slot * SLOT.size:table_off + slot * SLOT.size + 16] != EMPTY_DIGEST:
+                slot = (slot + 1) & mask
+            SLOT.pack_into(buf, table_off + slot * SLOT.size, digest, record_off)
+        buf += records
+
+        if path is None:
+            return cls(bytes(buf))
+
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(buf)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return cls.open(path)
+
+    @classmethod
+    def from_registry(cls, json_path, bin_path=None):
+        """
+        Carrega a blacklist compilada (.bin) se estiver atualizada em relação ao JSON;
+        caso contrário, recompila. Em disco somente leitura, compila em memória.
+        """
+        bin_path = bin_path or os.path.splitext(json_path)[0] + ".bin"
+        json_mtime = os.path.getmtime(json_path) if os.path.exists(json_path) else None
+
+        if os.path.exists(bin_path) and (json_mtime is None or os.path.getmtime(bin_path) >= json_mtime):
+            try:
+                return cls.open(bin_path)
+            except (ValueError, struct.error):
+                pass  # Formato antigo, vazio ou truncado: recompila abaixo
+
+        entries = []
+        if json_mtime is not None:
+            with open(json_path, "r") as f:
+                entries = json.load(f)
+        try:
+            return cls.build(entries, bin_path)
+        except OSError:
+            return cls.build(entries)
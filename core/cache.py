@@ -0,0 +1,164 @@
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import time
+from collections import OrderedDict
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem trava entre processos (vale o último a gravar)
+    fcntl = None
+
+
+class PersistentLRUCache:
+    """
+    Cache LRU limitado por tamanho e idade, persistido em JSON no disco local.
+    A gravação é agrupada: no máximo uma a cada 'flush_interval' segundos (e no save()/flush()).
+    Dentro de um event loop, a gravação periódica roda numa thread. Processos que
+    compartilham o arquivo (workers) gravam sob trava, mesclando as entradas já gravadas.
+    """
+    def __init__(self, path=None, max_entries=5000, max_age=7 * 86400, flush_interval=30):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.flush_interval = flush_interval
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._dirty = False
+        self._last_flush = time.time()
+        self._flush_task = None
+        self.load()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        entry = self.entries.get(key)
+        return entry is not None and time.time() - entry[1] < self.max_age
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None or time.time() - entry[1] >= self.max_age:
+            if entry is not None:
+                del self.entries[key]
+                self._dirty = True
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def set(self, key, value):
+        self.entries[key] = (value, time.time())
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        self._dirty = True
+        if time.time() - self._last_flush >= self.flush_interval:
+            self._flush_in_background()
+
+    def _flush_in_background(self):
+        """Grava sem bloquear o event loop (fora de um loop, grava na hora)."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.save()
+            return
+        if self._flush_task is not None and not self._flush_task.done():
+            return
+        self._last_flush = time.time()
+        if not self.path or not self._dirty:
+            return
+        # A cópia é feita no loop; serialização e disco ficam na thread
+        snapshot = self._snapshot()
+        self._dirty = False
+        self._flush_task = loop.create_task(asyncio.to_thread(self._write, snapshot))
+
+    async def flush(self):
+        """Aguarda a gravação em andamento e grava o que faltar (numa thread)."""
+        if self._flush_task is not None:
+            await self._flush_task
+            self._flush_task = None
+        if self.path and self._dirty:
+            snapshot = self._snapshot()
+            self._dirty = False
+            await asyncio.to_thread(self._write, snapshot)
+        self._last_flush = time.time()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "size": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0
+        }
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Cache {self.path} ignorado: {e}")
+            return
+        now = time.time()
+        # Entradas gravadas da menos para a mais recente
+        for key, value, created_at in data.get("entries", []):
+            if now - created_at < self.max_age:
+                self.entries[key] = (value, created_at)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def _snapshot(self):
+        return [[k, v, t] for k, (v, t) in self.entries.items()]
+
+    def save(self):
+        """Grava o cache na hora (bloqueante; em código async, prefira flush())."""
+        self._last_flush = time.time()
+        if not self.path or not self._dirty:
+            return
+        self._dirty = False
+        self._write(self._snapshot())
+
+    def _write(self, snapshot):
+        """
+        Grava de forma atômica (arquivo temporário + rename) sob a trava '<path>.lock'.
+        Entradas gravadas por outros processos entram na mescla (a mais nova de cada chave vale).
+        """
+        directory = os.path.dirname(os.path.abspath(self.path))
+        lock_fd = None
+        try:
+            os.makedirs(directory, exist_ok=True)
+            if fcntl:
+                lock_fd = os.open(self.path + ".lock", os.O_RDWR | os.O_CREAT, 0o600)
+                fcntl.flock(lock_fd, fcntl.LOCK_EX)
+            merged = {}
+            try:
+                with open(self.path, 'r') as f:
+                    for key, value, created_at in json.load(f).get("entries", []):
+                        merged[key] = (value, created_at)
+            except (OSError, ValueError):
+                pass
+            for key, value, created_at in snapshot:
+                if key not in merged or merged[key][1] <= created_at:
+                    merged[key] = (value, created_at)
+            now = time.time()
+            entries = sorted(
+                ([k, v, t] for k, (v, t) in merged.items() if now - t < self.max_age),
+                key=lambda entry: entry[2]
+            )[-self.max_entries:]
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            with os.fdopen(fd, 'w') as f:
+                json.dump({"entries": entries}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            self._dirty = True
+            logging.warning(f"Falha ao gravar cache {self.path}: {e}")
+        finally:
+            if lock_fd is not None:
+                os.close(lock_fd)
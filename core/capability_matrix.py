@@ -0,0 +1,273 @@
+import array
+import asyncio
+import json
+import logging
+import os
+import struct
+import tempfile
+import time
+
+# Layout do snapshot (little-endian):
+#   header | nomes (JSON: exchanges, assets, networks, fetched_at) | chaves (uint64 * n) | flags (uint8 * n)
+# Cada chave empacota os ids internados de (exchange, ativo, rede); rede 0 marca
+# apenas que o ativo está listado na exchange.
+MAGIC = b"SSCM"
+VERSION = 1
+HEADER = struct.Struct("<4sHxxQQd")
+
+LISTED = 1
+WITHDRAW = 2
+DEPOSIT = 4
+
+ASSET_BITS = 24
+NETWORK_BITS = 24
+
+
+def _key(exchange_id, asset_id, network_id=0):
+    return (exchange_id << (ASSET_BITS + NETWORK_BITS)) | (asset_id << NETWORK_BITS) | network_id
+
+
+class CapabilityMatrix:
+    """
+    Matriz imutável exchange x ativo x rede com flags de saque/depósito.
+    Nomes são internados em ids inteiros; cada consulta é um acesso a dicionário.
+    """
+    def __init__(self, exchanges, assets, networks, cells, fetched_at, built_at=None):
+        self.exchanges = list(exchanges)
+        self.assets = list(assets)
+        self.networks = list(networks)
+        self.cells = cells
+        self.fetched_at = dict(fetched_at)
+        self.built_at = built_at or time.time()
+        # Ids começam em 1 (0 é reservado para "sem rede")
+        self._exchange_ids = {name: i for i, name in enumerate(self.exchanges, 1)}
+        self._asset_ids = {name: i for i, name in enumerate(self.assets, 1)}
+        self._network_ids = {name: i for i, name in enumerate(self.networks, 1)}
+
+    def __len__(self):
+        return len(self.cells)
+
+    def has_exchange(self, exchange):
+        return exchange.lower() in self._exchange_ids
+
+    def age(self, exchange):
+        fetched_at = self.fetched_at.get(exchange.lower())
+        return None if fetched_at is None else time.time() - fetched_at
+
+    def capability(self, exchange, asset, network):
+        """
+        None se o ativo não está listado na exchange; 0 se está, mas não pela rede;
+        senão as flags (LISTED | WITHDRAW | DEPOSIT).
+        """
+        exchange_id = self._exchange_ids.get(exchange.lower())
+        asset_id = self._asset_ids.get(asset.upper())
+        if not exchange_id or not asset_id or _key(exchange_id, asset_id) not in self.cells:
+            return None
+        network_id = self._network_ids.get(network.upper())
+        if not network_id:
+            return 0
+        return self.cells.get(_key(exchange_id, asset_id, network_id), 0)
+
+    @classmethod
+    def build(cls, snapshots, parse_networks):
+        """
+        Compila {exchange: (currencies, fetched_at)} na matriz.
+        'parse_networks(asset, coin_data)' é o mesmo parser usado na consulta ao vivo.
+        """
+        exchanges, assets, networks = {}, {}, {}
+        cells = {}
+
+        def intern(table, name):
+            if name not in table:
+                table[name] = len(table) + 1
+            return table[name]
+
+        fetched_at = {}
+        for exchange, (currencies, ts) in snapshots.items():
+            exchange_id = intern(exchanges, exchange.lower())
+            fetched_at[exchange.lower()] = ts
+            for code, coin_data in (currencies or {}).items():
+                asset_id = intern(assets, code.upper())
+                cells[_key(exchange_id, asset_id)] = LISTED
+                for net in parse_networks(code, coin_data or {}):
+                    key = _key(exchange_id, asset_id, intern(networks, net["network"].upper()))
+                    # Mesma regra da consulta ao vivo: vale a primeira rede com o nome normalizado
+                    if key in cells:
+                        continue
+                    flags = LISTED
+                    if net["withdraw_enable"]:
+                        flags |= WITHDRAW
+                    if net["deposit_enable"]:
+                        flags |= DEPOSIT
+                    cells[key] = flags
+        return cls(exchanges, assets, networks, cells, fetched_at)
+
+    def save(self, path):
+        """Grava o snapshot de forma atômica (arquivo temporário + rename)."""
+        names = json.dumps({
+            "exchanges": self.exchanges,
+            "assets": self.assets,
+            "networks": self.networks,
+            "fetched_at": self.fetched_at
+        }).encode("utf-8")
+        keys = array.array("Q", self.cells.keys())
+        flags = bytes(self.cells.values())
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(HEADER.pack(MAGIC, VERSION, len(names), len(keys), self.built_at))
+                f.write(names)
+                f.write(keys.tobytes())
+                f.write(flags)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            data = f.read()
+        magic, version, names_len, n_cells, built_at = HEADER.unpack_from(data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"Matriz de capacidades em formato desconhecido: {path}")
+        offset = HEADER.size
+        names = json.loads(data[offset:offset + names_len])
+        offset += names_len
+        keys = array.array("Q")
+        keys.frombytes(data[offset:offset + n_cells * 8])
+        offset += n_cells * 8
+        flags = data[offset:offset + n_cells]
+        return cls(names["exchanges"], names["assets"], names["networks"],
+                   dict(zip(keys, flags)), names["fetched_at"], built_at)
+
+
+class CapabilityIndex:
+    """
+    Mantém a matriz atual e a reconstrói em background a partir dos snapshots
+    de moedas do CCXTConnector. A nova matriz substitui a anterior numa única
+    atribuição; leitores nunca veem uma matriz parcial.
+    """
+    def __init__(self, ccxt_conn, exchanges, path=None, interval=None):
+        self.ccxt_conn = ccxt_conn
+        self.exchanges = [e.lower() for e in exchanges]
+        self.path = path
+        self.interval = float(interval or os.getenv("CAPABILITY_REFRESH_INTERVAL", ccxt_conn.snapshot_ttl))
+        self.matrix = None
+        self._builder = None
+        # Acordado por request_rebuild() quando um snapshot mais novo que a matriz aparece
+        self._wake = None
+        if path and os.path.exists(path):
+            try:
+                self.matrix = CapabilityMatrix.load(path)
+            except (OSError, ValueError, KeyError) as e:
+                logging.warning(f"Snapshot de capacidades {path} ignorado: {e}")
+
+    def stats(self):
+        matrix = self.matrix
+        if matrix is None:
+            return {"cells": 0, "exchanges": 0, "built_at": None}
+        return {"cells": len(matrix), "exchanges": len(matrix.exchanges), "built_at": matrix.built_at}
+
+    def lookup(self, exchange, max_age=None, fetched_after=None):
+        """
+        A matriz, se ela cobre a exchange com dados dentro de max_age e não mais velhos que
+        'fetched_after' (o snapshot ao vivo); senão None. Matriz atrás do snapshot ao vivo
+        pede uma reconstrução antecipada.
+        """
+        matrix = self.matrix
+        if matrix is None or not matrix.has_exchange(exchange):
+            return None
+        age = matrix.age(exchange)
+        if max_age is not None and (age is None or age > max_age):
+            return None
+        if fetched_after is not None and matrix.fetched_at[exchange.lower()] < fetched_after:
+            self.request_rebuild()
+            return None
+        return matrix
+
+    def request_rebuild(self):
+        if self._wake is not None:
+            self._wake.set()
+
+    async def rebuild(self):
+        async def fetch(exchange):
+            try:
+                return await self.ccxt_conn.get_currency_snapshot(exchange)
+            except Exception as e:
+                logging.error(f"Capability Build Error ({exchange}): {str(e)}")
+                return None
+
+        results = await asyncio.gather(*(fetch(e) for e in self.exchanges))
+        snapshots = {}
+        previous = self.matrix
+        for exchange, result in zip(self.exchanges, results):
+            if result is not None:
+                currencies, age = result
+                # fetched_at exato do snapshot ao vivo (comparado em lookup)
+                live = self.ccxt_conn.snapshots.get(exchange)
+                fetched_at = live["fetched_at"] if live and live["currencies"] is currencies else time.time() - age
+                snapshots[exchange] = (currencies, fetched_at)
+            elif previous is not None and previous.has_exchange(exchange):
+                # Falha pontual: mantém a exchange com os dados da matriz anterior
+                snapshots[exchange] = (self._currencies_from(previous, exchange), previous.fetched_at[exchange])
+
+        matrix = CapabilityMatrix.build(snapshots, self.ccxt_conn.parse_networks)
+        self.matrix = matrix
+        if self.path:
+            try:
+                await asyncio.to_thread(matrix.save, self.path)
+            except OSError as e:
+                logging.warning(f"Falha ao gravar snapshot de capacidades {self.path}: {e}")
+        return matrix
+
+    def _currencies_from(self, matrix, exchange):
+        """Reconstitui as moedas de uma exchange no formato da CCXT a partir da matriz."""
+        exchange_id = matrix._exchange_ids[exchange]
+        currencies = {}
+        shift = ASSET_BITS + NETWORK_BITS
+        mask = (1 << NETWORK_BITS) - 1
+        for key, flags in matrix.cells.items():
+            if key >> shift != exchange_id:
+                continue
+            asset = matrix.assets[((key >> NETWORK_BITS) & ((1 << ASSET_BITS) - 1)) - 1]
+            coin = currencies.setdefault(asset, {"networks": {}})
+            network_id = key & mask
+            if network_id:
+                coin["networks"][matrix.networks[network_id - 1]] = {
+                    "withdraw": bool(flags & WITHDRAW),
+                    "deposit": bool(flags & DEPOSIT)
+                }
+        return currencies
+
+    def start(self):
+        """Reconstrói a matriz periodicamente ou quando pedido (requer event loop ativo)."""
+        if self._builder and not self._builder.done():
+            return
+        self._wake = asyncio.Event()
+
+        async def loop():
+            while True:
+                self._wake.clear()
+                try:
+                    await self.rebuild()
+                except Exception as e:
+                    logging.error(f"Capability Build Error: {str(e)}")
+                try:
+                    await asyncio.wait_for(self._wake.wait(), self.interval)
+                except asyncio.TimeoutError:
+                    pass
+
+        self._builder = asyncio.create_task(loop())
+
+    async def stop(self):
+        if self._builder:
+            self._builder.cancel()
+            try:
+                await self._builder
+            except asyncio.CancelledError:
+                pass
+        self._builder = None
+        self._wake = None
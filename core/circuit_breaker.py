@@ -0,0 +1,99 @@
+import logging
+import os
+import time
+
+CLOSED = "CLOSED"
+OPEN = "OPEN"
+HALF_OPEN = "HALF_OPEN"
+
+
+class CircuitOpenError(Exception):
+    """Chamada recusada sem tocar no upstream: o circuito está aberto."""
+    pass
+
+
+class CircuitBreaker:
+    """
+    Disjuntor por upstream.
+    CLOSED: chamadas passam; 'failure_threshold' falhas seguidas abrem o circuito.
+    OPEN: chamadas falham na hora até 'recovery_timeout' segundos depois da abertura.
+    HALF_OPEN: uma única chamada de teste passa; sucesso fecha, falha reabre.
+    """
+    def __init__(self, name, failure_threshold=None, recovery_timeout=None):
+        self.name = name
+        self.failure_threshold = int(failure_threshold or os.getenv("BREAKER_FAILURE_THRESHOLD", 5))
+        self.recovery_timeout = float(recovery_timeout or os.getenv("BREAKER_RECOVERY_TIMEOUT", 30))
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.last_error = None
+        self._probing = False
+        self._probe_started = None
+
+    @property
+    def is_open(self):
+        """True enquanto as chamadas seriam recusadas (aberto, ou meio-aberto com teste em curso)."""
+        if self.state == OPEN:
+            return time.time() - self.opened_at < self.recovery_timeout
+        return self.state == HALF_OPEN and self._probe_pending()
+
+    def _probe_pending(self):
+        # Um teste que nunca reportou (ex.: cancelado) expira após recovery_timeout
+        return self._probing and time.time() - self._probe_started < self.recovery_timeout
+
+    def allow(self):
+        """Reserva a passagem de uma chamada; False se ela deve falhar na hora."""
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN:
+            if time.time() - self.opened_at < self.recovery_timeout:
+                return False
+            self.state = HALF_OPEN
+            self._probing = False
+        if self._probe_pending():
+            return False
+        self._probing = True
+        self._probe_started = time.time()
+        return True
+
+    def check(self):
+        if not self.allow():
+            raise CircuitOpenError(f"Circuito aberto para {self.name}: {self.last_error}")
+
+    def record_success(self):
+        if self.state != CLOSED:
+            logging.info(f"Circuito {self.name} fechado.")
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    def record_failure(self, error=None):
+        self.failures += 1
+        self.last_error = str(error) if error is not None else self.last_error
+        self._probing = False
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != OPEN:
+                logging.warning(f"Circuito {self.name} aberto: {self.last_error}")
+            self.state = OPEN
+            self.opened_at = time.time()
+
+    def stats(self):
+        return {"state": self.state, "failures": self.failures, "last_error": self.last_error}
+
+
+class BreakerRegistry:
+    """Um CircuitBreaker por nome de upstream, criado no primeiro uso."""
+    def __init__(self, failure_threshold=None, recovery_timeout=None):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.breakers = {}
+
+    def get(self, name):
+        breaker = self.breakers.get(name)
+        if breaker is None:
+            breaker = self.breakers[name] = CircuitBreaker(name, self.failure_threshold, self.recovery_timeout)
+        return breaker
+
+    def stats(self):
+        return {name: breaker.stats() for name, breaker in self.breakers.items()}
@@ -0,0 +1,24 @@
+import os
+
+# .env na raiz do projeto (onde load_dotenv() dos módulos o encontrava)
+ROOT_DOTENV = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".env")
+
+_loaded = False
+
+
+def load_env(path=None):
+    """
+    Carrega o .env uma única vez por processo. Chamado pelos pontos de entrada
+    (API, bot, scripts); os módulos de core só leem os.getenv. Variáveis já
+    definidas no ambiente (ex.: as do deploy) têm prioridade sobre o arquivo.
+    """
+    global _loaded
+    if _loaded:
+        return
+    _loaded = True
+    path = path or (".env" if os.path.exists(".env") else ROOT_DOTENV)
+    # Sem .env (ex.: deploy com variáveis do ambiente), a python-dotenv nem é importada
+    if not os.path.exists(path):
+        return
+    from dotenv import load_dotenv
+    load_dotenv(path)
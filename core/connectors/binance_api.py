@@ -1,23 +1,28 @@
-import requests
+import asyncio
 import hashlib
 import hmac
 import time
 import os
-from dotenv import load_dotenv
+from core.config import load_env
+from core.http_client import get_http_client
 
-load_dotenv()
 
 class BinanceConnector:
-    def __init__(self):
+    def __init__(self, http=None):
         self.base_url = "https://api.binance.com"
         self.api_key = os.getenv("BINANCE_API_KEY")
         self.api_secret = os.getenv("BINANCE_API_SECRET") # Note: Precisaremos dela para HMAC
+        self._http = http
+
+    @property
+    def http(self):
+        return self._http or get_http_client()
 
     def _generate_signature(self, params):
         query_string = '&'.join([f"{k}={v}" for k, v in params.items()])
         return hmac.new(self.api_secret.encode('utf-8'), query_string.encode('utf-8'), hashlib.sha256).hexdigest()
 
-    def get_supported_networks(self, asset):
+    async def get_supported_networks(self, asset):
         """
         Consulta a API da Binance para ver quais redes suportam depósitos/saques para o ativo.
         """
@@ -33,7 +38,7 @@ class BinanceConnector:
         headers = {"X-MBX-APIKEY": self.api_key}
 
         try:
-            response = requests.get(f"{self.base_url}{endpoint}", params=params, headers=headers)
+            response = await self.http.get(f"{self.base_url}{endpoint}", params=params, headers=headers)
             response.raise_for_status()
             data = response.json()
 
@@ -56,13 +61,17 @@ class BinanceConnector:
         except Exception as e:
             return None, f"Erro ao consultar API da Binance: {str(e)}"
 
-if __name__ == "__main__":
+async def main():
     # Teste rápido do conector
     conn = BinanceConnector()
     print(f"--- Consultando redes para USDT na Binance ---")
-    networks, error = conn.get_supported_networks("USDT")
+    networks, error = await conn.get_supported_networks("USDT")
     if error:
         print(f"Erro: {error}")
     else:
         for n in networks:
             print(f"- {n['network']} ({n['name']}): Saque={n['withdraw_enable']}")
+
+if __name__ == "__main__":
+    load_env()
+    asyncio.run(main())
@@ -1,17 +1,20 @@
-import requests
 import hashlib
 import hmac
 import time
 import os
-from dotenv import load_dotenv
+from core.http_client import get_http_client
 
-load_dotenv()
 
 class BybitConnector:
-    def __init__(self):
+    def __init__(self, http=None):
         self.base_url = "https://api.bybit.com"
         self.api_key = os.getenv("BYBIT_API_KEY")
         self.api_secret = os.getenv("BYBIT_API_SECRET")
+        self._http = http
+
+    @property
+    def http(self):
+        return self._http or get_http_client()
 
     def _generate_signature(self, params):
         # Bybit V5 usa uma lógica de assinatura específica
@@ -20,7 +23,7 @@ class BybitConnector:
         param_str = timestamp + self.api_key + recv_window + params
         return hmac.new(self.api_secret.encode('utf-8'), param_str.encode('utf-8'), hashlib.sha256).hexdigest()
 
-    def get_supported_networks(self, asset):
+    async def get_supported_networks(self, asset):
         """
         Consulta a API da Bybit V5 para ver as redes suportadas.
         Endpoint: /v5/asset/coin/query-info
@@ -42,7 +45,7 @@ class BybitConnector:
         }
 
         try:
-            response = requests.get(f"{self.base_url}{endpoint}?{params}", headers=headers)
+            response = await self.http.get(f"{self.base_url}{endpoint}?{params}", headers=headers)
             data = response.json()
             
             if data['retCode'] == 0:
@@ -1,9 +1,77 @@
-import ccxt
+import asyncio
+import json
 import logging
+import os
+import struct
+import tempfile
+import time
+import zlib
+from core.circuit_breaker import BreakerRegistry, CircuitOpenError
+from core.config import load_env
+from core.metrics import get_metrics
+from core.scheduler import HostTokenBucket, SingleFlight
+from core.shared_cache import get_shared_cache
+from core.transport import wrap_ccxt_fetch
+
+# ccxt.async_support importa todas as exchanges (~1s): só no primeiro uso, fora do import da API
+_ccxt = None
+
+
+def ccxt_module():
+    global _ccxt
+    if _ccxt is None:
+        import ccxt.async_support as ccxt
+        _ccxt = ccxt
+    return _ccxt
+
+
+async def load_ccxt():
+    """Importa a ccxt numa thread: o event loop continua atendendo enquanto ela carrega."""
+    if _ccxt is None:
+        await asyncio.to_thread(ccxt_module)
+    return _ccxt
+
+
+# Snapshot de moedas em disco (little-endian): header | moedas compactas (JSON + zlib)
+# fetched_at fica no header: a idade é conhecida sem descomprimir o resto.
+SNAPSHOT_MAGIC = b"SSCX"
+SNAPSHOT_VERSION = 1
+SNAPSHOT_HEADER = struct.Struct("<4sHxxd")
+
+
+def save_snapshot(path, snapshot):
+    """Grava o snapshot de forma atômica (arquivo temporário + rename)."""
+    body = zlib.compress(json.dumps(snapshot["currencies"], separators=(",", ":")).encode("utf-8"))
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, snapshot["fetched_at"]))
+            f.write(body)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def load_snapshot(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, version, fetched_at = SNAPSHOT_HEADER.unpack_from(data, 0)
+    if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+        raise ValueError(f"Snapshot CCXT em formato desconhecido: {path}")
+    currencies = json.loads(zlib.decompress(data[SNAPSHOT_HEADER.size:]))
+    return {"currencies": currencies, "fetched_at": fetched_at}
+
 
 class CCXTConnector:
-    def __init__(self):
+    def __init__(self, snapshot_ttl=None, snapshot_max_stale=None, timeout_ms=None, shared_cache=None, snapshot_dir=None):
         self.exchanges = {}
+        self._shared_cache = shared_cache
+        self.timeout_ms = int(timeout_ms or os.getenv("CCXT_TIMEOUT_MS", 20000))
+        # Um circuit breaker por exchange: com o circuito aberto, serve o último snapshot bom
+        self.breakers = BreakerRegistry()
         # Mapeamento para normalizar nomes de redes vindos de diferentes corretoras
         self.network_map = {
             "BSC": "BEP20",
@@ -16,6 +84,57 @@ class CCXTConnector:
             "MATIC": "Polygon"
         }
 
+        # Cache de snapshots de moedas por exchange (stale-while-revalidate)
+        # ttl: idade a partir da qual o snapshot é revalidado em background
+        # max_stale: idade máxima aceitável antes de bloquear a requisição num refresh
+        self.snapshot_ttl = float(snapshot_ttl or os.getenv("CCXT_SNAPSHOT_TTL", 300))
+        self.snapshot_max_stale = float(snapshot_max_stale or os.getenv("CCXT_SNAPSHOT_MAX_STALE", 3600))
+        self.snapshots = {}
+        # Snapshots em disco (CCXT_SNAPSHOT_DIR; vazio desliga): um worker novo já
+        # começa com as moedas da última leitura e só revalida em background
+        self.snapshot_dir = snapshot_dir if snapshot_dir is not None else os.getenv("CCXT_SNAPSHOT_DIR", ".cache/ccxt")
+        self._saving = set()
+        if self.snapshot_dir:
+            self.restore_snapshots()
+        # Refresh por exchange em andamento, compartilhado por todos os chamadores
+        self.refreshing = SingleFlight()
+        self._refresher = None
+        # Orçamento de requisições por exchange, compartilhado entre os processos do host
+        self.rate_limits = {}
+
+    @property
+    def shared_cache(self):
+        # Snapshots compartilhados entre os processos do host (tipo 'currencies')
+        return self._shared_cache or get_shared_cache()
+
+    def _snapshot_path(self, exchange_id):
+        return os.path.join(self.snapshot_dir, f"{exchange_id}.bin")
+
+    def restore_snapshots(self):
+        """Carrega os snapshots gravados em snapshot_dir (mantém os já em memória, se mais novos)."""
+        try:
+            names = os.listdir(self.snapshot_dir)
+        except OSError:
+            return
+        for name in names:
+            exchange_id, ext = os.path.splitext(name)
+            if ext != ".bin" or not exchange_id.isalnum():
+                continue
+            path = self._snapshot_path(exchange_id)
+            try:
+                snapshot = load_snapshot(path)
+            except (OSError, ValueError, struct.error, zlib.error) as e:
+                logging.warning(f"Snapshot CCXT {path} ignorado: {e}")
+                continue
+            current = self.snapshots.get(exchange_id)
+            if current is None or snapshot["fetched_at"] > current["fetched_at"]:
+                self.snapshots[exchange_id] = snapshot
+
+    def snapshot_stats(self):
+        """Idade (s) do snapshot em memória de cada exchange."""
+        now = time.time()
+        return {exchange_id: round(now - s["fetched_at"], 1) for exchange_id, s in self.snapshots.items()}
+
     def _normalize_network(self, net_name):
         """Normaliza o nome da rede para o padrão do SafeSentinel."""
         return self.network_map.get(net_name, net_name)
@@ -24,74 +143,265 @@ class CCXTConnector:
         exchange_id = exchange_id.lower()
         if exchange_id not in self.exchanges:
             try:
-                exchange_class = getattr(ccxt, exchange_id)
-                self.exchanges[exchange_id] = exchange_class({
-                    'timeout': 20000,
+                # Só a classe pedida é instanciada
+                exchange_class = getattr(ccxt_module(), exchange_id)
+                exchange = exchange_class({
+                    'timeout': self.timeout_ms,
                     'enableRateLimit': True,
                 })
             except Exception:
                 return None
+            # O throttle da ccxt só vale dentro da instância; o bucket vale para o host inteiro
+            exchange.throttle = self._rate_limit(exchange_id, exchange).acquire
+            # Gravação/replay das chamadas REST da exchange (TRANSPORT_MODE)
+            self.exchanges[exchange_id] = wrap_ccxt_fetch(exchange_id, exchange)
         return self.exchanges[exchange_id]
 
-    def get_supported_networks(self, exchange_id, asset):
+    def _rate_limit(self, exchange_id, exchange):
         """
-        Versão Profissional: Consulta metadados de moedas e redes via CCXT.
-        Prioriza fetch_currencies() para dados mais precisos de saque/depósito.
+        Token bucket da exchange: RATE_LIMIT_<EXCHANGE> requisições/s (padrão: o rateLimit
+        declarado pela ccxt) com rajada de RATE_LIMIT_BURST. O custo por chamada é o da ccxt.
+        """
+        if exchange_id not in self.rate_limits:
+            rate = float(os.getenv(f"RATE_LIMIT_{exchange_id.upper()}", 0)) or 1000 / max(exchange.rateLimit, 1)
+            burst = float(os.getenv("RATE_LIMIT_BURST", 1))
+            self.rate_limits[exchange_id] = HostTokenBucket(f"ccxt-{exchange_id}", rate, burst)
+        return self.rate_limits[exchange_id]
+
+    async def close(self):
+        """Para o refresh em background e fecha as sessões HTTP das exchanges."""
+        await self.stop_background_refresh()
+        self.refreshing.cancel_all()
+        # Gravações em andamento terminam: o próximo worker restaura o snapshot mais novo
+        if self._saving:
+            await asyncio.gather(*self._saving)
+        for exchange in self.exchanges.values():
+            try:
+                await exchange.close()
+            except Exception as e:
+                logging.error(f"CCXT Close Error: {str(e)}")
+        self.exchanges = {}
+        for bucket in self.rate_limits.values():
+            bucket.close()
+        self.rate_limits = {}
+
+    async def refresh_snapshot(self, exchange_id):
+        """
+        Substitui o snapshot em cache. Se outro processo do host já baixou um snapshot
+        mais novo e ainda dentro do TTL, usa o dele; senão baixa mercados e moedas da exchange.
         """
+        exchange_id = exchange_id.lower()
+        ccxt = await load_ccxt()
         exchange = self.get_exchange_instance(exchange_id)
         if not exchange:
-            return None, f"Exchange '{exchange_id}' não suportada."
+            raise ValueError(f"Exchange '{exchange_id}' não suportada.")
+
+        shared = await self.shared_cache.get("currencies", exchange_id)
+        current = self.snapshots.get(exchange_id)
+        if shared and time.time() - shared["fetched_at"] < self.snapshot_ttl \
+                and (current is None or shared["fetched_at"] > current["fetched_at"]):
+            self.snapshots[exchange_id] = shared
+            return shared
+
+        breaker = self.breakers.get(exchange_id)
+        breaker.check()
+        metrics = get_metrics()
+        try:
+            with metrics.upstream(f"ccxt:{exchange_id}", ccxt.RequestTimeout):
+                # 1. Carregar mercados (base para tudo)
+                with metrics.span("ccxt.load_markets", exchange=exchange_id):
+                    await exchange.load_markets(reload=exchange_id in self.snapshots)
+
+                # 2. Tentar obter dados detalhados de moedas se a exchange suportar
+                if exchange.has.get('fetchCurrencies'):
+                    with metrics.span("ccxt.fetch_currencies", exchange=exchange_id):
+                        currencies = await exchange.fetch_currencies()
+                else:
+                    currencies = exchange.currencies
+        except Exception as e:
+            breaker.record_failure(e)
+            raise
+        breaker.record_success()
+
+        snapshot = {"currencies": self._compact_currencies(currencies or {}), "fetched_at": time.time()}
+        self.snapshots[exchange_id] = snapshot
+        await self.shared_cache.set("currencies", exchange_id, snapshot)
+        if self.snapshot_dir:
+            self._persist_snapshot(exchange_id, snapshot)
+        return snapshot
+
+    def _persist_snapshot(self, exchange_id, snapshot):
+        """Grava o snapshot em disco numa thread, sem atrasar quem espera o refresh."""
+        async def save():
+            try:
+                await asyncio.to_thread(save_snapshot, self._snapshot_path(exchange_id), snapshot)
+            except OSError as e:
+                logging.warning(f"Falha ao gravar snapshot CCXT de {exchange_id}: {e}")
+
+        task = asyncio.create_task(save())
+        self._saving.add(task)
+        task.add_done_callback(self._saving.discard)
+
+    @staticmethod
+    def _compact_currencies(currencies):
+        """Só os campos lidos por parse_networks (o 'info' bruto da exchange fica de fora)."""
+        fields = ("name", "withdraw", "deposit", "active")
+        compact = {}
+        for code, coin in currencies.items():
+            coin = coin or {}
+            entry = {f: coin[f] for f in fields if f in coin}
+            networks = coin.get("networks") or {}
+            if networks:
+                entry["networks"] = {
+                    net_id: {f: net[f] for f in fields if f in net}
+                    for net_id, net in networks.items()
+                }
+            compact[code] = entry
+        return compact
+
+    def _refresh_in_background(self, exchange_id):
+        """
+        Dispara (ou reaproveita) o refresh da exchange. Chamadas simultâneas
+        para a mesma exchange compartilham uma única ida à API.
+        """
+        is_new = exchange_id not in self.refreshing
+        task = self.refreshing.run(exchange_id, lambda: self.refresh_snapshot(exchange_id))
+        if is_new:
+            task.add_done_callback(lambda t: self._refresh_done(exchange_id, t))
+        return task
+
+    def _refresh_done(self, exchange_id, task):
+        if not task.cancelled() and task.exception() and not isinstance(task.exception(), CircuitOpenError):
+            logging.error(f"CCXT Refresh Error ({exchange_id}): {str(task.exception())}")
+
+    async def get_currency_snapshot(self, exchange_id):
+        """
+        Retorna (currencies, idade_em_segundos).
+        Snapshots vencidos (mas dentro de max_stale) são servidos imediatamente
+        enquanto um refresh roda em background. Com o circuito da exchange aberto,
+        o último snapshot é servido com qualquer idade (ver is_degraded).
+        """
+        exchange_id = exchange_id.lower()
+        snapshot = self.snapshots.get(exchange_id)
+        if snapshot:
+            age = time.time() - snapshot["fetched_at"]
+            degraded = self.is_degraded(exchange_id)
+            if not degraded and self.snapshot_ttl <= age < self.snapshot_max_stale:
+                # Vencido, mas ainda servível: revalida em background
+                self._refresh_in_background(exchange_id)
+            if degraded or age < self.snapshot_max_stale:
+                get_metrics().cache("ccxt_snapshot", hits=1)
+                return snapshot["currencies"], age
+        get_metrics().cache("ccxt_snapshot", misses=1)
 
         try:
-            # 1. Carregar mercados (base para tudo)
-            exchange.load_markets()
-            
-            currencies = {}
-            # 2. Tentar obter dados detalhados de moedas se a exchange suportar
-            if exchange.has.get('fetchCurrencies'):
-                currencies = exchange.fetch_currencies()
-            else:
-                currencies = exchange.currencies
+            fresh = await asyncio.shield(self._refresh_in_background(exchange_id))
+        except Exception:
+            # Esta falha pode ter aberto o circuito: vale o último snapshot bom
+            if snapshot and self.is_degraded(exchange_id):
+                return snapshot["currencies"], time.time() - snapshot["fetched_at"]
+            raise
+        return fresh["currencies"], time.time() - fresh["fetched_at"]
+
+    def is_degraded(self, exchange_id):
+        """True enquanto o circuito da exchange estiver aberto (respostas vêm do último snapshot)."""
+        breaker = self.breakers.breakers.get(exchange_id.lower())
+        return breaker is not None and breaker.is_open
+
+    def start_background_refresh(self, interval=None):
+        """Revalida os snapshots conhecidos antes de expirarem (requer event loop ativo)."""
+        if self._refresher and not self._refresher.done():
+            return
+        interval = interval or max(self.snapshot_ttl / 4, 1)
+
+        async def loop():
+            while True:
+                # Primeira passada logo no início: snapshots restaurados do disco já podem estar velhos
+                for exchange_id, snapshot in list(self.snapshots.items()):
+                    # Renova com folga para que a requisição nunca encontre um snapshot vencido
+                    if time.time() - snapshot["fetched_at"] >= self.snapshot_ttl * 0.75:
+                        self._refresh_in_background(exchange_id)
+                await asyncio.sleep(interval)
+
+        self._refresher = asyncio.create_task(loop())
+
+    async def stop_background_refresh(self):
+        if self._refresher:
+            self._refresher.cancel()
+            try:
+                await self._refresher
+            except asyncio.CancelledError:
+                pass
+        self._refresher = None
+
+    def parse_networks(self, asset, coin_data):
+        """Redes de uma moeda do snapshot (nome normalizado e flags de saque/depósito)."""
+        # A CCXT padroniza redes no campo 'networks' (se disponível)
+        raw_networks = coin_data.get('networks', {})
+
+        if not raw_networks:
+            # Algumas exchanges colocam info de saque no nível raiz da moeda
+            return [{
+                "network": self._normalize_network(asset.upper()),
+                "withdraw_enable": coin_data.get('withdraw', True),
+                "deposit_enable": coin_data.get('deposit', True),
+                "name": coin_data.get('name', asset.upper())
+            }]
+
+        res = []
+        for net_id, net_info in raw_networks.items():
+            # Extrair o nome legível se existir, senão usa o ID técnico
+            display_name = net_info.get('name', net_id)
+            res.append({
+                "network": self._normalize_network(net_id),
+                "withdraw_enable": net_info.get('withdraw', net_info.get('active', True)),
+                "deposit_enable": net_info.get('deposit', net_info.get('active', True)),
+                "name": display_name
+            })
+        return res
+
+    async def get_supported_networks(self, exchange_id, asset):
+        """
+        Versão Profissional: Consulta metadados de moedas e redes via CCXT.
+        Prioriza fetch_currencies() para dados mais precisos de saque/depósito.
+        Cada rede carrega 'snapshot_age' (segundos desde a última leitura na exchange)
+        e 'stale' (True se veio do último snapshot com o circuito da exchange aberto).
+        """
+        # Com snapshot (ex.: restaurado do disco) a resposta não espera o import da ccxt
+        if exchange_id.lower() not in self.snapshots:
+            await load_ccxt()
+            if not self.get_exchange_instance(exchange_id):
+                return None, f"Exchange '{exchange_id}' não suportada."
+
+        try:
+            currencies, age = await self.get_currency_snapshot(exchange_id)
 
             if asset.upper() in currencies:
-                coin_data = currencies[asset.upper()]
-                # A CCXT padroniza redes no campo 'networks' (se disponível)
-                raw_networks = coin_data.get('networks', {})
-                
-                if not raw_networks:
-                    # Algumas exchanges colocam info de saque no nível raiz da moeda
-                    return [{
-                        "network": self._normalize_network(asset.upper()),
-                        "withdraw_enable": coin_data.get('withdraw', True),
-                        "deposit_enable": coin_data.get('deposit', True),
-                        "name": coin_data.get('name', asset.upper())
-                    }], None
-
-                res = []
-                for net_id, net_info in raw_networks.items():
-                    # Extrair o nome legível se existir, senão usa o ID técnico
-                    display_name = net_info.get('name', net_id)
-                    res.append({
-                        "network": self._normalize_network(net_id),
-                        "withdraw_enable": net_info.get('withdraw', net_info.get('active', True)),
-                        "deposit_enable": net_info.get('deposit', net_info.get('active', True)),
-                        "name": display_name
-                    })
-                return res, None
-            
+                networks = self.parse_networks(asset, currencies[asset.upper()])
+                stale = self.is_degraded(exchange_id)
+                for net in networks:
+                    net["snapshot_age"] = round(age, 3)
+                    net["stale"] = stale
+                return networks, None
+
             return None, f"Ativo '{asset}' não localizado na {exchange_id} via API."
 
         except Exception as e:
             logging.error(f"CCXT Error: {str(e)}")
             return None, f"Erro de conexão com a exchange {exchange_id}."
 
-if __name__ == "__main__":
+async def main():
     conn = CCXTConnector()
     # Teste com OKX (uma das mais complexas em termos de redes)
     print(f"--- Consultando OKX: USDT ---")
-    networks, err = conn.get_supported_networks("okx", "USDT")
+    networks, err = await conn.get_supported_networks("okx", "USDT")
     if err:
         print(f"Erro: {err}")
     else:
         for n in networks:
             print(f"- Rede: {n['network']} | Saque Ativo: {n['withdraw_enable']} | Nome: {n['name']}")
+    await conn.close()
+
+if __name__ == "__main__":
+    load_env()
+    asyncio.run(main())
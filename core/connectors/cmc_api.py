@@ -1,21 +1,43 @@
-import requests
+import asyncio
 import os
-from dotenv import load_dotenv
+from core.config import load_env
+from core.http_client import get_http_client
+from core.scheduler import SingleFlight
+from core.shared_cache import get_shared_cache
 
-load_dotenv()
 
 class CMCConnector:
-    def __init__(self):
+    def __init__(self, http=None, shared_cache=None):
         self.base_url = "https://pro-api.coinmarketcap.com"
         self.api_key = os.getenv("CMC_API_KEY")
+        self._http = http
+        self.inflight = SingleFlight()
+        self._shared_cache = shared_cache
 
-    def get_token_metadata(self, symbol):
+    @property
+    def http(self):
+        return self._http or get_http_client()
+
+    @property
+    def shared_cache(self):
+        # Metadados compartilhados entre os processos do host (tipo 'cmc')
+        return self._shared_cache or get_shared_cache()
+
+    async def get_token_metadata(self, symbol):
         """
         Busca metadados do token, incluindo redes suportadas e endereços de contrato.
+        Consultas simultâneas do mesmo símbolo compartilham uma única requisição.
         """
+        return await self.inflight.do(symbol.upper(), lambda: self._fetch_token_metadata(symbol))
+
+    async def _fetch_token_metadata(self, symbol):
         if not self.api_key:
             return None, "API Key da CMC não configurada."
 
+        cached = await self.shared_cache.get("cmc", symbol.upper())
+        if cached is not None:
+            return cached, None
+
         endpoint = "/v2/cryptocurrency/info"
         params = {"symbol": symbol.upper()}
         headers = {
@@ -24,7 +46,7 @@ class CMCConnector:
         }
 
         try:
-            response = requests.get(f"{self.base_url}{endpoint}", params=params, headers=headers)
+            response = await self.http.get(f"{self.base_url}{endpoint}", params=params, headers=headers)
             response.raise_for_status()
             data = response.json()
             
@@ -40,15 +62,16 @@ class CMCConnector:
                 "description": token_info.get('description'),
                 "networks": platforms # Lista de dicts com {'name': ..., 'address': ...}
             }
+            await self.shared_cache.set("cmc", symbol.upper(), result)
             return result, None
 
         except Exception as e:
             return None, f"Erro ao consultar CMC: {str(e)}"
 
-if __name__ == "__main__":
+async def main():
     cmc = CMCConnector()
     print(f"--- Consultando metadados de USDT na CMC ---")
-    info, error = cmc.get_token_metadata("USDT")
+    info, error = await cmc.get_token_metadata("USDT")
     if error:
         print(f"Erro: {error}")
     else:
@@ -56,3 +79,7 @@ if __name__ == "__main__":
         print("Redes e Contratos:")
         for net in info['networks']:
             print(f"- {net['platform']['name']}: {net['contract_address']}")
+
+if __name__ == "__main__":
+    load_env()
+    asyncio.run(main())
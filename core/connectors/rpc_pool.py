@@ -0,0 +1,308 @@
+import asyncio
+import collections
+import itertools
+import logging
+import time
+import httpx
+from core.circuit_breaker import CircuitOpenError
+from core.http_client import HTTPClient
+
+
+class RPCError(Exception):
+    pass
+
+
+class RPCBatchRejected(RPCError):
+    """O provedor recusou o batch (tamanho acima do limite)."""
+    pass
+
+
+class RPCPool:
+    """
+    Pool de conexões keep-alive para um endpoint JSON-RPC.
+    Sai de rotação após 'eject_after' falhas seguidas ou com taxa de erro da janela acima de
+    'eject_error_rate'; volta a receber tráfego após 'eject_cooldown' segundos (ou no próximo
+    health check bem-sucedido), mesmo sem health checks em background.
+    """
+    def __init__(self, network, url, pool_size=10, keepalive=30, timeout=10, retries=1, window=100,
+                 eject_after=3, eject_error_rate=0.5, eject_cooldown=30):
+        self.network = network
+        self.url = url
+        # Mesma camada HTTP dos conectores REST, com limites próprios por rede
+        self.client = HTTPClient(
+            timeout=timeout,
+            max_connections=pool_size,
+            max_per_host=pool_size,
+            keepalive=keepalive,
+            retries=retries
+        )
+        self.eject_after = eject_after
+        self.eject_error_rate = eject_error_rate
+        self.eject_cooldown = eject_cooldown
+        # Falhas seguidas e instante (monotônico) em que o endpoint saiu de rotação
+        self.failures = 0
+        self.ejected_at = None
+        self.last_check = None
+        # Maior batch aceito pelo provedor, aprendido quando um lote é recusado
+        self.max_batch = None
+        self._ids = itertools.count(1)
+        # Janela móvel das últimas requisições: latência (s) e resultado
+        # (True = sucesso, False = erro, None = cancelada por ter perdido para a cópia)
+        self.latencies = collections.deque(maxlen=window)
+        self.outcomes = collections.deque(maxlen=window)
+
+    @property
+    def healthy(self):
+        # Após o cooldown, o endpoint volta a ser tentado; uma nova falha o tira de novo
+        return self.ejected_at is None or time.monotonic() - self.ejected_at >= self.eject_cooldown
+
+    def record(self, latency, ok):
+        self.outcomes.append(ok)
+        if ok:
+            self.latencies.append(latency)
+            self.failures = 0
+            self.ejected_at = None
+            return
+        self.failures += 1
+        # Mínimo de amostras para a taxa de erro não ejetar com uma falha isolada
+        sampled = len(self.outcomes) >= min(self.outcomes.maxlen, 10)
+        if self.failures >= self.eject_after or (sampled and self.error_rate >= self.eject_error_rate):
+            self.eject()
+
+    def record_cancelled(self, elapsed):
+        """
+        Chamada cancelada antes de responder (perdeu para a cópia): 'elapsed' é só um limite
+        inferior da latência. Não conta como sucesso nem como falha (não mexe na ejeção).
+        """
+        self.outcomes.append(None)
+        median = self.latency_quantile(0.5)
+        # Abaixo da mediana, o limite inferior não acrescenta informação
+        if median is None or elapsed > median:
+            self.latencies.append(elapsed)
+
+    def eject(self):
+        self.ejected_at = time.monotonic()
+
+    def latency_quantile(self, q):
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    @property
+    def error_rate(self):
+        return self.outcomes.count(False) / len(self.outcomes) if self.outcomes else 0.0
+
+    @property
+    def loss_rate(self):
+        """Fração da janela em que o endpoint não respondeu antes da cópia."""
+        return self.outcomes.count(None) / len(self.outcomes) if self.outcomes else 0.0
+
+    def score(self):
+        """Menor é melhor: latência mediana penalizada pelas taxas de erro e de derrota para a cópia."""
+        median = self.latency_quantile(0.5)
+        return (median if median is not None else 0.0) * (1 + 10 * (self.error_rate + self.loss_rate)) + self.error_rate
+
+    def stats(self):
+        p50, p95 = self.latency_quantile(0.5), self.latency_quantile(0.95)
+        return {
+            "url": self.url,
+            "healthy": self.healthy,
+            "p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+            "error_rate": round(self.error_rate, 4),
+            "loss_rate": round(self.loss_rate, 4)
+        }
+
+    async def call(self, method, params):
+        payload = {"jsonrpc": "2.0", "id": next(self._ids), "method": method, "params": params}
+        try:
+            response = await self.client.post(self.url, json=payload)
+            response.raise_for_status()
+            data = response.json()
+        except (httpx.HTTPError, CircuitOpenError, ValueError) as e:
+            # Falha de transporte: conta na janela do endpoint (record), sem ejetá-lo sozinha
+            raise RPCError(f"RPC {self.network} indisponível: {str(e)}")
+
+        if data.get("error"):
+            raise RPCError(data["error"].get("message", str(data["error"])))
+        return data.get("result")
+
+    async def call_batch(self, calls):
+        """
+        Envia vários (method, params) num único request JSON-RPC batch.
+        Retorna a lista de resultados na ordem de entrada; erros individuais viram RPCError na lista.
+        """
+        ids = [next(self._ids) for _ in calls]
+        payload = [
+            {"jsonrpc": "2.0", "id": call_id, "method": method, "params": params}
+            for call_id, (method, params) in zip(ids, calls)
+        ]
+        try:
+            response = await self.client.post(self.url, json=payload)
+            if response.status_code in (400, 413) and len(calls) > 1:
+                raise RPCBatchRejected(f"Batch de {len(calls)} recusado (HTTP {response.status_code}).")
+            response.raise_for_status()
+            data = response.json()
+        except (httpx.HTTPError, CircuitOpenError, ValueError) as e:
+            raise RPCError(f"RPC {self.network} indisponível: {str(e)}")
+
+        # Provedores que não aceitam o tamanho do batch respondem um único objeto de erro
+        if not isinstance(data, list):
+            error = data.get("error") if isinstance(data, dict) else None
+            raise RPCBatchRejected(error.get("message", str(error)) if error else "Batch recusado pelo provedor.")
+
+        by_id = {item.get("id"): item for item in data}
+        results = []
+        for call_id in ids:
+            item = by_id.get(call_id)
+            if item is None:
+                results.append(RPCError("Resposta ausente no batch."))
+            elif item.get("error"):
+                results.append(RPCError(item["error"].get("message", str(item["error"]))))
+            else:
+                results.append(item.get("result"))
+        return results
+
+    async def check_health(self):
+        try:
+            await self.call("eth_blockNumber", [])
+            self.failures = 0
+            self.ejected_at = None
+        except RPCError as e:
+            logging.warning(str(e))
+            self.eject()
+        self.last_check = time.time()
+        return self.healthy
+
+    async def aclose(self):
+        await self.client.aclose()
+
+
+class RPCRouter:
+    """
+    Vários endpoints JSON-RPC para a mesma rede, com a interface de um RPCPool.
+    Cada chamada vai para o endpoint de melhor pontuação (latência e erros na janela móvel).
+    Se ele não responder dentro do seu p95, uma cópia vai para o segundo melhor e vale
+    a primeira resposta. As cópias são limitadas por 'hedge_budget' (fração das chamadas).
+    """
+    def __init__(self, network, urls, pool_size=10, keepalive=30, timeout=10, window=100,
+                 hedge_budget=0.1, hedge_min_delay=0.05, hedge_max_delay=1.0,
+                 eject_after=3, eject_error_rate=0.5, eject_cooldown=30):
+        self.network = network
+        # Com mais de um endpoint, a troca de endpoint substitui o retry no mesmo host
+        retries = 1 if len(urls) == 1 else 0
+        self.pools = [
+            RPCPool(network, url, pool_size, keepalive, timeout, retries, window, eject_after, eject_error_rate, eject_cooldown)
+            for url in urls
+        ]
+        self.max_batch = None
+        self.hedge_budget = hedge_budget
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_max_delay = hedge_max_delay
+        self._hedge_tokens = 1.0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    @property
+    def url(self):
+        return self.pools[0].url
+
+    @property
+    def healthy(self):
+        return any(pool.healthy for pool in self.pools)
+
+    @property
+    def last_check(self):
+        return max((p.last_check for p in self.pools if p.last_check), default=None)
+
+    def ranked(self):
+        healthy = [pool for pool in self.pools if pool.healthy]
+        return sorted(healthy, key=lambda pool: pool.score())
+
+    def _hedge_delay(self, pool):
+        p95 = pool.latency_quantile(0.95)
+        if p95 is None:
+            return self.hedge_max_delay
+        return min(max(p95, self.hedge_min_delay), self.hedge_max_delay)
+
+    def _take_hedge_token(self):
+        if self._hedge_tokens >= 1:
+            self._hedge_tokens -= 1
+            return True
+        return False
+
+    async def _timed(self, pool, method, *args):
+        start = time.perf_counter()
+        try:
+            result = await getattr(pool, method)(*args)
+        except RPCBatchRejected:
+            # O endpoint respondeu; só recusou o tamanho do lote
+            pool.record(time.perf_counter() - start, True)
+            raise
+        except RPCError:
+            pool.record(time.perf_counter() - start, False)
+            raise
+        except asyncio.CancelledError:
+            # Perdeu para a cópia (hedge): sem essa amostra, um endpoint lento (ou que não
+            # responde) mantém a pontuação antiga e segue em primeiro
+            pool.record_cancelled(time.perf_counter() - start)
+            raise
+        pool.record(time.perf_counter() - start, True)
+        return result
+
+    async def _route(self, method, *args):
+        ranked = self.ranked()
+        if not ranked:
+            raise RPCError(f"RPC {self.network} indisponível: nenhum endpoint saudável.")
+        # Cada chamada rende uma fração de cópia; o saldo nunca passa de uma cópia pendente
+        self._hedge_tokens = min(self._hedge_tokens + self.hedge_budget, 1.0 + self.hedge_budget)
+
+        primary, fallbacks = ranked[0], ranked[1:]
+        first = asyncio.create_task(self._timed(primary, method, *args))
+        pending = {first}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=self._hedge_delay(primary))
+            if not done and fallbacks and self._take_hedge_token():
+                self.hedges += 1
+                pending.add(asyncio.create_task(self._timed(fallbacks.pop(0), method, *args)))
+
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not first:
+                            self.hedge_wins += 1
+                        return task.result()
+                    error = task.exception()
+                    if isinstance(error, RPCBatchRejected):
+                        raise error
+                # Falhou sem resposta válida pendente: segue para o próximo endpoint
+                if not pending and fallbacks:
+                    pending.add(asyncio.create_task(self._timed(fallbacks.pop(0), method, *args)))
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def call(self, method, params):
+        return await self._route("call", method, params)
+
+    async def call_batch(self, calls):
+        return await self._route("call_batch", calls)
+
+    async def check_health(self):
+        await asyncio.gather(*(pool.check_health() for pool in self.pools))
+        return self.healthy
+
+    def stats(self):
+        return {
+            "endpoints": [pool.stats() for pool in self.pools],
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins
+        }
+
+    async def aclose(self):
+        for pool in self.pools:
+            await pool.aclose()
@@ -1,44 +1,223 @@
-from web3 import Web3
+import asyncio
+import logging
 import os
-from dotenv import load_dotenv
+from core.address_validator import to_checksum_address
+from core.connectors.rpc_pool import RPCBatchRejected, RPCError, RPCRouter
+from core.scheduler import SingleFlight
+from core.shared_cache import get_shared_cache
 
-load_dotenv()
+# Rede da transferência (padrão do SafeSentinel/CCXT) -> chain dos pools RPC
+RPC_CHAINS = {
+    "ERC20": "ETH", "ETH": "ETH",
+    "BEP20": "BSC", "BSC": "BSC",
+    "POLYGON": "POLYGON", "MATIC": "POLYGON",
+    "ARBITRUM": "ARBITRUM", "ARBONE": "ARBITRUM"
+}
+
+
+def rpc_chain(network):
+    """Chain com RPC configurado para a rede (ex.: ERC20 -> ETH), ou None (ex.: TRC20)."""
+    return RPC_CHAINS.get(network.upper()) if network else None
+
+
+def _rpc_config(network, default_urls):
+    """
+    Lê a configuração de cada rede (ex.: RPC_ETH, RPC_ETH_POOL_SIZE, RPC_ETH_KEEPALIVE, RPC_ETH_BATCH_SIZE).
+    RPC_<REDE> aceita vários endpoints separados por vírgula.
+    batch_size é o máximo de chamadas por request JSON-RPC batch aceito pelo provedor.
+    """
+    urls = os.getenv(f"RPC_{network}", default_urls)
+    return {
+        "urls": [url.strip() for url in urls.split(",") if url.strip()],
+        "pool_size": int(os.getenv(f"RPC_{network}_POOL_SIZE", 10)),
+        "keepalive": float(os.getenv(f"RPC_{network}_KEEPALIVE", 30)),
+        "batch_size": int(os.getenv(f"RPC_{network}_BATCH_SIZE", 100))
+    }
 
 class OnChainVerifier:
-    def __init__(self):
+    def __init__(self, health_interval=None, shared_cache=None):
         # RPCs (Priorizando chamadas seguras)
         self.rpcs = {
-            "ETH": os.getenv("RPC_ETH", "https://eth.llamarpc.com"),
-            "BSC": os.getenv("RPC_BSC", "https://binance.llamarpc.com"),
-            "POLYGON": os.getenv("RPC_POLYGON", "https://polygon.llamarpc.com"),
-            "ARBITRUM": os.getenv("RPC_ARBITRUM", "https://arbitrum.llamarpc.com")
+            "ETH": _rpc_config("ETH", "https://eth.llamarpc.com,https://ethereum-rpc.publicnode.com"),
+            "BSC": _rpc_config("BSC", "https://binance.llamarpc.com,https://bsc-rpc.publicnode.com"),
+            "POLYGON": _rpc_config("POLYGON", "https://polygon.llamarpc.com,https://polygon-bor-rpc.publicnode.com"),
+            "ARBITRUM": _rpc_config("ARBITRUM", "https://arbitrum.llamarpc.com,https://arbitrum-one-rpc.publicnode.com")
+        }
+        # Requisições duplicadas (hedge) após o p95 do endpoint principal, até RPC_HEDGE_BUDGET das chamadas
+        self.hedge = {
+            "window": int(os.getenv("RPC_SCORE_WINDOW", 100)),
+            "hedge_budget": float(os.getenv("RPC_HEDGE_BUDGET", 0.1)),
+            "hedge_min_delay": float(os.getenv("RPC_HEDGE_MIN_DELAY", 0.05)),
+            "hedge_max_delay": float(os.getenv("RPC_HEDGE_MAX_DELAY", 1.0)),
+            # Endpoint sai de rotação após RPC_EJECT_AFTER falhas seguidas ou taxa de erro >= RPC_EJECT_ERROR_RATE
+            "eject_after": int(os.getenv("RPC_EJECT_AFTER", 3)),
+            "eject_error_rate": float(os.getenv("RPC_EJECT_ERROR_RATE", 0.5)),
+            "eject_cooldown": float(os.getenv("RPC_EJECT_COOLDOWN", 30))
+        }
+        # Um roteador por rede (um pool keep-alive por endpoint), reaproveitado entre chamadas
+        self.pools = {}
+        self.health_interval = float(health_interval or os.getenv("RPC_HEALTH_INTERVAL", 30))
+        # Consultas idênticas em andamento (mesma rede e endereço) viram uma só
+        self.lookups = SingleFlight()
+        self._health_task = None
+        self._shared_cache = shared_cache
+
+    @property
+    def shared_cache(self):
+        # Resultados de eth_getCode compartilhados entre os processos do host (tipo 'getcode')
+        return self._shared_cache or get_shared_cache()
+
+    def _cache_key(self, address, network):
+        return f"{rpc_chain(network)}:{address.lower()}"
+
+    def get_pool(self, network):
+        net = rpc_chain(network)
+        config = self.rpcs.get(net)
+        if not config: return None
+        if net not in self.pools:
+            self.pools[net] = RPCRouter(net, config["urls"], config["pool_size"], config["keepalive"], **self.hedge)
+        return self.pools[net]
+
+    def stats(self):
+        return {net: pool.stats() for net, pool in self.pools.items()}
+
+    def start_health_checks(self):
+        """Verifica a saúde dos endpoints periodicamente (requer event loop ativo)."""
+        if self._health_task and not self._health_task.done():
+            return
+
+        async def loop():
+            while True:
+                pools = [self.get_pool(net) for net in self.rpcs]
+                await asyncio.gather(*(pool.check_health() for pool in pools))
+                await asyncio.sleep(self.health_interval)
+
+        self._health_task = asyncio.create_task(loop())
+
+    async def close(self):
+        """Para os health checks e fecha as conexões dos pools."""
+        if self._health_task:
+            self._health_task.cancel()
+            try:
+                await self._health_task
+            except asyncio.CancelledError:
+                pass
+            self._health_task = None
+        for pool in self.pools.values():
+            try:
+                await pool.aclose()
+            except Exception as e:
+                logging.error(f"RPC Close Error: {str(e)}")
+        self.pools = {}
+
+    def _code_result(self, address, code):
+        is_contract = code not in (None, "0x", "0x0", "0x00")
+        return {
+            "status": "SUCCESS",
+            "is_contract": is_contract,
+            "type": "Smart Contract" if is_contract else "Personal Wallet (EOA)",
+            "explorer_url": f"https://blockscan.com/address/{address}"
         }
 
-    def get_provider(self, network):
-        net = network.upper()
-        url = self.rpcs.get(net)
-        if not url: return None
-        return Web3(Web3.HTTPProvider(url))
+    async def _cache_results(self, results):
+        """
+        Guarda resultados SUCCESS ({chave: resultado}): contratos pelo TTL de 'getcode',
+        endereços sem código (EOA) pelo TTL curto de 'getcode_eoa'.
+        """
+        contracts = {k: r for k, r in results.items() if r["status"] == "SUCCESS" and r["is_contract"]}
+        eoas = {k: r for k, r in results.items() if r["status"] == "SUCCESS" and not r["is_contract"]}
+        cache = self.shared_cache
+        await cache.set_many("getcode", contracts)
+        await cache.set_many("getcode", eoas, ttl=cache.ttls["getcode_eoa"])
 
-    def verify_address(self, address, network):
+    async def verify_address(self, address, network):
         """
         Verifica na blockchain se o endereço é EOA ou Contrato.
+        Custa uma única chamada (eth_getCode) numa conexão já aberta,
+        compartilhada entre chamadores simultâneos do mesmo endereço.
         """
-        w3 = self.get_provider(network)
-        if not w3 or not w3.is_connected():
+        return await self.lookups.do((rpc_chain(network), address), lambda: self._verify_address(address, network))
+
+    async def _verify_address(self, address, network):
+        cached = await self.shared_cache.get("getcode", self._cache_key(address, network))
+        if cached is not None:
+            return cached
+
+        pool = self.get_pool(network)
+        if not pool or not pool.healthy:
             return {"status": "RPC_OFFLINE", "type": "UNKNOWN"}
 
         try:
-            checksum_address = w3.to_checksum_address(address)
-            code = w3.eth.get_code(checksum_address)
-            
-            is_contract = code != b'' and code != b'\x00'
-            
-            return {
-                "status": "SUCCESS",
-                "is_contract": is_contract,
-                "type": "Smart Contract" if is_contract else "Personal Wallet (EOA)",
-                "explorer_url": f"https://blockscan.com/address/{address}"
-            }
+            checksum_address = to_checksum_address(address)
+            code = await pool.call("eth_getCode", [checksum_address, "latest"])
+            result = self._code_result(address, code)
+            await self._cache_results({self._cache_key(address, network): result})
+            return result
+        except RPCError as e:
+            if not pool.healthy:
+                return {"status": "RPC_OFFLINE", "type": "UNKNOWN"}
+            return {"status": "ERROR", "message": str(e)}
         except Exception as e:
             return {"status": "ERROR", "message": str(e)}
+
+    async def _get_code_chunk(self, pool, addresses):
+        """eth_getCode em batch; se o provedor recusar o tamanho, divide o lote ao meio."""
+        try:
+            return await pool.call_batch([("eth_getCode", [addr, "latest"]) for addr in addresses])
+        except RPCBatchRejected:
+            if len(addresses) == 1:
+                raise
+            middle = len(addresses) // 2
+            # Memoriza o limite do provedor para os próximos lotes
+            pool.max_batch = min(pool.max_batch or middle, middle)
+            left, right = await asyncio.gather(
+                self._get_code_chunk(pool, addresses[:middle]),
+                self._get_code_chunk(pool, addresses[middle:])
+            )
+            return left + right
+
+    async def verify_addresses(self, addresses, network):
+        """
+        Verificação em massa: agrupa os eth_getCode em requests JSON-RPC batch
+        (até batch_size por request, no máximo pool_size requests simultâneos).
+        Endereços já no cache compartilhado não vão ao RPC.
+        Retorna um resultado por endereço, na ordem de entrada.
+        """
+        keys = {address: self._cache_key(address, network) for address in addresses}
+        cached = await self.shared_cache.get_many("getcode", list(keys.values()))
+        results = {address: cached[key] for address, key in keys.items() if key in cached}
+        missing = [address for address in keys if address not in results]
+        if not missing:
+            return [results[address] for address in addresses]
+
+        pool = self.get_pool(network)
+        if not pool or not pool.healthy:
+            return [results.get(address, {"status": "RPC_OFFLINE", "type": "UNKNOWN"}) for address in addresses]
+
+        unique = []
+        for address in missing:
+            try:
+                unique.append((address, to_checksum_address(address)))
+            except Exception as e:
+                results[address] = {"status": "ERROR", "message": str(e)}
+
+        config = self.rpcs[rpc_chain(network)]
+        batch_size = max(1, min(config["batch_size"], pool.max_batch or config["batch_size"]))
+        semaphore = asyncio.Semaphore(config["pool_size"])
+
+        async def run_chunk(chunk):
+            async with semaphore:
+                try:
+                    codes = await self._get_code_chunk(pool, [checksum for _, checksum in chunk])
+                except RPCError as e:
+                    codes = [e] * len(chunk)
+            for (address, _), code in zip(chunk, codes):
+                if isinstance(code, RPCError):
+                    results[address] = {"status": "ERROR", "message": str(code)}
+                else:
+                    results[address] = self._code_result(address, code)
+
+        chunks = [unique[i:i + batch_size] for i in range(0, len(unique), batch_size)]
+        await asyncio.gather(*(run_chunk(chunk) for chunk in chunks))
+        await self._cache_results({keys[address]: results[address] for address, _ in unique})
+        return [results[address] for address in addresses]
@@ -0,0 +1,251 @@
+import asyncio
+import logging
+import os
+from core.capability_matrix import CapabilityIndex
+from core.gatekeeper import DESTINATION_CEXS, Gatekeeper
+from core.humanizer import Humanizer
+from core.http_client import close_http_client, get_http_client
+from core.metrics import get_metrics
+from core.shared_cache import close_shared_cache, get_shared_cache
+from core.transport import transport_stats
+from core.connectors.ccxt_connector import CCXTConnector
+from core.connectors.web3_rpc_connector import OnChainVerifier, rpc_chain
+from core.pipeline import COST_FREE, COST_NETWORK, Stage
+
+
+class SentinelEngine:
+    """
+    Motor de verificação compartilhado por todo o processo.
+    Mantém conectores, registries e caches aquecidos entre requisições.
+    """
+    def __init__(self, registry_path='core/registry/networks.json', blacklist_path='core/registry/blacklist.json', batch_concurrency=None):
+        self.ccxt_conn = CCXTConnector()
+        # Matriz exchange x ativo x rede, reconstruída em background (CAPABILITY_EXCHANGES)
+        exchanges = os.getenv("CAPABILITY_EXCHANGES")
+        self.capabilities = CapabilityIndex(
+            self.ccxt_conn,
+            exchanges.split(",") if exchanges else DESTINATION_CEXS,
+            path=os.getenv("CAPABILITY_SNAPSHOT", ".cache/capabilities.bin")
+        )
+        self.gatekeeper = Gatekeeper(registry_path, blacklist_path, ccxt_conn=self.ccxt_conn, capabilities=self.capabilities)
+        self.humanizer = Humanizer()
+        self.rpc = OnChainVerifier()
+        # Validação On-Chain (RPC) roda na mesma pipeline do Gatekeeper, na faixa de rede
+        self.on_chain_stage = Stage("on_chain", COST_NETWORK, self._stage_on_chain)
+        # Máximo de itens avaliados simultaneamente em /check/batch
+        self.batch_concurrency = int(batch_concurrency or os.getenv("CHECK_BATCH_CONCURRENCY", 32))
+        self.started = False
+
+    async def startup(self):
+        get_metrics().register_collector(self._collect_metrics)
+        self.ccxt_conn.start_background_refresh()
+        self.capabilities.start()
+        self.rpc.start_health_checks()
+        self.started = True
+        logging.info("SentinelEngine iniciado.")
+
+    async def shutdown(self):
+        """Libera exchanges, providers RPC e clientes HTTP mantidos em memória."""
+        get_metrics().unregister_collector(self._collect_metrics)
+        await self.capabilities.stop()
+        await self.ccxt_conn.close()
+        await self.rpc.close()
+        await self.humanizer.aclose()
+        await close_http_client()
+        await close_shared_cache()
+        self.gatekeeper.blacklist.close()
+        self.started = False
+        logging.info("SentinelEngine finalizado.")
+
+    def stats(self):
+        """Métricas operacionais do motor (ex.: taxa de acerto do cache do Humanizer)."""
+        return {
+            "humanizer_cache": self.humanizer.cache.stats(),
+            "shared_cache": get_shared_cache().stats(),
+            "transport": transport_stats(),
+            "capabilities": self.capabilities.stats(),
+            "ccxt_snapshots": self.ccxt_conn.snapshot_stats(),
+            "rpc": self.rpc.stats(),
+            "breakers": self.ccxt_conn.breakers.stats(),
+            "coalesced": {
+                "ccxt": self.ccxt_conn.refreshing.coalesced,
+                "rpc": self.rpc.lookups.coalesced,
+                "humanizer": self.humanizer.inflight.coalesced
+            },
+            "intent_sources": dict(self.humanizer.intent_stats)
+        }
+
+    def _collect_metrics(self):
+        """Gauges lidos na coleta de /metrics: circuitos abertos e tarefas em andamento."""
+        breakers = {**get_http_client().breakers.breakers, **self.ccxt_conn.breakers.breakers}
+        for name, breaker in breakers.items():
+            yield "breaker_open", {"upstream": name}, int(breaker.is_open)
+        yield "inflight_tasks", {"kind": "ccxt_refresh"}, len(self.ccxt_conn.refreshing.inflight)
+        yield "inflight_tasks", {"kind": "rpc_lookup"}, len(self.rpc.lookups.inflight)
+        yield "inflight_tasks", {"kind": "humanizer"}, len(self.humanizer.inflight.inflight)
+        matrix = self.capabilities.matrix
+        yield "capability_cells", {}, len(matrix) if matrix is not None else 0
+
+    async def extract_intent(self, text):
+        return await self.humanizer.extract_intent(text)
+
+    async def _stage_on_chain(self, ctx):
+        chain = rpc_chain(ctx["network"])
+        if chain is None:
+            return None  # Rede sem RPC (ex.: TRC20): on_chain fica SKIPPED
+        lookup = ctx.get("on_chain_lookup") or self.rpc.verify_address
+        ctx["on_chain"] = await lookup(ctx["address"], chain)
+        return None
+
+    async def evaluate(self, asset, origin, destination, network, address, on_chain_lookup=None):
+        """Parte determinística da validação (Gatekeeper + RPC), sem o Humanizer."""
+        # Um DANGER das regras locais encerra a pipeline antes do RPC e das exchanges
+        ctx = {"on_chain_lookup": on_chain_lookup}
+        gk_res = await self.gatekeeper.check_compatibility(
+            origin, destination, asset, network, address,
+            extra_stages=[self.on_chain_stage], context=ctx
+        )
+        gk_res.update({
+            "asset": asset,
+            "origin_exchange": origin,
+            "destination": destination,
+            "selected_network": network,
+            "on_chain": ctx.get("on_chain", {"status": "SKIPPED", "type": "UNKNOWN"})
+        })
+        return gk_res
+
+    def build_response(self, gk_res, explanation=None):
+        """Resposta final da API a partir do veredito e da explicação do Humanizer."""
+        if gk_res['status'] != 'SAFE':
+            return {
+                "status": gk_res['status'],
+                "risk_level": gk_res['risk'],
+                "title": "Alerta de Segurança",
+                "message": explanation,
+                "on_chain": gk_res['on_chain'],
+                "snapshot_age": gk_res.get('snapshot_age', {}),
+                "degraded_sources": gk_res.get('degraded_sources', {}),
+                "timings": gk_res['timings']
+            }
+
+        message = "A rota selecionada foi validada e está livre de riscos conhecidos."
+        degraded = gk_res.get('degraded_sources', {})
+        # Exchange fora do ar (circuito aberto): o veredito usou dados em cache ou não pôde consultá-la
+        stale = sorted(name for name, state in degraded.items() if state == "STALE")
+        unavailable = sorted(name for name, state in degraded.items() if state != "STALE")
+        if stale:
+            message += f" Atenção: {', '.join(stale)} indisponível no momento; usamos a última leitura conhecida."
+        if unavailable:
+            message += f" Atenção: não foi possível consultar {', '.join(unavailable)}."
+        return {
+            "status": "SAFE",
+            "risk_level": "LOW",
+            "title": "Caminho Seguro",
+            "message": message,
+            "on_chain": gk_res['on_chain'],
+            "snapshot_age": gk_res.get('snapshot_age', {}),
+            "degraded_sources": degraded,
+            "timings": gk_res['timings']
+        }
+
+    async def check_transfer(self, asset, origin, destination, network, address, on_chain_lookup=None, explain=None):
+        """
+        Executa a validação completa e devolve a resposta final da API.
+        'on_chain_lookup' e 'explain' substituem a consulta RPC e o Humanizer (usado pelo batch).
+        """
+        metrics = get_metrics()
+        with metrics.span("check.evaluate"):
+            gk_res = await self.evaluate(asset, origin, destination, network, address, on_chain_lookup)
+        metrics.inc("checks_total", status=gk_res['status'])
+        explanation = None
+        if gk_res['status'] != 'SAFE':
+            with metrics.span("check.explain"):
+                explanation = await (explain or self.humanizer.humanize_risk)(gk_res)
+        return self.build_response(gk_res, explanation)
+
+    async def check_transfer_stream(self, asset, origin, destination, network, address):
+        """
+        Versão em streaming de check_transfer. Produz eventos (nome, dados):
+        'verdict' com o resultado determinístico (sem aguardar a LLM),
+        'token' com cada trecho da explicação e 'done' com a resposta completa.
+        """
+        metrics = get_metrics()
+        with metrics.span("check.evaluate"):
+            gk_res = await self.evaluate(asset, origin, destination, network, address)
+        metrics.inc("checks_total", status=gk_res['status'])
+        yield "verdict", self.build_response(gk_res)
+
+        explanation = None
+        if gk_res['status'] != 'SAFE':
+            parts = []
+            async for chunk in self.humanizer.stream_risk(gk_res):
+                parts.append(chunk)
+                yield "token", {"text": chunk}
+            explanation = "".join(parts)
+        yield "done", self.build_response(gk_res, explanation)
+
+    async def check_batch(self, items):
+        """
+        Avalia vários CheckRequests e produz {'index', ...resposta} conforme cada item termina.
+        Dentro do lote, cada endereço é consultado uma vez (eth_getCode em batch por rede),
+        cada exchange é baixada uma vez e cada explicação do Humanizer é gerada uma vez.
+        Itens encerrados pelas regras locais (blacklist, mismatch, formato) não vão ao RPC.
+        """
+        # Regras locais (COST_FREE) de todos os itens antes de qualquer chamada externa
+        survivors = []
+        for item in items:
+            local = await self.gatekeeper.check_compatibility(
+                item.origin, item.destination, item.asset, item.network, item.address, max_cost=COST_FREE
+            )
+            if local["short_circuit"] is None:
+                survivors.append(item)
+
+        # RPC: uma verificação em massa por chain, só com os itens que passaram pelas regras locais
+        positions = {}
+        for item in survivors:
+            chain = rpc_chain(item.network)
+            if chain is None:
+                continue
+            addresses = positions.setdefault(chain, {})
+            addresses.setdefault(item.address, len(addresses))
+        rpc_tasks = {
+            net: asyncio.create_task(self.rpc.verify_addresses(list(addresses), net))
+            for net, addresses in positions.items()
+        }
+
+        async def on_chain_lookup(address, chain):
+            if address not in positions.get(chain, {}):
+                return await self.rpc.verify_address(address, chain)
+            results = await asyncio.shield(rpc_tasks[chain])
+            return results[positions[chain][address]]
+
+        # Humanizer: uma geração por (status, risco, mensagem)
+        explanations = {}
+
+        async def explain(gk_res):
+            key = (gk_res['status'], gk_res['risk'], gk_res.get('message'))
+            if key not in explanations:
+                explanations[key] = asyncio.ensure_future(self.humanizer.humanize_risk(gk_res))
+            return await asyncio.shield(explanations[key])
+
+        semaphore = asyncio.Semaphore(self.batch_concurrency)
+
+        async def run(index, item):
+            async with semaphore:
+                try:
+                    result = await self.check_transfer(
+                        item.asset, item.origin, item.destination, item.network, item.address,
+                        on_chain_lookup=on_chain_lookup, explain=explain
+                    )
+                except Exception as e:
+                    logging.error(f"Erro no item {index} do batch: {e}")
+                    result = {"status": "ERROR", "detail": str(e)}
+            return {"index": index, **result}
+
+        tasks = [asyncio.create_task(run(index, item)) for index, item in enumerate(items)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks + list(rpc_tasks.values()) + list(explanations.values()):
+                task.cancel()
@@ -1,12 +1,36 @@
 import json
-import re
 import os
 from core.connectors.binance_api import BinanceConnector
 from core.connectors.cmc_api import CMCConnector
 from core.connectors.ccxt_connector import CCXTConnector
+from core.address_validator import ADDRESS_PATTERNS, NETWORK_FAMILIES, AddressValidator
+from core.blacklist_store import BlacklistStore
+from core.capability_matrix import DEPOSIT, WITHDRAW
+from core.pipeline import COST_FREE, COST_NETWORK, Stage, ValidationPipeline
+
+# O bot envia o endereço nulo quando o usuário não informa o destino
+PLACEHOLDER_ADDRESSES = {"", "0x0000000000000000000000000000000000000000"}
+
+# Corretoras validadas também como destino (depósito)
+DESTINATION_CEXS = ["binance", "okx", "bybit", "gate"]
+
+# Vereditos de risco emitidos pelo Gatekeeper (mensagens com campos do envio)
+VERDICT_TEMPLATES = {
+    "blacklisted": ("BLACK-LISTED", "CRITICAL_DEFCON_1", "ALERTA GOLPE: {description}"),
+    "mismatch_tron": ("MISMATCH", "CRITICAL", "A MetaMask não suporta a rede Tron (TRC20). O envio resultará em perda total de fundos."),
+    "mismatch_solana": ("MISMATCH", "CRITICAL", "A MetaMask não suporta a rede Solana nativa. Se você enviar via Solana, seus fundos ficarão inacessíveis."),
+    "invalid_address": ("INVALID_ADDRESS", "CRITICAL", "O formato do endereço é inválido para a rede {network}."),
+    "unsupported_on_origin": ("UNSUPPORTED_ON_ORIGIN", "HIGH", "A exchange {origin} não suporta saques de {asset} via rede {network}."),
+    "withdraw_disabled": ("WITHDRAW_DISABLED", "HIGH", "Saques de {asset} via {network} estão suspensos ou em manutenção na {origin}."),
+    "deposit_disabled": ("DEPOSIT_DISABLED_AT_DESTINATION", "CRITICAL", "O destino ({destination}) NÃO aceita depósitos de {asset} via {network}. Se você enviar, os fundos não serão creditados."),
+}
+
+def verdict(template, **fields):
+    status, risk, message = VERDICT_TEMPLATES[template]
+    return {"status": status, "risk": risk, "message": message.format(**fields)}
 
 class Gatekeeper:
-    def __init__(self, registry_path='core/registry/networks.json', blacklist_path='core/registry/blacklist.json'):
+    def __init__(self, registry_path='core/registry/networks.json', blacklist_path='core/registry/blacklist.json', ccxt_conn=None, cmc=None, capabilities=None):
         # Carregar Registry Local (Para Wallets e regras fixas)
         if os.path.exists(registry_path):
             with open(registry_path, 'r') as f:
@@ -14,109 +38,174 @@ class Gatekeeper:
         else:
             self.registry = {"wallets": {}, "exchanges": {}}
         
-        # Carregar Blacklist
-        if os.path.exists(blacklist_path):
-            with open(blacklist_path, 'r') as f:
-                self.blacklist = json.load(f)
+        # Carregar Blacklist (índice compilado e mapeado em memória, ver BlacklistStore)
+        # BLACKLIST_INDEX aponta para um índice gerado por scripts/build_blacklist.py
+        index_path = os.getenv("BLACKLIST_INDEX")
+        if index_path:
+            self.blacklist = BlacklistStore.open(index_path)
         else:
-            self.blacklist = []
+            self.blacklist = BlacklistStore.from_registry(blacklist_path)
 
-        self.patterns = {
-            "EVM": r"^0x[a-fA-F0-9]{40}$",
-            "TRON": r"^T[a-zA-Z0-9]{33}$",
-            "SOLANA": r"^[1-9A-HJ-NP-Za-km-z]{32,44}$"
-        }
+        self.address_validator = AddressValidator(NETWORK_FAMILIES, ADDRESS_PATTERNS)
         
-        # Conectores
-        self.cmc = CMCConnector()
-        self.ccxt_conn = CCXTConnector()
+        # Conectores (podem ser injetados para reaproveitar instâncias aquecidas)
+        self.cmc = cmc or CMCConnector()
+        self.ccxt_conn = ccxt_conn or CCXTConnector()
+        # Matriz de capacidades pré-compilada (CapabilityIndex); sem ela, consulta a CCXT
+        self.capabilities = capabilities
+
+        # Pipeline em ordem de custo: regras locais primeiro, rede por último
+        self.stages = [
+            Stage("blacklist", COST_FREE, self._stage_blacklist, short_circuits=["BLACK-LISTED"]),
+            Stage("wallet_mismatch", COST_FREE, self._stage_wallet_mismatch, short_circuits=["MISMATCH"]),
+            Stage("address_format", COST_FREE, self._stage_address_format, short_circuits=["INVALID_ADDRESS"]),
+            Stage("origin_cex", COST_NETWORK, self._stage_origin_cex),
+            Stage("destination_cex", COST_NETWORK, self._stage_destination_cex),
+        ]
 
     def check_blacklist(self, address):
         """Retorna detalhes se o endereço estiver na blacklist."""
-        for entry in self.blacklist:
-            if entry['address'].lower() == address.lower():
-                return entry
-        return None
+        return self.blacklist.lookup(address)
 
     def validate_address_format(self, address, network):
-        """Valida o formato do endereço baseado na rede."""
-        net_upper = network.upper()
-        type_map = {
-            "ERC20": "EVM", "BEP20": "EVM", "POLYGON": "EVM", "ARBITRUM": "EVM", "OPTIMISM": "EVM",
-            "TRC20": "TRON", "TRX": "TRON",
-            "SOL": "SOLANA", "SOLANA": "SOLANA"
-        }
-        addr_type = type_map.get(net_upper, "EVM")
-        pattern = self.patterns.get(addr_type)
-        if not pattern: return True, "Formato não verificado."
-        return (True, "Válido") if re.match(pattern, address) else (False, f"O formato do endereço é inválido para a rede {network}.")
-
-    def check_compatibility(self, origin_cex, destination, asset, network, address):
+        """Valida formato e checksum do endereço baseado na rede (ver AddressValidator)."""
+        error = self.address_validator.validate(address, network)
+        return (True, "Válido") if error is None else (False, verdict("invalid_address", network=network)["message"])
+
+    async def check_compatibility(self, origin_cex, destination, asset, network, address, extra_stages=(), context=None, max_cost=None):
         """
-        Versão V4: Onisciência de Exchanges via CCXT.
+        Versão V5: Pipeline por custo (regras locais antes de CCXT/RPC).
+        O veredito carrega 'snapshot_age' (idade em segundos dos metadados de cada exchange),
+        'degraded_sources' (exchanges com circuito aberto: STALE = último snapshot, UNAVAILABLE = sem dados),
+        'timings' (ms por estágio) e 'skipped_stages'.
+        'extra_stages' permite anexar estágios do chamador (ex.: RPC) à mesma pipeline;
+        'context' recebe os dados produzidos por eles.
+        'max_cost' limita as faixas executadas (ex.: COST_FREE roda só as regras locais).
         """
-        # --- PRIORIDADE 1: DEFCON 1 (Blacklist) ---
-        incident = self.check_blacklist(address)
+        ctx = context if context is not None else {}
+        ctx.update({
+            "origin": origin_cex,
+            "destination": destination,
+            "asset": asset,
+            "network": network,
+            "address": address,
+            "snapshot_age": {},
+            "degraded_sources": {}
+        })
+        pipeline = ValidationPipeline(self.stages + list(extra_stages))
+        result = await pipeline.run(ctx, max_cost)
+        result["snapshot_age"] = ctx["snapshot_age"]
+        result["degraded_sources"] = ctx["degraded_sources"]
+        return result
+
+    # --- PRIORIDADE 1: DEFCON 1 (Blacklist) ---
+    async def _stage_blacklist(self, ctx):
+        incident = self.check_blacklist(ctx["address"])
         if incident:
-            return {
-                "status": "BLACK-LISTED",
-                "risk": "CRITICAL_DEFCON_1",
-                "message": f"ALERTA GOLPE: {incident['description']}",
-                "threat_type": incident['threat_type']
-            }
-
-        # --- PRIORIDADE 2: Validação de Origem (CEX) via CCXT ---
+            result = verdict("blacklisted", description=incident['description'])
+            result["threat_type"] = incident['threat_type']
+            return result
+        return None
+
+    # --- PRIORIDADE 2: Mismatch conhecido de Wallet (MetaMask vs Tron/Solana) ---
+    async def _stage_wallet_mismatch(self, ctx):
+        if ctx["destination"] == "MetaMask":
+            network = ctx["network"].upper()
+            if network in ["TRC20", "TRX"]:
+                return verdict("mismatch_tron")
+            if network in ["SOL", "SOLANA"]:
+                return verdict("mismatch_solana")
+        return None
+
+    # --- PRIORIDADE 3: Formato do endereço vs família da rede ---
+    async def _stage_address_format(self, ctx):
+        address, network = ctx["address"], ctx["network"]
+        # Redes fora do mapa não têm formato conhecido; endereço ausente não é avaliado
+        if network.upper() not in NETWORK_FAMILIES or address in PLACEHOLDER_ADDRESSES:
+            return None
+        is_valid, _ = self.validate_address_format(address, network)
+        if not is_valid:
+            return verdict("invalid_address", network=network)
+        return None
+
+    def _capability(self, ctx, exchange):
+        """
+        Consulta a matriz de capacidades: (True, flags) se ela cobre a exchange
+        com dados dentro de max_stale e tão novos quanto o snapshot ao vivo da CCXT,
+        senão (False, None) para seguir pela CCXT (ex.: saque suspenso no último refresh).
+        """
+        if self.capabilities is None:
+            return False, None
+        # Com o circuito aberto, a matriz vale com qualquer idade (marcada como STALE)
+        degraded = self.ccxt_conn.is_degraded(exchange)
+        live = self.ccxt_conn.snapshots.get(exchange.lower())
+        matrix = self.capabilities.lookup(
+            exchange,
+            max_age=None if degraded else self.ccxt_conn.snapshot_max_stale,
+            fetched_after=live["fetched_at"] if live else None
+        )
+        if matrix is None:
+            return False, None
+        flags = matrix.capability(exchange, ctx["asset"], ctx["network"])
+        if flags is not None:
+            ctx["snapshot_age"][exchange] = round(matrix.age(exchange), 3)
+        if degraded:
+            ctx["degraded_sources"][exchange] = "STALE"
+        return True, flags
+
+    def _mark_degraded(self, ctx, exchange, networks):
+        if networks and networks[0].get('stale'):
+            ctx["degraded_sources"][exchange] = "STALE"
+        elif not networks and self.ccxt_conn.is_degraded(exchange):
+            ctx["degraded_sources"][exchange] = "UNAVAILABLE"
+
+    # --- PRIORIDADE 4: Validação de Origem (CEX) via CCXT ---
+    async def _stage_origin_cex(self, ctx):
         # Aceita 'Binance', 'OKX', 'Bybit', 'KuCoin', etc.
-        networks, error = self.ccxt_conn.get_supported_networks(origin_cex, asset)
-        
+        origin_cex, asset, network = ctx["origin"], ctx["asset"], ctx["network"]
+        covered, flags = self._capability(ctx, origin_cex)
+        if covered:
+            if flags == 0:
+                return verdict("unsupported_on_origin", origin=origin_cex, asset=asset, network=network)
+            if flags and not flags & WITHDRAW:
+                return verdict("withdraw_disabled", origin=origin_cex, asset=asset, network=network)
+            return None
+
+        networks, error = await self.ccxt_conn.get_supported_networks(origin_cex, asset)
+        self._mark_degraded(ctx, origin_cex, networks)
+
         if not error and networks:
+            ctx["snapshot_age"][origin_cex] = networks[0].get('snapshot_age')
             # Tentar encontrar a rede (considerando a normalização do CCXTConnector)
             # O front manda 'BEP20', o conector normaliza 'BSC' para 'BEP20'.
             match = next((n for n in networks if n['network'].upper() == network.upper()), None)
             
             if not match:
-                return {
-                    "status": "UNSUPPORTED_ON_ORIGIN", 
-                    "risk": "HIGH", 
-                    "message": f"A exchange {origin_cex} não suporta saques de {asset} via rede {network}."
-                }
+                return verdict("unsupported_on_origin", origin=origin_cex, asset=asset, network=network)
             
             if not match['withdraw_enable']:
-                return {
-                    "status": "WITHDRAW_DISABLED", 
-                    "risk": "HIGH", 
-                    "message": f"Saques de {asset} via {network} estão suspensos ou em manutenção na {origin_cex}."
-                }
-        elif error:
-            # Se a exchange não for suportada pela CCXT, o Humanizer usará SafeDiscovery (Intel Search)
-            pass
-
-        # --- PRIORIDADE 3: Validação de Destino (Wallet/CEX) ---
-        # Lógica de Mismatch conhecida (MetaMask vs Tron/Solana)
-        if destination == "MetaMask":
-            if network.upper() in ["TRC20", "TRX"]:
-                return {
-                    "status": "MISMATCH", 
-                    "risk": "CRITICAL", 
-                    "message": "A MetaMask não suporta a rede Tron (TRC20). O envio resultará em perda total de fundos."
-                }
-            if network.upper() in ["SOL", "SOLANA"]:
-                return {
-                    "status": "MISMATCH", 
-                    "risk": "CRITICAL", 
-                    "message": "A MetaMask não suporta a rede Solana nativa. Se você enviar via Solana, seus fundos ficarão inacessíveis."
-                }
+                return verdict("withdraw_disabled", origin=origin_cex, asset=asset, network=network)
+        # Se a exchange não for suportada pela CCXT, o Humanizer usará SafeDiscovery (Intel Search)
+        return None
 
+    # --- PRIORIDADE 5: Validação de Destino (CEX) ---
+    async def _stage_destination_cex(self, ctx):
         # Caso o destino também seja uma CEX (Transferência entre Corretoras)
-        if destination.lower() in ["binance", "okx", "bybit", "gateio"]:
-            dest_networks, dest_error = self.ccxt_conn.get_supported_networks(destination, asset)
-            if not dest_error and dest_networks:
-                dest_match = next((n for n in dest_networks if n['network'].upper() == network.upper()), None)
-                if not dest_match or not dest_match['deposit_enable']:
-                    return {
-                        "status": "DEPOSIT_DISABLED_AT_DESTINATION",
-                        "risk": "CRITICAL",
-                        "message": f"O destino ({destination}) NÃO aceita depósitos de {asset} via {network}. Se você enviar, os fundos não serão creditados."
-                    }
-
-        return {"status": "SAFE", "risk": "LOW", "message": "Caminho validado e compatível."}
+        destination, asset, network = ctx["destination"], ctx["asset"], ctx["network"]
+        if destination.lower() not in DESTINATION_CEXS:
+            return None
+
+        covered, flags = self._capability(ctx, destination)
+        if covered:
+            if flags is not None and not flags & DEPOSIT:
+                return verdict("deposit_disabled", destination=destination, asset=asset, network=network)
+            return None
+
+        dest_networks, dest_error = await self.ccxt_conn.get_supported_networks(destination, asset)
+        self._mark_degraded(ctx, destination, dest_networks)
+        if not dest_error and dest_networks:
+            ctx["snapshot_age"][destination] = dest_networks[0].get('snapshot_age')
+            dest_match = next((n for n in dest_networks if n['network'].upper() == network.upper()), None)
+            if not dest_match or not dest_match['deposit_enable']:
+                return verdict("deposit_disabled", destination=destination, asset=asset, network=network)
+        return None
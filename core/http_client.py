@@ -0,0 +1,153 @@
+import asyncio
+import logging
+import os
+import random
+from contextlib import asynccontextmanager
+from urllib.parse import urlsplit
+import httpx
+from core.circuit_breaker import BreakerRegistry
+from core.metrics import get_metrics
+from core.transport import create_transport
+
+# Status transitórios que valem nova tentativa
+RETRY_STATUSES = {429, 502, 503, 504}
+
+
+def _http2_available():
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class HTTPClient:
+    """
+    Cliente HTTP assíncrono compartilhado pelos conectores REST.
+    Pool de conexões keep-alive (HTTP/2 quando o pacote 'h2' estiver instalado),
+    limite de conexões por host, timeouts padrão, retry com backoff exponencial e jitter
+    e um circuit breaker por host (falha imediata com CircuitOpenError enquanto aberto).
+    """
+    def __init__(self, timeout=None, connect_timeout=None, max_connections=None, max_per_host=None,
+                 keepalive=None, retries=None, backoff_base=None, transport=None):
+        self.retries = int(retries if retries is not None else os.getenv("HTTP_RETRIES", 2))
+        self.backoff_base = float(backoff_base or os.getenv("HTTP_BACKOFF_BASE", 0.2))
+        self.max_per_host = int(max_per_host or os.getenv("HTTP_MAX_PER_HOST", 20))
+        max_connections = int(max_connections or os.getenv("HTTP_MAX_CONNECTIONS", 100))
+
+        limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+            keepalive_expiry=float(keepalive or os.getenv("HTTP_KEEPALIVE", 30))
+        )
+        # Gravação/replay de respostas (TRANSPORT_MODE); em passthrough fica o transporte padrão
+        if transport is None:
+            transport = create_transport(http2=_http2_available(), limits=limits)
+
+        self.client = httpx.AsyncClient(
+            http2=_http2_available(),
+            transport=transport,
+            timeout=httpx.Timeout(
+                float(timeout or os.getenv("HTTP_TIMEOUT", 15)),
+                connect=float(connect_timeout or os.getenv("HTTP_CONNECT_TIMEOUT", 5))
+            ),
+            limits=limits
+        )
+        self._host_slots = {}
+        self.breakers = BreakerRegistry()
+
+    def _slot(self, url):
+        host = urlsplit(str(url)).netloc
+        if host not in self._host_slots:
+            self._host_slots[host] = asyncio.Semaphore(self.max_per_host)
+        return self._host_slots[host]
+
+    def _backoff(self, attempt, response=None):
+        # Respeita Retry-After (em segundos) quando o servidor informar
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), 30.0)
+        # Full jitter: espera aleatória entre 0 e base * 2^tentativa
+        return random.uniform(0, self.backoff_base * (2 ** attempt))
+
+    async def request(self, method, url, retries=None, **kwargs):
+        """Requisição com retry para erros de transporte e status transitórios (429/502/503/504)."""
+        retries = self.retries if retries is None else retries
+        host = urlsplit(str(url)).netloc
+        breaker = self.breakers.get(host)
+        breaker.check()
+        attempt = 0
+        while True:
+            response = None
+            try:
+                async with self._slot(url):
+                    with get_metrics().upstream(host, httpx.TimeoutException) as call:
+                        response = await self.client.request(method, url, **kwargs)
+                        if response.status_code >= 500 or response.status_code == 429:
+                            call.mark_error()
+                if response.status_code not in RETRY_STATUSES or attempt >= retries:
+                    if response.status_code >= 500:
+                        breaker.record_failure(f"HTTP {response.status_code}")
+                    else:
+                        breaker.record_success()
+                    return response
+            except httpx.TransportError as e:
+                if attempt >= retries:
+                    breaker.record_failure(e.__class__.__name__)
+                    raise
+                logging.warning(f"HTTP {method} {url} falhou ({e.__class__.__name__}); nova tentativa.")
+            await asyncio.sleep(self._backoff(attempt, response))
+            attempt += 1
+
+    async def get(self, url, **kwargs):
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url, **kwargs):
+        return await self.request("POST", url, **kwargs)
+
+    @asynccontextmanager
+    async def stream(self, method, url, **kwargs):
+        """Resposta em streaming (sem retry: o corpo é consumido conforme chega)."""
+        host = urlsplit(str(url)).netloc
+        breaker = self.breakers.get(host)
+        breaker.check()
+        async with self._slot(url):
+            try:
+                with get_metrics().upstream(host, httpx.TimeoutException) as call:
+                    async with self.client.stream(method, url, **kwargs) as response:
+                        if response.status_code >= 500:
+                            call.mark_error()
+                            breaker.record_failure(f"HTTP {response.status_code}")
+                        else:
+                            breaker.record_success()
+                        yield response
+            except httpx.TransportError as e:
+                breaker.record_failure(e.__class__.__name__)
+                raise
+
+    async def aclose(self):
+        await self.client.aclose()
+
+
+_shared_client = None
+
+
+def get_http_client():
+    """Cliente compartilhado do processo (criado no primeiro uso)."""
+    global _shared_client
+    if _shared_client is None:
+        _shared_client = HTTPClient()
+    return _shared_client
+
+
+def set_http_client(client):
+    """Substitui o cliente compartilhado (ex.: transporte local em testes e benchmarks)."""
+    global _shared_client
+    _shared_client = client
+
+
+async def close_http_client():
+    global _shared_client
+    if _shared_client is not None:
+        await _shared_client.aclose()
+        _shared_client = None
@@ -1,20 +1,90 @@
 import os
-import requests
+import asyncio
+import hashlib
 import json
 import re
+from core.cache import PersistentLRUCache
+from core.http_client import get_http_client
+from core.intent_parser import LocalIntentParser
+from core.metrics import get_metrics
+from core.scheduler import SingleFlight
+from core.shared_cache import get_shared_cache
 
 class Humanizer:
-    def __init__(self, api_key=None):
+    def __init__(self, api_key=None, cache=None, intent_parser=None, http=None, shared_cache=None):
         # Preferencia por OpenRouter devido a estabilidade de quota
         self.api_key = api_key or os.getenv("OPENROUTER_API_KEY")
         self.url = "https://openrouter.ai/api/v1/chat/completions"
+        self.model = os.getenv("HUMANIZER_MODEL", "google/gemini-2.0-flash-001")
+        self._http = http
+
+        # Explicações já geradas, por (modelo, status, risco, mensagem normalizada)
+        self.cache = cache if cache is not None else PersistentLRUCache(
+            path=os.getenv("HUMANIZER_CACHE_PATH", ".cache/humanizer.json"),
+            max_entries=int(os.getenv("HUMANIZER_CACHE_SIZE", 5000)),
+            max_age=float(os.getenv("HUMANIZER_CACHE_TTL", 7 * 86400))
+        )
+
+        # Extrator local por regras, consultado antes da LLM
+        self._intent_parser = intent_parser
+        self.intent_stats = {"local": 0, "llm": 0, "local_partial": 0, "failed": 0}
+        # Explicações idênticas em geração são pedidas à LLM uma única vez
+        self.inflight = SingleFlight()
+        # Segundo nível, compartilhado entre os processos do host (tipo 'humanizer')
+        self._shared_cache = shared_cache
+
+    @property
+    def shared_cache(self):
+        return self._shared_cache or get_shared_cache()
+
+    @property
+    def intent_parser(self):
+        if self._intent_parser is None:
+            self._intent_parser = LocalIntentParser()
+        return self._intent_parser
+
+    @property
+    def http(self):
+        # Cliente HTTP compartilhado do processo (keep-alive, retry com backoff)
+        return self._http or get_http_client()
+
+    async def aclose(self):
+        await self.cache.flush()
 
     def _sanitize(self, text):
         if not text: return ""
         # Remove caracteres que podem ser usados para escapar delimitadores de prompt
         return re.sub(r'["`]', '', str(text)).strip()
 
-    def extract_intent(self, text):
+    async def extract_intent(self, text):
+        """
+        Extrai {asset, origin, destination, network, address} e indica em 'source' quem resolveu:
+        'local' (regras, sem LLM), 'llm' ou 'local_partial' (LLM indisponível, campos faltando).
+        """
+        if self._intent_parser is None:
+            # A lista de exchanges vem da ccxt (import lento): montada fora do event loop
+            self._intent_parser = await asyncio.to_thread(LocalIntentParser)
+        local, confident = self.intent_parser.parse(text)
+        if confident:
+            self.intent_stats["local"] += 1
+            return {**local, "source": "local"}
+
+        with get_metrics().span("llm.extract_intent"):
+            data = await self._extract_intent_llm(text)
+        if isinstance(data, dict):
+            self.intent_stats["llm"] += 1
+            # Campos que a LLM deixou vazios são completados pelo extrator local
+            merged = {k: v for k, v in local.items() if v}
+            merged.update({k: v for k, v in data.items() if v})
+            return {**merged, "source": "llm"}
+
+        if any(local.values()):
+            self.intent_stats["local_partial"] += 1
+            return {**local, "source": "local_partial"}
+        self.intent_stats["failed"] += 1
+        return None
+
+    async def _extract_intent_llm(self, text):
         if not self.api_key: return None
         sanitized_text = self._sanitize(text)
         
@@ -22,7 +92,7 @@ class Humanizer:
         user_prompt = f"Analise a seguinte frase e extraia as variáveis:\n<user_input>{sanitized_text}</user_input>"
         
         payload = {
-            "model": "google/gemini-2.0-flash-001",
+            "model": self.model,
             "messages": [
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": user_prompt}
@@ -34,7 +104,7 @@ class Humanizer:
             'Authorization': f'Bearer {self.api_key}'
         }
         try:
-            response = requests.post(self.url, headers=headers, json=payload, timeout=15)
+            response = await self.http.post(self.url, headers=headers, json=payload)
             content = response.json()['choices'][0]['message']['content']
             
             data = json.loads(content) if isinstance(content, str) else content
@@ -47,9 +117,28 @@ class Humanizer:
             print(f"Erro no extract_intent: {e}")
             return None
 
-    def humanize_risk(self, gatekeeper_data):
-        if not self.api_key: return "❌ API Key ausente."
-        
+    def cache_key(self, gatekeeper_data):
+        """Chave do cache: modelo + status + risco + mensagem normalizada (caixa e espaços)."""
+        safe_msg = self._sanitize(gatekeeper_data.get('message', ''))
+        normalized = " ".join(safe_msg.casefold().split())
+        raw = json.dumps([self.model, gatekeeper_data.get('status'), gatekeeper_data.get('risk', 'LOW'), normalized])
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    async def prewarm(self, verdicts, concurrency=4):
+        """Gera (se ainda não estiverem em cache) as explicações dos vereditos informados."""
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def warm(verdict):
+            if self.cache_key(verdict) in self.cache:
+                return
+            async with semaphore:
+                await self.humanize_risk(verdict)
+
+        await asyncio.gather(*(warm(v) for v in verdicts))
+        await self.cache.flush()
+
+    def _risk_request(self, gatekeeper_data):
+        """Monta (headers, payload) do pedido de explicação de risco."""
         # Sanitização de campos sensíveis vindo do gatekeeper (que podem conter input do user)
         safe_msg = self._sanitize(gatekeeper_data.get('message', ''))
         risk = gatekeeper_data.get('risk', 'LOW')
@@ -60,7 +149,7 @@ class Humanizer:
         system_prompt = "Você é a MarIA, uma estrategista da Oratech didática e empática. Explique o risco de segurança Web3 usando metáforas simples."
         
         payload = {
-            "model": "google/gemini-2.0-flash-001",
+            "model": self.model,
             "messages": [
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": content}
@@ -70,9 +159,80 @@ class Humanizer:
             'Content-Type': 'application/json',
             'Authorization': f'Bearer {self.api_key}'
         }
+        return headers, payload
+
+    async def humanize_risk(self, gatekeeper_data):
+        if not self.api_key: return "❌ API Key ausente."
+
+        key = self.cache_key(gatekeeper_data)
+        cached = await self._cached_explanation(key)
+        if cached is not None:
+            return cached
+        with get_metrics().span("llm.humanize_risk"):
+            return await self.inflight.do(key, lambda: self._generate_risk(key, gatekeeper_data))
+
+    async def _cached_explanation(self, key):
+        """Cache local primeiro; no miss, o cache compartilhado (e o local passa a ter a entrada)."""
+        cached = self.cache.get(key)
+        get_metrics().cache("humanizer", hits=int(cached is not None), misses=int(cached is None))
+        if cached is None:
+            cached = await self.shared_cache.get("humanizer", key)
+            if cached is not None:
+                self.cache.set(key, cached)
+        return cached
+
+    async def _store_explanation(self, key, explanation):
+        self.cache.set(key, explanation)
+        await self.shared_cache.set("humanizer", key, explanation)
+
+    async def _generate_risk(self, key, gatekeeper_data):
+        headers, payload = self._risk_request(gatekeeper_data)
         try:
-            response = requests.post(self.url, headers=headers, json=payload, timeout=15)
-            return response.json()['choices'][0]['message']['content']
+            response = await self.http.post(self.url, headers=headers, json=payload)
+            explanation = response.json()['choices'][0]['message']['content']
+            await self._store_explanation(key, explanation)
+            return explanation
         except Exception as e:
             print(f"Erro no humanize_risk: {e}")
             return "❌ Falha crítica na interpretação de risco."
+
+    async def stream_risk(self, gatekeeper_data):
+        """
+        Igual a humanize_risk, mas produz a explicação em trechos conforme a LLM gera (SSE).
+        Explicações em cache saem de uma vez.
+        """
+        if not self.api_key:
+            yield "❌ API Key ausente."
+            return
+
+        key = self.cache_key(gatekeeper_data)
+        cached = await self._cached_explanation(key)
+        if cached is not None:
+            yield cached
+            return
+
+        headers, payload = self._risk_request(gatekeeper_data)
+        payload["stream"] = True
+        parts = []
+        try:
+            async with self.http.stream("POST", self.url, headers=headers, json=payload) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    # Linhas SSE: "data: {...}"; comentários (": ...") são keep-alive
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[5:].strip()
+                    if data == "[DONE]":
+                        break
+                    delta = json.loads(data)['choices'][0].get('delta', {}).get('content')
+                    if delta:
+                        parts.append(delta)
+                        yield delta
+        except Exception as e:
+            print(f"Erro no stream_risk: {e}")
+            if not parts:
+                yield "❌ Falha crítica na interpretação de risco."
+            return
+
+        if parts:
+            await self._store_explanation(key, "".join(parts))
@@ -0,0 +1,177 @@
+import json
+import os
+import re
+from core.gatekeeper import ADDRESS_PATTERNS
+
+# Ativos reconhecidos localmente (somados aos do registry)
+KNOWN_ASSETS = {
+    "USDT", "USDC", "DAI", "BUSD", "FDUSD", "BTC", "WBTC", "ETH", "WETH", "BNB", "SOL",
+    "TRX", "MATIC", "POL", "ARB", "OP", "AVAX", "XRP", "ADA", "DOGE", "LINK", "TON", "PEPE", "SHIB"
+}
+
+# Apelidos de rede -> nome canônico usado pelo Gatekeeper/CCXTConnector
+NETWORK_ALIASES = {
+    "erc20": "ERC20", "erc-20": "ERC20", "ethereum": "ERC20", "eth": "ERC20",
+    "bep20": "BEP20", "bep-20": "BEP20", "bsc": "BEP20", "bnb": "BEP20", "bnb chain": "BEP20", "bnb smart chain": "BEP20",
+    "trc20": "TRC20", "trc-20": "TRC20", "tron": "TRC20", "trx": "TRC20",
+    "polygon": "Polygon", "matic": "Polygon", "pol": "Polygon",
+    "arbitrum": "Arbitrum", "optimism": "Optimism",
+    "solana": "SOL", "sol": "SOL"
+}
+
+# Nomes de exibição (em minúsculas devem coincidir com o id da CCXT)
+EXCHANGE_NAMES = {
+    "binance": "Binance", "okx": "OKX", "bybit": "Bybit", "gate": "Gate", "kucoin": "KuCoin",
+    "mexc": "MEXC", "bitget": "Bitget", "kraken": "Kraken", "coinbase": "Coinbase", "htx": "HTX",
+    "mercado": "Mercado", "foxbit": "Foxbit", "novadax": "NovaDAX"
+}
+# Gate: o id da CCXT é 'gate' ('gateio' é o nome antigo e não existe mais na lista de exchanges)
+EXCHANGE_ALIASES = {"gate.io": "gate", "gateio": "gate", "huobi": "htx", "mercado bitcoin": "mercado"}
+
+# Ids da CCXT que colidem com palavras comuns e não identificam uma corretora sozinhos
+AMBIGUOUS_EXCHANGE_IDS = {"cex", "extended", "bullish", "lighter", "delta", "derive", "aster"}
+
+ORIGIN_MARKERS = {"de", "da", "do", "from", "desde"}
+DESTINATION_MARKERS = {"para", "pra", "pro", "to", "->", "→", "➔", "=>", "até", "ate"}
+NETWORK_MARKERS = {"via", "rede", "network", "pela", "pelo", "na", "on"}
+
+TOKEN_RE = re.compile(r"->|=>|[→➔]|[\w.\-]+", re.UNICODE)
+INTENT_FIELDS = ("asset", "origin", "destination", "network", "address")
+
+
+class LocalIntentParser:
+    """
+    Extrator de intenção por regras (sem LLM).
+    Reconhece ativos, corretoras (ids da CCXT), carteiras do registry, apelidos de rede
+    e endereços pelos padrões do Gatekeeper.
+    """
+    def __init__(self, registry_path='core/registry/networks.json', exchanges=None, assets=None):
+        registry = {"wallets": {}, "exchanges": {}}
+        if os.path.exists(registry_path):
+            with open(registry_path, 'r') as f:
+                registry = json.load(f)
+
+        self.assets = set(KNOWN_ASSETS) | {a.upper() for a in (assets or [])}
+        for coins in registry.get("exchanges", {}).values():
+            self.assets |= {coin.upper() for coin in coins}
+
+        # Pontas da transferência: corretoras e carteiras, por nome em minúsculas
+        self.endpoints = {}
+        if exchanges is None:
+            import ccxt.async_support as ccxt
+            exchanges = ccxt.exchanges
+        for exchange_id in exchanges:
+            if len(exchange_id) >= 3 and exchange_id not in AMBIGUOUS_EXCHANGE_IDS:
+                self.endpoints[exchange_id] = EXCHANGE_NAMES.get(exchange_id, exchange_id)
+        for alias, exchange_id in EXCHANGE_ALIASES.items():
+            self.endpoints[alias] = EXCHANGE_NAMES.get(exchange_id, exchange_id)
+        for name in registry.get("exchanges", {}):
+            self.endpoints[name.lower()] = name
+        for wallet in registry.get("wallets", {}):
+            self.endpoints[wallet.lower()] = wallet
+
+        # Endereços: mesmos padrões do Gatekeeper, sem âncoras, em ordem de prioridade
+        self.address_res = [
+            re.compile(r"(?<![\w])" + pattern.strip("^$") + r"(?![\w])")
+            for pattern in ADDRESS_PATTERNS.values()
+        ]
+
+    def _find_address(self, text):
+        found = []
+        for regex in self.address_res:
+            for match in regex.finditer(text):
+                if not any(match.start() < end and start < match.end() for start, end, _ in found):
+                    found.append((match.start(), match.end(), match.group(0)))
+        return found
+
+    def parse(self, text):
+        """
+        Retorna (intent, confiante). 'confiante' exige ativo, origem, destino e rede
+        sem ambiguidades; o endereço é opcional.
+        """
+        intent = dict.fromkeys(INTENT_FIELDS)
+        ambiguous = False
+
+        addresses = self._find_address(text)
+        if len({a for _, _, a in addresses}) > 1:
+            ambiguous = True
+        elif addresses:
+            intent["address"] = addresses[0][2]
+        # Remove os endereços antes de tokenizar (evita ler trechos como ativos/redes)
+        for start, end, _ in sorted(addresses, reverse=True):
+            text = text[:start] + " " + text[end:]
+
+        tokens = TOKEN_RE.findall(text)
+        lowered = [t.lower().strip(".-") for t in tokens]
+
+        endpoints = []      # (posição, nome, marcador anterior)
+        assets = []         # (posição, símbolo)
+        networks = []       # (posição, canônico, precedido por marcador de rede)
+        i = 0
+        while i < len(lowered):
+            word = lowered[i]
+            bigram = f"{word} {lowered[i + 1]}" if i + 1 < len(lowered) else None
+            trigram = f"{bigram} {lowered[i + 2]}" if i + 2 < len(lowered) else None
+            previous = lowered[i - 1] if i > 0 else None
+
+            phrase = next((p for p in (trigram, bigram) if p and (p in self.endpoints or p in NETWORK_ALIASES)), None)
+            if phrase:
+                if phrase in self.endpoints:
+                    endpoints.append((i, self.endpoints[phrase], previous))
+                else:
+                    networks.append((i, NETWORK_ALIASES[phrase], previous in NETWORK_MARKERS))
+                i += len(phrase.split())
+                continue
+
+            if word in self.endpoints:
+                endpoints.append((i, self.endpoints[word], previous))
+            else:
+                if word.upper() in self.assets:
+                    assets.append((i, word.upper()))
+                if word in NETWORK_ALIASES:
+                    networks.append((i, NETWORK_ALIASES[word], previous in NETWORK_MARKERS))
+            i += 1
+
+        # Ativo x rede: símbolos como ETH/SOL/TRX/BNB podem ser qualquer um dos dois
+        network_positions = {pos for pos, _, _ in networks}
+        pure_assets = [a for a in assets if a[0] not in network_positions]
+        dual = [a for a in assets if a[0] in network_positions]
+        marked_networks = [n for n in networks if n[2]]
+        asset_candidates = {sym for _, sym in pure_assets}
+        if not asset_candidates:
+            unmarked_dual = [a for a in dual if not any(n[0] == a[0] for n in marked_networks)]
+            if unmarked_dual:
+                asset_candidates = {unmarked_dual[0][1]}
+        asset_positions = {pos for pos, sym in assets if sym in asset_candidates and not any(n[0] == pos for n in marked_networks)}
+        network_candidates = {canon for pos, canon, _ in networks if pos not in asset_positions}
+
+        if len(asset_candidates) == 1:
+            intent["asset"] = asset_candidates.pop()
+        elif asset_candidates:
+            ambiguous = True
+        if len(network_candidates) == 1:
+            intent["network"] = network_candidates.pop()
+        elif network_candidates:
+            ambiguous = True
+
+        # Origem x destino: marcadores ("da", "para", "->") ou ordem de aparição
+        distinct = list(dict.fromkeys(name for _, name, _ in endpoints))
+        if len(distinct) > 2:
+            ambiguous = True
+        elif endpoints:
+            first = {name: (pos, prev) for pos, name, prev in reversed(endpoints)}
+            origin = next((n for n, (_, prev) in first.items() if prev in ORIGIN_MARKERS), None)
+            destination = next((n for n, (_, prev) in first.items() if prev in DESTINATION_MARKERS), None)
+            if len(distinct) == 2:
+                if origin and not destination:
+                    destination = next(n for n in distinct if n != origin)
+                elif destination and not origin:
+                    origin = next(n for n in distinct if n != destination)
+                elif not origin and not destination:
+                    origin, destination = distinct
+            intent["origin"], intent["destination"] = origin, destination
+            if origin and origin == destination:
+                ambiguous = True
+
+        confident = not ambiguous and all(intent[f] for f in ("asset", "origin", "destination", "network"))
+        return intent, confident
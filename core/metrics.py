@@ -0,0 +1,292 @@
+import asyncio
+import bisect
+import contextlib
+import logging
+import os
+import time
+
+# Limites (segundos) dos histogramas de duração
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+PREFIX = "safesentinel"
+
+HELP = {
+    "span_seconds": "Duração de cada etapa (estágios do Gatekeeper, CCXT, RPC, LLM, bot).",
+    "upstream_calls_total": "Chamadas a cada upstream.",
+    "upstream_errors_total": "Chamadas ao upstream que falharam (inclui timeouts).",
+    "upstream_timeouts_total": "Chamadas ao upstream encerradas por timeout.",
+    "upstream_seconds": "Duração das chamadas a cada upstream.",
+    "upstream_inflight": "Chamadas em andamento por upstream.",
+    "cache_hits_total": "Acertos por cache.",
+    "cache_misses_total": "Faltas por cache.",
+    "checks_total": "Verificações concluídas por status do veredito.",
+    "breaker_open": "1 enquanto o circuito do upstream estiver aberto.",
+    "inflight_tasks": "Tarefas compartilhadas (SingleFlight) em andamento.",
+    "capability_cells": "Células da matriz de capacidades carregada.",
+    "startup_seconds": "Tempo de inicialização da API por fase (import do módulo, lifespan).",
+}
+
+
+def _labels_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class _Histogram:
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self, size):
+        self.counts = [0] * size
+        self.total = 0.0
+        self.count = 0
+
+
+class Metrics:
+    """
+    Contadores, gauges e histogramas do processo, renderizados no formato texto do Prometheus.
+    Desligado (METRICS_ENABLED=0), cada chamada retorna na primeira linha e span() devolve
+    um contexto vazio compartilhado. Com METRICS_OTEL=1 e o pacote opentelemetry-api
+    instalado, cada span também vira um span do OpenTelemetry (exportado pelo SDK configurado).
+    """
+    def __init__(self, enabled=None, otel=None, buckets=DEFAULT_BUCKETS):
+        self.enabled = (enabled if enabled is not None else os.getenv("METRICS_ENABLED", "1")) not in (False, "0", "false", "no")
+        self.buckets = tuple(buckets)
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+        # Gauges calculados na hora da coleta (ex.: estado dos circuit breakers)
+        self.collectors = []
+        self._null = contextlib.nullcontext()
+        self.tracer = None
+        if self.enabled and (otel if otel is not None else os.getenv("METRICS_OTEL", "0") in ("1", "true", "yes")):
+            try:
+                from opentelemetry import trace
+                self.tracer = trace.get_tracer(PREFIX)
+            except ImportError:
+                logging.warning("METRICS_OTEL=1, mas o pacote opentelemetry-api não está instalado.")
+
+    def inc(self, name, value=1, **labels):
+        if not self.enabled:
+            return
+        key = (name, _labels_key(labels))
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def gauge_add(self, name, delta, **labels):
+        if not self.enabled:
+            return
+        key = (name, _labels_key(labels))
+        self.gauges[key] = self.gauges.get(key, 0) + delta
+
+    def gauge_set(self, name, value, **labels):
+        if not self.enabled:
+            return
+        self.gauges[(name, _labels_key(labels))] = value
+
+    def observe(self, name, seconds, **labels):
+        if not self.enabled:
+            return
+        self._observe((name, _labels_key(labels)), seconds)
+
+    def _observe(self, key, seconds):
+        hist = self.histograms.get(key)
+        if hist is None:
+            hist = self.histograms[key] = _Histogram(len(self.buckets) + 1)
+        # Última posição: acima do maior limite (só entra no +Inf)
+        hist.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        hist.total += seconds
+        hist.count += 1
+
+    def cache(self, cache, hits=0, misses=0):
+        if not self.enabled:
+            return
+        if hits:
+            self.inc("cache_hits_total", hits, cache=cache)
+        if misses:
+            self.inc("cache_misses_total", misses, cache=cache)
+
+    def span(self, name, **labels):
+        """Mede um trecho: with get_metrics().span("ccxt.load_markets", exchange="okx"): ..."""
+        if not self.enabled:
+            return self._null
+        return _Span(self, name, labels)
+
+    def upstream(self, name, timeout_errors=()):
+        """
+        Mede uma chamada externa: chamadas, erros, timeouts (exceções em 'timeout_errors'),
+        duração e chamadas em andamento. Use mark_error() para falhas sem exceção (ex.: HTTP 503).
+        """
+        if not self.enabled:
+            return _NULL_CALL
+        return _UpstreamCall(self, name, timeout_errors)
+
+    def register_collector(self, collector):
+        """collector() -> [(nome, {labels}, valor)], avaliado a cada render()."""
+        self.collectors.append(collector)
+
+    def unregister_collector(self, collector):
+        if collector in self.collectors:
+            self.collectors.remove(collector)
+
+    def render(self):
+        """Todas as métricas no formato texto de exposição do Prometheus (0.0.4)."""
+        families = {}
+        for (name, key), value in self.counters.items():
+            families.setdefault((name, "counter"), []).append((key, value))
+        for (name, key), value in self.gauges.items():
+            families.setdefault((name, "gauge"), []).append((key, value))
+        for collector in self.collectors:
+            try:
+                for name, labels, value in collector():
+                    families.setdefault((name, "gauge"), []).append((_labels_key(labels), value))
+            except Exception as e:
+                logging.warning(f"Falha num coletor de métricas: {e}")
+
+        lines = []
+        for (name, kind), samples in sorted(families.items()):
+            full = f"{PREFIX}_{name}"
+            if name in HELP:
+                lines.append(f"# HELP {full} {HELP[name]}")
+            lines.append(f"# TYPE {full} {kind}")
+            for key, value in sorted(samples):
+                lines.append(f"{full}{_format_labels(key)} {value}")
+
+        by_name = {}
+        for (name, key), hist in self.histograms.items():
+            by_name.setdefault(name, []).append((key, hist))
+        for name, series in sorted(by_name.items()):
+            full = f"{PREFIX}_{name}"
+            if name in HELP:
+                lines.append(f"# HELP {full} {HELP[name]}")
+            lines.append(f"# TYPE {full} histogram")
+            for key, hist in sorted(series, key=lambda item: item[0]):
+                cumulative = 0
+                for bound, count in zip(self.buckets, hist.counts):
+                    cumulative += count
+                    lines.append(f"{full}_bucket{_format_labels(key, [('le', bound)])} {cumulative}")
+                lines.append(f"{full}_bucket{_format_labels(key, [('le', '+Inf')])} {hist.count}")
+                lines.append(f"{full}_sum{_format_labels(key)} {round(hist.total, 6)}")
+                lines.append(f"{full}_count{_format_labels(key)} {hist.count}")
+        return "\n".join(lines) + "\n"
+
+
+class _Span:
+    __slots__ = ("metrics", "name", "labels", "start", "otel")
+
+    def __init__(self, metrics, name, labels):
+        self.metrics = metrics
+        self.name = name
+        self.labels = labels
+        self.otel = None
+
+    def __enter__(self):
+        tracer = self.metrics.tracer
+        if tracer is not None:
+            self.otel = tracer.start_as_current_span(self.name, attributes=self.labels)
+            self.otel.__enter__()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.start
+        key = ("span_seconds", _labels_key({"span": self.name, **self.labels}) if self.labels else (("span", self.name),))
+        self.metrics._observe(key, elapsed)
+        if self.otel is not None:
+            return self.otel.__exit__(exc_type, exc, tb)
+        return False
+
+
+class _UpstreamCall:
+    __slots__ = ("metrics", "name", "timeout_errors", "start", "failed")
+
+    def __init__(self, metrics, name, timeout_errors):
+        self.metrics = metrics
+        self.name = name
+        self.timeout_errors = timeout_errors
+        self.failed = False
+
+    def mark_error(self):
+        self.failed = True
+
+    def __enter__(self):
+        self.metrics.inc("upstream_calls_total", upstream=self.name)
+        self.metrics.gauge_add("upstream_inflight", 1, upstream=self.name)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        m = self.metrics
+        m.gauge_add("upstream_inflight", -1, upstream=self.name)
+        m._observe(("upstream_seconds", (("upstream", self.name),)), time.perf_counter() - self.start)
+        if exc_type is not None and issubclass(exc_type, asyncio.CancelledError):
+            return False
+        if exc_type is not None or self.failed:
+            m.inc("upstream_errors_total", upstream=self.name)
+        if exc_type is not None and self.timeout_errors and issubclass(exc_type, self.timeout_errors):
+            m.inc("upstream_timeouts_total", upstream=self.name)
+        return False
+
+
+class _NullCall:
+    __slots__ = ()
+
+    def mark_error(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_CALL = _NullCall()
+
+_metrics = None
+
+
+def get_metrics():
+    """Métricas do processo (API ou bot), criadas no primeiro uso."""
+    global _metrics
+    if _metrics is None:
+        _metrics = Metrics()
+    return _metrics
+
+
+def set_metrics(metrics):
+    global _metrics
+    _metrics = metrics
+
+
+async def start_metrics_server(port, host="0.0.0.0"):
+    """
+    Servidor mínimo com GET /metrics para processos sem FastAPI (ex.: o bot em polling).
+    Retorna o asyncio.Server; feche com server.close().
+    """
+    async def handle(reader, writer):
+        try:
+            request = await reader.readline()
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+            if request.split(b" ")[1:2] == [b"/metrics"]:
+                status, body = "200 OK", get_metrics().render().encode("utf-8")
+            else:
+                status, body = "404 Not Found", b""
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode("ascii") + body
+            )
+            await writer.drain()
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port)
@@ -0,0 +1,72 @@
+import asyncio
+import time
+from core.metrics import get_metrics
+
+# Custo declarado de cada estágio. Estágios de mesmo custo rodam em paralelo;
+# faixas mais baratas rodam antes e podem encerrar a validação sozinhas.
+COST_FREE = 0       # Regras locais (memória/CPU)
+COST_NETWORK = 10   # RPC, exchanges e demais chamadas externas
+
+
+class Stage:
+    """
+    Um passo da validação.
+    'run' é uma coroutine que recebe o contexto e devolve um veredito (dict) ou None.
+    'short_circuits' lista os status que encerram a pipeline sem rodar estágios mais caros.
+    """
+    def __init__(self, name, cost, run, short_circuits=()):
+        self.name = name
+        self.cost = cost
+        self.run = run
+        self.short_circuits = frozenset(short_circuits)
+
+
+class ValidationPipeline:
+    def __init__(self, stages):
+        self.stages = list(stages)
+        self.tiers = {}
+        for stage in self.stages:
+            self.tiers.setdefault(stage.cost, []).append(stage)
+
+    async def _timed(self, stage, ctx, timings):
+        start = time.perf_counter()
+        try:
+            with get_metrics().span(f"stage.{stage.name}"):
+                return await stage.run(ctx)
+        finally:
+            timings[stage.name] = round((time.perf_counter() - start) * 1000, 3)
+
+    async def run(self, ctx, max_cost=None):
+        """
+        Executa as faixas de custo em ordem crescente (até 'max_cost', se informado).
+        O veredito final é o primeiro (na ordem declarada dos estágios) que não for None.
+        'short_circuit' traz o estágio que encerrou a pipeline, ou None.
+        """
+        start = time.perf_counter()
+        timings = {}
+        verdicts = {}
+        short_circuited = None
+
+        for cost in sorted(self.tiers):
+            if max_cost is not None and cost > max_cost:
+                break
+            tier = self.tiers[cost]
+            results = await asyncio.gather(*(self._timed(stage, ctx, timings) for stage in tier))
+            for stage, verdict in zip(tier, results):
+                if verdict is None:
+                    continue
+                verdicts[stage.name] = verdict
+                if short_circuited is None and verdict.get("status") in stage.short_circuits:
+                    short_circuited = stage.name
+            if short_circuited:
+                break
+
+        result = next((verdicts[s.name] for s in self.stages if s.name in verdicts), None)
+        if result is None:
+            result = {"status": "SAFE", "risk": "LOW", "message": "Caminho validado e compatível."}
+
+        timings["total"] = round((time.perf_counter() - start) * 1000, 3)
+        result["timings"] = timings
+        result["skipped_stages"] = [s.name for s in self.stages if s.name not in timings]
+        result["short_circuit"] = short_circuited
+        return result
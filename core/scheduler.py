@@ -0,0 +1,98 @@
+import asyncio
+import os
+import struct
+import tempfile
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: o bucket vale só para o processo atual
+    fcntl = None
+
+# Estado do bucket no arquivo: tokens disponíveis e instante da última atualização
+BUCKET_STATE = struct.Struct("<dd")
+
+
+class HostTokenBucket:
+    """
+    Token bucket compartilhado por todos os processos do host (workers do uvicorn, bot).
+    O estado fica num arquivo pequeno; cada atualização acontece sob fcntl.flock.
+    """
+    def __init__(self, name, rate, burst=1, directory=None):
+        self.name = name
+        self.rate = float(rate)
+        self.burst = float(burst)
+        directory = directory or os.getenv("RATE_LIMIT_DIR") or os.path.join(tempfile.gettempdir(), "safesentinel-ratelimit")
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, f"{name}.bucket")
+        self.fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+
+    def _take(self, cost):
+        """Consome 'cost' tokens se houver saldo; senão retorna quantos segundos esperar."""
+        if fcntl:
+            fcntl.flock(self.fd, fcntl.LOCK_EX)
+        try:
+            now = time.time()
+            raw = os.pread(self.fd, BUCKET_STATE.size, 0)
+            tokens, updated_at = BUCKET_STATE.unpack(raw) if len(raw) == BUCKET_STATE.size else (self.burst, now)
+            tokens = min(self.burst, tokens + max(0.0, now - updated_at) * self.rate)
+            # Custos acima do burst passam com o bucket cheio e deixam saldo negativo
+            needed = min(cost, self.burst)
+            if tokens < needed:
+                return (needed - tokens) / self.rate
+            os.pwrite(self.fd, BUCKET_STATE.pack(tokens - cost, now), 0)
+            return 0.0
+        finally:
+            if fcntl:
+                fcntl.flock(self.fd, fcntl.LOCK_UN)
+
+    async def acquire(self, cost=1):
+        cost = cost or 1
+        while True:
+            wait = self._take(cost)
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    def close(self):
+        os.close(self.fd)
+
+
+class SingleFlight:
+    """
+    Agrupa chamadas idênticas em andamento: a primeira cria a tarefa e as demais
+    aguardam o mesmo resultado (ou a mesma exceção). Cancelar um chamador não
+    cancela a tarefa compartilhada.
+    """
+    def __init__(self):
+        self.inflight = {}
+        self.coalesced = 0
+
+    def __contains__(self, key):
+        return key in self.inflight
+
+    def run(self, key, factory):
+        """Tarefa em andamento para 'key', criada com factory() se ainda não existir."""
+        task = self.inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(factory())
+            self.inflight[key] = task
+            task.add_done_callback(lambda t: self._done(key, t))
+        else:
+            self.coalesced += 1
+        return task
+
+    def _done(self, key, task):
+        if self.inflight.get(key) is task:
+            del self.inflight[key]
+        # Marca a exceção como lida: quem aguardava já a recebeu (ou foi cancelado)
+        if not task.cancelled():
+            task.exception()
+
+    async def do(self, key, factory):
+        return await asyncio.shield(self.run(key, factory))
+
+    def cancel_all(self):
+        for task in list(self.inflight.values()):
+            task.cancel()
+        self.inflight = {}
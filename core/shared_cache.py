@@ -0,0 +1,342 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from urllib.parse import urlsplit
+from core.metrics import get_metrics
+
+# TTL (segundos) por tipo de dado, iguais em todos os processos (CACHE_TTL_<TIPO>)
+DEFAULT_TTLS = {
+    "currencies": 300,
+    # Contrato implantado não deixa de ter código; "sem código" (EOA) pode mudar a qualquer
+    # momento (CREATE2, contas contrafactuais), então vale só por pouco tempo (0 = não guarda)
+    "getcode": 86400,
+    "getcode_eoa": 60,
+    "cmc": 3600,
+    "humanizer": 7 * 86400
+}
+
+
+def cache_ttls():
+    return {kind: float(os.getenv(f"CACHE_TTL_{kind.upper()}", ttl)) for kind, ttl in DEFAULT_TTLS.items()}
+
+
+def purge_interval():
+    """Intervalo (s) entre limpezas das entradas vencidas, feitas junto com uma gravação."""
+    return float(os.getenv("CACHE_PURGE_INTERVAL", 300))
+
+
+class MemoryBackend:
+    """Cache no próprio processo (sem compartilhamento); útil em testes e scripts."""
+    def __init__(self, purge_every=None):
+        self.entries = {}
+        self.purge_every = float(purge_every if purge_every is not None else purge_interval())
+        self._next_purge = time.time() + self.purge_every
+
+    async def get_many(self, keys):
+        now = time.time()
+        found = {}
+        for key in keys:
+            entry = self.entries.get(key)
+            if entry and entry[1] > now:
+                found[key] = entry[0]
+        return found
+
+    async def set_many(self, items, ttl):
+        now = time.time()
+        expires_at = now + ttl
+        for key, value in items.items():
+            self.entries[key] = (value, expires_at)
+        if now >= self._next_purge:
+            self.purge_expired()
+
+    def purge_expired(self):
+        now = time.time()
+        self.entries = {key: entry for key, entry in self.entries.items() if entry[1] > now}
+        self._next_purge = now + self.purge_every
+
+    async def close(self):
+        self.entries = {}
+
+
+class SQLiteBackend:
+    """
+    Cache em arquivo SQLite (modo WAL), compartilhado pelos processos do host:
+    leitores não bloqueiam o escritor e vice-versa. Entradas vencidas são apagadas
+    a cada 'purge_every' segundos, na gravação seguinte (o arquivo não cresce sem limite).
+    """
+    def __init__(self, path, purge_every=None):
+        self.path = path
+        self.purge_every = float(purge_every if purge_every is not None else purge_interval())
+        self._next_purge = time.time() + self.purge_every
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=5, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)")
+        self._lock = threading.Lock()
+
+    def _get_many(self, keys):
+        found = {}
+        now = time.time()
+        with self._lock:
+            # Limite de parâmetros do SQLite por consulta
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                rows = self.conn.execute(
+                    f"SELECT key, value FROM cache WHERE key IN ({','.join('?' * len(chunk))}) AND expires_at > ?",
+                    (*chunk, now)
+                )
+                found.update(rows)
+        return found
+
+    def _set_many(self, items, ttl):
+        expires_at = time.time() + ttl
+        with self._lock:
+            self.conn.execute("BEGIN")
+            try:
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                    [(key, value, expires_at) for key, value in items.items()]
+                )
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            if time.time() >= self._next_purge:
+                self._purge_expired()
+
+    def _purge_expired(self):
+        now = time.time()
+        self.conn.execute("DELETE FROM cache WHERE expires_at <= ?", (now,))
+        self._next_purge = now + self.purge_every
+
+    def purge_expired(self):
+        with self._lock:
+            self._purge_expired()
+
+    async def get_many(self, keys):
+        return await asyncio.to_thread(self._get_many, list(keys))
+
+    async def set_many(self, items, ttl):
+        await asyncio.to_thread(self._set_many, items, ttl)
+
+    async def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+class RedisBackend:
+    """
+    Cliente mínimo do protocolo Redis (RESP): MGET e SET ... EX em pipeline.
+    Serve com Redis, Valkey, KeyDB ou um stand-in local que fale RESP.
+    """
+    def __init__(self, url, timeout=None):
+        self.timeout = float(timeout or os.getenv("CACHE_TIMEOUT", 1.0))
+        parts = urlsplit(url)
+        self.host = parts.hostname or "localhost"
+        self.port = parts.port or 6379
+        self.password = parts.password
+        self.db = int(parts.path.lstrip("/") or 0)
+        self._reader = None
+        self._writer = None
+        self._lock = asyncio.Lock()
+
+    @staticmethod
+    def _encode(*args):
+        out = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode("utf-8")
+            out.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        return b"".join(out)
+
+    async def _read_reply(self):
+        line = await self._reader.readline()
+        if not line:
+            raise ConnectionError("Conexão com o cache encerrada.")
+        kind, rest = line[:1], line[1:-2]
+        if kind == b"+":
+            return rest.decode()
+        if kind == b"-":
+            raise RuntimeError(rest.decode())
+        if kind == b":":
+            return int(rest)
+        if kind == b"$":
+            size = int(rest)
+            if size < 0:
+                return None
+            return (await self._reader.readexactly(size + 2))[:-2]
+        if kind == b"*":
+            size = int(rest)
+            return None if size < 0 else [await self._read_reply() for _ in range(size)]
+        raise RuntimeError(f"Resposta RESP inválida: {line!r}")
+
+    async def _connect(self):
+        self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        setup = []
+        if self.password:
+            setup.append(self._encode("AUTH", self.password))
+        if self.db:
+            setup.append(self._encode("SELECT", self.db))
+        if setup:
+            self._writer.write(b"".join(setup))
+            for _ in setup:
+                await self._read_reply()
+
+    async def _roundtrip(self, commands):
+        if self._writer is None:
+            await self._connect()
+        self._writer.write(b"".join(self._encode(*cmd) for cmd in commands))
+        await self._writer.drain()
+        return [await self._read_reply() for _ in commands]
+
+    async def _execute(self, commands):
+        """Envia os comandos de uma vez (pipeline) e lê as respostas na ordem (limite de CACHE_TIMEOUT)."""
+        async with self._lock:
+            for attempt in (0, 1):
+                try:
+                    return await asyncio.wait_for(self._roundtrip(commands), self.timeout)
+                except asyncio.TimeoutError:
+                    # Resposta pela metade deixaria a conexão dessincronizada
+                    await self._disconnect()
+                    raise
+                except (ConnectionError, OSError, asyncio.IncompleteReadError):
+                    # Conexão caída: reconecta uma vez
+                    await self._disconnect()
+                    if attempt:
+                        raise
+
+    async def _disconnect(self):
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
+
+    async def get_many(self, keys):
+        keys = list(keys)
+        if not keys:
+            return {}
+        values = (await self._execute([("MGET", *keys)]))[0]
+        return {key: value for key, value in zip(keys, values) if value is not None}
+
+    async def set_many(self, items, ttl):
+        if items:
+            await self._execute([("SET", key, value, "EX", max(1, int(ttl))) for key, value in items.items()])
+
+    async def close(self):
+        async with self._lock:
+            await self._disconnect()
+
+
+class SharedCache:
+    """
+    Cache compartilhado entre processos, por tipo de dado (currencies, getcode, cmc, humanizer).
+    Valores são serializados em JSON; cada tipo tem o mesmo TTL em todos os conectores.
+    Falhas do backend nunca derrubam a requisição: enquanto ele estiver fora (ex.: Redis
+    recusando conexões), leituras e gravações usam um cache em memória do processo.
+    """
+    def __init__(self, backend, ttls=None, namespace="safesentinel"):
+        self.backend = backend
+        self.fallback = MemoryBackend()
+        self.ttls = {**cache_ttls(), **(ttls or {})}
+        self.namespace = namespace
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, kind, key):
+        return f"{self.namespace}:{kind}:{key}"
+
+    async def get(self, kind, key):
+        return (await self.get_many(kind, [key])).get(key)
+
+    async def get_many(self, kind, keys):
+        keys = list(keys)
+        raw_keys = [self._key(kind, k) for k in keys]
+        try:
+            raw = await self.backend.get_many(raw_keys)
+        except Exception as e:
+            logging.warning(f"Cache compartilhado indisponível: {e}")
+            raw = await self.fallback.get_many(raw_keys)
+        found = {}
+        for k in keys:
+            value = raw.get(self._key(kind, k))
+            if value is not None:
+                found[k] = json.loads(value)
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        get_metrics().cache(f"shared:{kind}", hits=len(found), misses=len(keys) - len(found))
+        return found
+
+    async def set(self, kind, key, value, ttl=None):
+        await self.set_many(kind, {key: value}, ttl)
+
+    async def set_many(self, kind, items, ttl=None):
+        """'ttl' substitui o TTL do tipo; TTL <= 0 não grava nada."""
+        ttl = self.ttls[kind] if ttl is None else ttl
+        if not items or ttl <= 0:
+            return
+        encoded = {self._key(kind, k): json.dumps(v, ensure_ascii=False).encode("utf-8") for k, v in items.items()}
+        try:
+            await self.backend.set_many(encoded, ttl)
+        except Exception as e:
+            logging.warning(f"Falha ao gravar no cache compartilhado: {e}")
+            await self.fallback.set_many(encoded, ttl)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0
+        }
+
+    async def close(self):
+        await self.backend.close()
+
+
+def create_backend(kind=None):
+    """Backend pela configuração: CACHE_BACKEND=sqlite (padrão, CACHE_PATH), redis (CACHE_URL) ou memory."""
+    kind = (kind or os.getenv("CACHE_BACKEND", "sqlite")).lower()
+    if kind == "memory":
+        return MemoryBackend()
+    if kind == "redis":
+        return RedisBackend(os.getenv("CACHE_URL", "redis://localhost:6379/0"))
+    if kind == "sqlite":
+        return SQLiteBackend(os.getenv("CACHE_PATH", ".cache/shared.db"))
+    raise ValueError(f"CACHE_BACKEND desconhecido: {kind}")
+
+
+_shared_cache = None
+
+
+def get_shared_cache():
+    """
+    Cache compartilhado do processo (criado no primeiro uso). Se o backend configurado
+    não puder ser criado (ex.: CACHE_PATH inválido ou somente leitura), o processo segue
+    com um cache em memória: o cache nunca derruba a requisição.
+    """
+    global _shared_cache
+    if _shared_cache is None:
+        try:
+            backend = create_backend()
+        except (OSError, sqlite3.Error, ValueError) as e:
+            logging.error(f"Cache compartilhado indisponível ({e}); usando cache em memória.")
+            backend = MemoryBackend()
+        _shared_cache = SharedCache(backend)
+    return _shared_cache
+
+
+def set_shared_cache(cache):
+    """Substitui o cache compartilhado (ex.: MemoryBackend ou stand-in Redis em testes)."""
+    global _shared_cache
+    _shared_cache = cache
+
+
+async def close_shared_cache():
+    global _shared_cache
+    if _shared_cache is not None:
+        await _shared_cache.close()
+        _shared_cache = None
@@ -1,16 +1,19 @@
 import os
-import requests
 import json
-from dotenv import load_dotenv
+from core.http_client import get_http_client
 
-load_dotenv()
 
 class SourcingAgent:
-    def __init__(self, api_key=None):
+    def __init__(self, api_key=None, http=None):
         self.api_key = api_key or os.getenv("PERPLEXITY_API_KEY")
         self.url = "https://api.perplexity.ai/chat/completions"
+        self._http = http
 
-    def find_best_route(self, token, target_network):
+    @property
+    def http(self):
+        return self._http or get_http_client()
+
+    async def find_best_route(self, token, target_network):
         """
         Consulta o Perplexity para encontrar a melhor rota de aquisição e bridge.
         """
@@ -50,7 +53,7 @@ class SourcingAgent:
         }
 
         try:
-            response = requests.post(self.url, headers=headers, json=payload)
+            response = await self.http.post(self.url, headers=headers, json=payload, timeout=60)
             response.raise_for_status()
             data = response.json()
             return json.loads(data['choices'][0]['message']['content']), None
@@ -61,4 +64,4 @@ if __name__ == "__main__":
     # Teste rápido (Mock)
     print("--- Sourcing Agent: Iniciando rascunho de busca ---")
     # agent = SourcingAgent()
-    # print(agent.find_best_route("OKB", "X Layer"))
+    # print(asyncio.run(agent.find_best_route("OKB", "X Layer")))
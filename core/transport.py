@@ -0,0 +1,321 @@
+import asyncio
+import base64
+import collections
+import gzip
+import hashlib
+import json
+import logging
+import os
+import random
+import time
+from urllib.parse import parse_qsl, urlencode, urlsplit
+import httpx
+
+try:
+    import fcntl
+except ImportError:  # Windows: gravação sem trava entre processos
+    fcntl = None
+
+PASSTHROUGH = "passthrough"
+RECORD = "record"
+REPLAY = "replay"
+
+# Parâmetros que mudam a cada chamada ou carregam credenciais: fora da chave da gravação
+VOLATILE_PARAMS = {"apikey", "api_key", "key", "signature", "sign", "timestamp", "recvwindow", "nonce"}
+
+
+def transport_mode():
+    """TRANSPORT_MODE: passthrough (padrão, rede real), record (rede real + gravação) ou replay (só gravações)."""
+    mode = os.getenv("TRANSPORT_MODE", PASSTHROUGH).lower()
+    if mode not in (PASSTHROUGH, RECORD, REPLAY):
+        raise ValueError(f"TRANSPORT_MODE desconhecido: {mode}")
+    return mode
+
+
+class CassetteMiss(httpx.TransportError):
+    """Em replay, a requisição não tem resposta gravada (equivale a upstream fora do ar)."""
+    pass
+
+
+class FaultInjector:
+    """
+    Latência e erros injetados no replay.
+    REPLAY_LATENCY_MS: 'recorded' (a latência gravada), um valor fixo ('50') ou um intervalo uniforme ('20-200').
+    REPLAY_ERROR_RATE: fração das respostas trocadas por erro (HTTP REPLAY_ERROR_STATUS ou erro de rede da ccxt).
+    """
+    def __init__(self, latency=None, error_rate=None, error_status=None, seed=None):
+        latency = str(latency or os.getenv("REPLAY_LATENCY_MS", "recorded"))
+        if latency == "recorded":
+            self.latency = None
+        else:
+            low, _, high = latency.partition("-")
+            self.latency = (float(low) / 1000, float(high or low) / 1000)
+        self.error_rate = float(error_rate if error_rate is not None else os.getenv("REPLAY_ERROR_RATE", 0))
+        self.error_status = int(error_status or os.getenv("REPLAY_ERROR_STATUS", 503))
+        self.random = random.Random(seed)
+
+    def delay(self, recorded):
+        if self.latency is None:
+            return recorded or 0.0
+        return self.random.uniform(*self.latency)
+
+    def should_fail(self):
+        return self.error_rate > 0 and self.random.random() < self.error_rate
+
+
+class CassetteStore:
+    """
+    Gravações por upstream em CASSETTE_DIR/<nome>.jsonl.gz (um membro gzip por entrada,
+    então vários processos podem gravar no mesmo arquivo). Respostas repetidas da mesma
+    requisição são servidas em rodízio, na ordem gravada.
+    """
+    def __init__(self, directory=None):
+        self.directory = directory or os.getenv("CASSETTE_DIR", ".cache/cassettes")
+        self.cassettes = {}
+        self._cursor = collections.Counter()
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, name):
+        safe = "".join(c if c.isalnum() or c in "-_." else "_" for c in name)
+        return os.path.join(self.directory, f"{safe}.jsonl.gz")
+
+    def _load(self, name):
+        if name not in self.cassettes:
+            entries = collections.defaultdict(list)
+            path = self._path(name)
+            if os.path.exists(path):
+                with gzip.open(path, "rt", encoding="utf-8") as f:
+                    for line in f:
+                        entry = json.loads(line)
+                        entries[entry["key"]].append(entry)
+            self.cassettes[name] = entries
+        return self.cassettes[name]
+
+    def find(self, name, key):
+        entries = self._load(name).get(key)
+        if not entries:
+            self.misses += 1
+            return None
+        self.hits += 1
+        index = self._cursor[(name, key)] % len(entries)
+        self._cursor[(name, key)] += 1
+        return entries[index]
+
+    def append(self, name, entry):
+        os.makedirs(self.directory, exist_ok=True)
+        data = gzip.compress((json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8"))
+        fd = os.open(self._path(name), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+        try:
+            if fcntl:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            os.write(fd, data)
+        finally:
+            os.close(fd)
+        self._load(name)[entry["key"]].append(entry)
+
+    def stats(self):
+        return {"directory": self.directory, "hits": self.hits, "misses": self.misses}
+
+
+def _fingerprint(*parts):
+    return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()[:32]
+
+
+def _stable_query(query):
+    params = sorted((k, v) for k, v in parse_qsl(query, keep_blank_values=True) if k.lower() not in VOLATILE_PARAMS)
+    return urlencode(params)
+
+
+def _rpc_ids(body):
+    """IDs de uma chamada JSON-RPC (simples ou batch); None se o corpo não for JSON-RPC."""
+    calls = body if isinstance(body, list) else [body]
+    if not calls or not all(isinstance(c, dict) and "jsonrpc" in c for c in calls):
+        return None
+    return [c.get("id") for c in calls]
+
+
+def request_key(request):
+    """
+    Chave da gravação: método, host, caminho e query estáveis e o corpo canônico.
+    JSON-RPC ignora o caminho (onde provedores costumam pôr a API key) e os IDs das chamadas.
+    """
+    url = request.url
+    try:
+        body = json.loads(request.content) if request.content else None
+    except ValueError:
+        body = None
+    if body is not None and _rpc_ids(body) is not None:
+        calls = body if isinstance(body, list) else [body]
+        canonical = json.dumps([{k: v for k, v in c.items() if k != "id"} for c in calls], sort_keys=True)
+        return _fingerprint(request.method, url.host, canonical)
+    if body is not None:
+        canonical = json.dumps(body, sort_keys=True)
+    else:
+        canonical = hashlib.sha256(request.content or b"").hexdigest()
+    return _fingerprint(request.method, url.host, url.path, _stable_query(url.query.decode()), canonical)
+
+
+class CassetteTransport(httpx.AsyncBaseTransport):
+    """
+    Transporte httpx em modo record (repassa ao transporte real e grava) ou replay
+    (responde só com gravações, com latência e erros do FaultInjector). Grava
+    apenas status, content-type, corpo e latência; nenhum header de requisição.
+    """
+    def __init__(self, mode, store=None, inner=None, faults=None):
+        self.mode = mode
+        self.store = store or get_cassette_store()
+        self.inner = inner
+        self.faults = faults or FaultInjector()
+
+    async def handle_async_request(self, request):
+        key = request_key(request)
+        name = request.url.host
+        if self.mode == REPLAY:
+            return await self._replay(request, name, key)
+
+        start = time.perf_counter()
+        response = await self.inner.handle_async_request(request)
+        content = await response.aread()
+        entry = {
+            "key": key,
+            "request": f"{request.method} {request.url.host}",
+            "status": response.status_code,
+            "content_type": response.headers.get("content-type"),
+            "elapsed": round(time.perf_counter() - start, 4)
+        }
+        try:
+            entry["body"] = content.decode("utf-8")
+        except UnicodeDecodeError:
+            entry["body_b64"] = base64.b64encode(content).decode("ascii")
+        ids = self._request_ids(request)
+        if ids is not None:
+            entry["rpc_ids"] = ids
+        self.store.append(name, entry)
+        # O corpo já foi decodificado: os headers de codificação não valem mais
+        headers = [(k, v) for k, v in response.headers.items() if k.lower() not in ("content-encoding", "content-length", "transfer-encoding")]
+        return httpx.Response(response.status_code, headers=headers, content=content, request=request)
+
+    def _request_ids(self, request):
+        try:
+            return _rpc_ids(json.loads(request.content)) if request.content else None
+        except ValueError:
+            return None
+
+    async def _replay(self, request, name, key):
+        entry = self.store.find(name, key)
+        if entry is None:
+            raise CassetteMiss(f"Sem gravação para {request.method} {request.url.host}", request=request)
+        delay = self.faults.delay(entry.get("elapsed"))
+        if delay:
+            await asyncio.sleep(delay)
+        if self.faults.should_fail():
+            return httpx.Response(self.faults.error_status, request=request)
+
+        if "body_b64" in entry:
+            content = base64.b64decode(entry["body_b64"])
+        else:
+            content = entry["body"].encode("utf-8")
+        if entry.get("rpc_ids") is not None:
+            content = self._remap_rpc_ids(content, entry["rpc_ids"], self._request_ids(request) or [])
+        headers = {"content-type": entry["content_type"]} if entry.get("content_type") else {}
+        return httpx.Response(entry["status"], headers=headers, content=content, request=request)
+
+    def _remap_rpc_ids(self, content, recorded_ids, current_ids):
+        """Troca os IDs gravados pelos da requisição atual (mesma posição no batch)."""
+        try:
+            data = json.loads(content)
+        except ValueError:
+            return content
+        mapping = dict(zip(recorded_ids, current_ids))
+        for item in data if isinstance(data, list) else [data]:
+            if isinstance(item, dict) and item.get("id") in mapping:
+                item["id"] = mapping[item["id"]]
+        return json.dumps(data).encode("utf-8")
+
+    async def aclose(self):
+        if self.inner is not None:
+            await self.inner.aclose()
+
+
+def create_transport(**transport_options):
+    """
+    Transporte para um HTTPClient conforme TRANSPORT_MODE. Em passthrough retorna None
+    (o httpx usa o transporte padrão, sem nenhum custo extra).
+    """
+    mode = transport_mode()
+    if mode == PASSTHROUGH:
+        return None
+    inner = httpx.AsyncHTTPTransport(**transport_options) if mode == RECORD else None
+    return CassetteTransport(mode, inner=inner)
+
+
+def wrap_ccxt_fetch(exchange_id, exchange, store=None, faults=None):
+    """
+    Aplica record/replay ao 'fetch' de uma exchange da ccxt (todas as chamadas REST passam por ele).
+    Em replay, erros injetados e gravações ausentes viram ccxt.NetworkError.
+    """
+    mode = transport_mode()
+    if mode == PASSTHROUGH:
+        return exchange
+    import ccxt.async_support as ccxt
+
+    store = store or get_cassette_store()
+    faults = faults or FaultInjector()
+    name = f"ccxt-{exchange_id}"
+    original = exchange.fetch
+
+    async def fetch(url, method="GET", headers=None, body=None):
+        parts = urlsplit(url)
+        key = _fingerprint(method, parts.netloc, parts.path, _stable_query(parts.query), body or "")
+        if mode == REPLAY:
+            entry = store.find(name, key)
+            if entry is None:
+                raise ccxt.NetworkError(f"{exchange_id}: sem gravação para {method} {parts.path}")
+            delay = faults.delay(entry.get("elapsed"))
+            if delay:
+                await asyncio.sleep(delay)
+            if faults.should_fail():
+                raise ccxt.NetworkError(f"{exchange_id}: erro injetado (replay)")
+            if "error" in entry:
+                raise getattr(ccxt, entry["error"], ccxt.ExchangeError)(entry["message"])
+            return entry["result"]
+
+        start = time.perf_counter()
+        entry = {"key": key, "request": f"{method} {parts.netloc}{parts.path}"}
+        try:
+            result = await original(url, method, headers, body)
+            entry["result"] = result
+            return result
+        except ccxt.BaseError as e:
+            # Erros da exchange (ex.: 451, manutenção) também fazem parte do tráfego gravado
+            entry["error"], entry["message"] = type(e).__name__, str(e)
+            raise
+        finally:
+            if "result" in entry or "error" in entry:
+                entry["elapsed"] = round(time.perf_counter() - start, 4)
+                try:
+                    store.append(name, entry)
+                except (OSError, TypeError, ValueError) as e:
+                    logging.warning(f"Falha ao gravar cassette {name}: {e}")
+
+    exchange.fetch = fetch
+    return exchange
+
+
+_store = None
+
+
+def get_cassette_store():
+    """Gravações do processo (CASSETTE_DIR), compartilhadas por todos os transportes."""
+    global _store
+    if _store is None:
+        _store = CassetteStore()
+    return _store
+
+
+def transport_stats():
+    mode = transport_mode()
+    if mode == PASSTHROUGH:
+        return {"mode": mode}
+    return {"mode": mode, **get_cassette_store().stats()}
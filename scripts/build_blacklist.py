@@ -0,0 +1,82 @@
+import sys
+import os
+import csv
+import json
+import time
+import argparse
+
+# Adicionar o diretório raiz ao PYTHONPATH
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.address_validator import AddressValidator
+from core.blacklist_store import BlacklistStore
+
+REGISTRY_BLACKLIST = 'core/registry/blacklist.json'
+
+def read_feed(path, threat_type, description):
+    """
+    Lê um feed de ameaças. Formatos aceitos:
+    - .json: lista de objetos {address, threat_type, description}
+    - .csv: cabeçalho com coluna 'address' (threat_type/description opcionais)
+    - outros: um endereço por linha
+    """
+    if path.endswith('.json'):
+        with open(path, 'r') as f:
+            yield from json.load(f)
+        return
+
+    with open(path, 'r', newline='') as f:
+        if path.endswith('.csv'):
+            for row in csv.DictReader(f):
+                if row.get('address'):
+                    yield {
+                        "address": row['address'].strip(),
+                        "threat_type": row.get('threat_type') or threat_type,
+                        "description": row.get('description') or description
+                    }
+            return
+
+        for line in f:
+            address = line.strip()
+            if address and not address.startswith('#'):
+                yield {"address": address, "threat_type": threat_type, "description": description}
+
+def main():
+    parser = argparse.ArgumentParser(description="Compila feeds de ameaças num índice de blacklist (BLACKLIST_INDEX).")
+    parser.add_argument('feeds', nargs='*', help="Arquivos .json, .csv ou .txt")
+    # Arquivo próprio: core/registry/blacklist.bin é recompilado a partir do blacklist.json
+    # pelo BlacklistStore.from_registry e sobrescreveria o índice dos feeds
+    parser.add_argument('-o', '--output', default='core/registry/feeds.bin',
+                        help="Índice gerado (aponte BLACKLIST_INDEX para ele)")
+    parser.add_argument('--threat-type', default='REPORTED')
+    parser.add_argument('--description', default='Endereço listado em feed de ameaças.')
+    parser.add_argument('--skip-invalid', action='store_true',
+                        help="Descarta endereços com formato ou checksum inválido (EVM/Tron/Solana)")
+    args = parser.parse_args()
+
+    validator = AddressValidator()
+    skipped = 0
+
+    def entries():
+        nonlocal skipped
+        # A blacklist do registry sempre entra primeiro (tem prioridade em duplicatas)
+        feeds = [read_feed(REGISTRY_BLACKLIST, args.threat_type, args.description)]
+        feeds += [read_feed(feed, args.threat_type, args.description) for feed in args.feeds]
+        for feed in feeds:
+            for entry in feed:
+                if args.skip_invalid and validator.check(str(entry['address']).strip()):
+                    skipped += 1
+                    continue
+                yield entry
+
+    start = time.time()
+    store = BlacklistStore.build(entries(), args.output)
+    elapsed = time.time() - start
+    size_mb = os.path.getsize(args.output) / 1024 / 1024
+    print(f"✅ {len(store)} endereços indexados em {elapsed:.1f}s -> {args.output} ({size_mb:.1f} MB)")
+    if skipped:
+        print(f"⚠️ {skipped} endereços inválidos descartados")
+    store.close()
+
+if __name__ == "__main__":
+    main()
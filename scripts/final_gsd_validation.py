@@ -6,8 +6,11 @@ import json
 # Adicionar o diretório raiz ao PYTHONPATH
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+from core.config import load_env
 from core.gatekeeper import Gatekeeper
 from core.humanizer import Humanizer
+from core.http_client import close_http_client
+from core.shared_cache import close_shared_cache
 
 async def simulate_scenario(name, origin, destination, asset, network, address):
     print(f"\n--- SIMULANDO: {name} ---")
@@ -15,16 +18,19 @@ async def simulate_scenario(name, origin, destination, asset, network, address):
     hm = Humanizer()
     
     # 1. Validação do Gatekeeper
-    gk_res = gk.check_compatibility(origin, destination, asset, network, address)
+    gk_res = await gk.check_compatibility(origin, destination, asset, network, address)
     print(f"Status do Gatekeeper: {gk_res['status']} | Risco: {gk_res['risk']}")
     
     # 2. Humanização pela MarIA
     if gk_res['status'] != 'SAFE':
-        explanation = hm.humanize_risk(gk_res)
+        explanation = await hm.humanize_risk(gk_res)
         print(f"MarIA explica: {explanation}")
     else:
         print(f"MarIA aprova: {gk_res['message']}")
 
+    await gk.ccxt_conn.close()
+    await hm.aclose()
+
 async def main():
     # Cenário 1: O clássico erro de rede (Tron -> MetaMask)
     await simulate_scenario(
@@ -56,5 +62,9 @@ async def main():
         address="0x12345"
     )
 
+    await close_http_client()
+    await close_shared_cache()
+
 if __name__ == "__main__":
+    load_env()
     asyncio.run(main())
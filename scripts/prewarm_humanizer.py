@@ -0,0 +1,54 @@
+import sys
+import os
+import json
+import asyncio
+import argparse
+import itertools
+
+# Adicionar o diretório raiz ao PYTHONPATH
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.config import load_env
+from core.gatekeeper import DESTINATION_CEXS, NETWORK_FAMILIES, VERDICT_TEMPLATES, verdict
+from core.humanizer import Humanizer
+from core.http_client import close_http_client
+from core.shared_cache import close_shared_cache
+
+DEFAULT_ASSETS = ["USDT", "USDC", "ETH", "BTC", "BNB", "SOL", "TRX"]
+
+def known_verdicts(assets, exchanges, networks, blacklist_path='core/registry/blacklist.json'):
+    """Todos os vereditos de risco que o Gatekeeper pode emitir para as combinações informadas."""
+    verdicts = [verdict("mismatch_tron"), verdict("mismatch_solana")]
+    verdicts += [verdict("invalid_address", network=net) for net in networks]
+
+    if os.path.exists(blacklist_path):
+        with open(blacklist_path, 'r') as f:
+            descriptions = {entry['description'] for entry in json.load(f)}
+        verdicts += [verdict("blacklisted", description=d) for d in sorted(descriptions)]
+
+    for exchange, asset, net in itertools.product(exchanges, assets, networks):
+        verdicts.append(verdict("unsupported_on_origin", origin=exchange, asset=asset, network=net))
+        verdicts.append(verdict("withdraw_disabled", origin=exchange, asset=asset, network=net))
+        verdicts.append(verdict("deposit_disabled", destination=exchange, asset=asset, network=net))
+    return verdicts
+
+async def main():
+    parser = argparse.ArgumentParser(description="Pré-aquece o cache de explicações do Humanizer.")
+    parser.add_argument('--assets', nargs='*', default=DEFAULT_ASSETS)
+    parser.add_argument('--exchanges', nargs='*', default=DESTINATION_CEXS)
+    parser.add_argument('--networks', nargs='*', default=list(NETWORK_FAMILIES))
+    parser.add_argument('--concurrency', type=int, default=4)
+    args = parser.parse_args()
+
+    hm = Humanizer()
+    verdicts = known_verdicts(args.assets, args.exchanges, args.networks)
+    print(f"--- Pré-aquecendo {len(verdicts)} vereditos ({len(VERDICT_TEMPLATES)} modelos) ---")
+    await hm.prewarm(verdicts, concurrency=args.concurrency)
+    print(f"✅ Cache: {hm.cache.stats()['size']} explicações em {hm.cache.path}")
+    await hm.aclose()
+    await close_http_client()
+    await close_shared_cache()
+
+if __name__ == "__main__":
+    load_env()
+    asyncio.run(main())
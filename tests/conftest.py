@@ -0,0 +1,5 @@
+import sys
+import os
+
+# Adicionar o diretório raiz ao PYTHONPATH
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
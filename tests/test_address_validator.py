@@ -0,0 +1,73 @@
+import pytest
+from core.address_validator import (
+    INVALID_CHECKSUM, INVALID_FORMAT, AddressValidator, base58_decode, to_checksum_address
+)
+
+# Vetores da especificação EIP-55
+EIP55 = [
+    "0x5aAeb6053F3E94C9b9A09f33669435E7Ef1BeAed",
+    "0xfB6916095ca1df60bB79Ce92cE3Ea74c37c5d359",
+    "0xdbF03B407c01E7cD3CBea99509d93f8DDDC8C6FB",
+    "0xD1220A0cf47c7B9Be7A2E6BA89F429762e7b9aDb",
+]
+TRON_USDT = "TR7NHqjeKQxGTCi8q8ZY4pL8otSzgjLj6t"
+SOLANA_WSOL = "So11111111111111111111111111111111111111112"
+
+
+@pytest.fixture
+def validator():
+    return AddressValidator()
+
+
+@pytest.mark.parametrize("address", EIP55)
+def test_eip55_vectors(validator, address):
+    assert validator.validate(address, "ERC20") is None
+    assert to_checksum_address(address.lower()) == address
+
+
+@pytest.mark.parametrize("address", EIP55)
+def test_eip55_single_case_is_accepted(validator, address):
+    assert validator.validate(address.lower(), "ERC20") is None
+    assert validator.validate("0x" + address[2:].upper(), "BEP20") is None
+
+
+@pytest.mark.parametrize("address", EIP55)
+def test_eip55_flipped_case_is_rejected(validator, address):
+    i = next(i for i, char in enumerate(address) if i > 1 and char.isalpha())
+    flipped = address[:i] + address[i].swapcase() + address[i + 1:]
+    assert validator.validate(flipped, "ERC20") == INVALID_CHECKSUM
+
+
+def test_to_checksum_address_rejects_non_evm():
+    with pytest.raises(ValueError):
+        to_checksum_address(TRON_USDT)
+
+
+def test_tron_vectors(validator):
+    assert validator.validate(TRON_USDT, "TRC20") is None
+    # Último caractere trocado: base58 válido, checksum não
+    assert validator.validate(TRON_USDT[:-1] + "7", "TRC20") == INVALID_CHECKSUM
+    assert validator.validate("T" + "1" * 33, "TRC20") == INVALID_FORMAT
+    assert validator.validate(EIP55[0], "TRC20") == INVALID_FORMAT
+
+
+def test_solana_vectors(validator):
+    assert len(base58_decode(SOLANA_WSOL)) == 32
+    assert validator.validate(SOLANA_WSOL, "SOL") is None
+    # System Program: 32 bytes zerados
+    assert validator.validate("1" * 32, "SOL") is None
+    # Base58 válido, mas não decodifica para 32 bytes
+    assert validator.validate("2" * 32, "SOL") == INVALID_FORMAT
+    assert validator.validate("z" * 44, "SOL") == INVALID_FORMAT
+    assert validator.validate("So1111111111111111111111111111111111111111O", "SOL") == INVALID_FORMAT
+
+
+def test_classify_and_batch(validator):
+    assert validator.classify(EIP55[0]) == "EVM"
+    assert validator.classify(TRON_USDT) == "TRON"
+    assert validator.classify(SOLANA_WSOL) == "SOLANA"
+    assert validator.classify("not-an-address") is None
+
+    pairs = [(EIP55[0], "ERC20"), (TRON_USDT, "TRC20"), (EIP55[1], "TRC20"), (SOLANA_WSOL, "SOL")]
+    assert validator.validate_batch(pairs) == [None, None, INVALID_FORMAT, None]
+    assert validator.validate_batch(pairs) == [validator.validate(a, n) for a, n in pairs]
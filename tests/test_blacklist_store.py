@@ -0,0 +1,95 @@
+import json
+import os
+from core.blacklist_store import BLOOM_FP_RATE, BlacklistStore, _digest, normalize_address
+
+
+def _entries(n, prefix="0x"):
+    return [
+        {"address": f"{prefix}{i:040x}", "threat_type": "SCAM" if i % 2 else "PHISHING", "description": f"#{i % 3}"}
+        for i in range(n)
+    ]
+
+
+def test_build_and_lookup_in_memory():
+    entries = _entries(500)
+    store = BlacklistStore.build(entries)
+    assert len(store) == 500
+    for entry in entries[::37]:
+        found = store.lookup(entry["address"])
+        assert found == entry
+    assert store.lookup("0x" + "f" * 40) is None
+
+
+def test_evm_lookup_is_case_insensitive():
+    address = "0x" + "aB" * 20
+    store = BlacklistStore.build([{"address": address, "threat_type": "SCAM"}])
+    assert address.upper().replace("0X", "0x") in store
+    assert store.lookup(address.lower())["address"] == normalize_address(address)
+
+
+def test_base58_lookup_is_case_sensitive():
+    tron = "TR7NHqjeKQxGTCi8q8ZY4pL8otSzgjLj6t"
+    store = BlacklistStore.build([{"address": tron, "threat_type": "SCAM"}])
+    assert tron in store
+    assert tron.lower() not in store
+
+
+def test_duplicates_keep_first_occurrence():
+    address = "0x" + "1" * 40
+    store = BlacklistStore.build([
+        {"address": address, "threat_type": "FIRST"},
+        {"address": address.upper().replace("0X", "0x"), "threat_type": "SECOND"},
+    ])
+    assert len(store) == 1
+    assert store.lookup(address)["threat_type"] == "FIRST"
+
+
+def test_empty_store():
+    store = BlacklistStore.build([])
+    assert len(store) == 0
+    assert store.lookup("0x" + "0" * 40) is None
+
+
+def test_build_to_file_and_reopen(tmp_path):
+    path = str(tmp_path / "blacklist.bin")
+    entries = _entries(100)
+    store = BlacklistStore.build(entries, path)
+    try:
+        assert store.lookup(entries[42]["address"]) == entries[42]
+    finally:
+        store.close()
+    reopened = BlacklistStore.open(path)
+    try:
+        assert len(reopened) == 100
+        assert reopened.lookup(entries[99]["address"]) == entries[99]
+    finally:
+        reopened.close()
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+
+def test_bloom_false_positive_rate():
+    store = BlacklistStore.build(_entries(5000))
+    probes = 20000
+    false_positives = sum(
+        store.might_contain(_digest(normalize_address(f"0x{i:040x}")))
+        for i in range(10 ** 6, 10 ** 6 + probes)
+    )
+    # Margem sobre a taxa de projeto (1%)
+    assert false_positives / probes < BLOOM_FP_RATE * 2
+    # Falso positivo do bloom não vira resultado: a tabela confirma
+    assert all(store.lookup(f"0x{i:040x}") is None for i in range(10 ** 6, 10 ** 6 + 2000))
+
+
+def test_from_registry_rebuilds_corrupt_index(tmp_path):
+    json_path = tmp_path / "blacklist.json"
+    json_path.write_text(json.dumps(_entries(10)))
+    bin_path = tmp_path / "blacklist.bin"
+    for content in (b"", b"SSBL\x01"):
+        bin_path.write_bytes(content)
+        # Índice mais novo que o JSON, mas vazio/truncado: recompila em vez de quebrar
+        os.utime(bin_path, (os.path.getmtime(json_path) + 10,) * 2)
+        store = BlacklistStore.from_registry(str(json_path))
+        try:
+            assert len(store) == 10
+        finally:
+            store.close()
@@ -0,0 +1,33 @@
+import asyncio
+from bot import telegram_bot
+
+
+def test_polling_lock_admits_a_single_process(tmp_path):
+    path = str(tmp_path / "bot.lock")
+    first = telegram_bot.acquire_polling_lock(path)
+    assert first is not None
+    # Outra descrição de arquivo (como outro worker): recusada enquanto a primeira vale
+    assert telegram_bot.acquire_polling_lock(path) is None
+    telegram_bot.release_polling_lock(first)
+    again = telegram_bot.acquire_polling_lock(path)
+    assert again is not None
+    telegram_bot.release_polling_lock(again)
+
+
+def test_start_embedded_skips_when_another_worker_polls(tmp_path, monkeypatch):
+    path = str(tmp_path / "bot.lock")
+    monkeypatch.setattr(telegram_bot, "BOT_LOCK_PATH", path)
+    held = telegram_bot.acquire_polling_lock(path)
+    try:
+        assert asyncio.run(telegram_bot.start_embedded(object(), token="123:abc")) is None
+        assert telegram_bot.engine is None
+    finally:
+        telegram_bot.release_polling_lock(held)
+
+
+def test_without_fcntl_only_a_single_worker_polls(monkeypatch):
+    monkeypatch.setattr(telegram_bot, "fcntl", None)
+    monkeypatch.setenv("WEB_CONCURRENCY", "4")
+    assert telegram_bot.acquire_polling_lock() is None
+    monkeypatch.setenv("WEB_CONCURRENCY", "1")
+    assert telegram_bot.acquire_polling_lock() is not None
@@ -0,0 +1,37 @@
+import asyncio
+import time
+from core.capability_matrix import CapabilityIndex
+from core.connectors.ccxt_connector import CCXTConnector
+from core.gatekeeper import Gatekeeper
+from core.shared_cache import MemoryBackend, SharedCache
+
+ADDRESS = "0x742d35Cc6634C0532925a3b844Bc454e4438f44e"
+
+
+def _snapshot(withdraw, fetched_at):
+    return {"currencies": {"USDT": {"networks": {"ERC20": {"withdraw": withdraw, "deposit": True}}}}, "fetched_at": fetched_at}
+
+
+def test_matrix_behind_live_snapshot_is_not_used():
+    async def run():
+        conn = CCXTConnector(shared_cache=SharedCache(MemoryBackend()), snapshot_dir="")
+        conn.snapshots["binance"] = _snapshot(True, time.time() - 10)
+        index = CapabilityIndex(conn, ["binance"])
+        await index.rebuild()
+        gatekeeper = Gatekeeper(ccxt_conn=conn, capabilities=index)
+        try:
+            before = await gatekeeper.check_compatibility("binance", "MetaMask", "USDT", "ERC20", ADDRESS)
+            # O refresher da CCXT viu o saque suspenso; a matriz ainda não foi reconstruída
+            conn.snapshots["binance"] = _snapshot(False, time.time())
+            after = await gatekeeper.check_compatibility("binance", "MetaMask", "USDT", "ERC20", ADDRESS)
+            await index.rebuild()
+            rebuilt = index.lookup("binance", fetched_after=conn.snapshots["binance"]["fetched_at"])
+            return before["status"], after["status"], rebuilt
+        finally:
+            gatekeeper.blacklist.close()
+            await conn.close()
+
+    before, after, rebuilt = asyncio.run(run())
+    assert before == "SAFE"
+    assert after == "WITHDRAW_DISABLED"
+    assert rebuilt is not None
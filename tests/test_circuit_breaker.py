@@ -0,0 +1,88 @@
+import pytest
+from core import circuit_breaker
+from core.circuit_breaker import CLOSED, HALF_OPEN, OPEN, BreakerRegistry, CircuitBreaker, CircuitOpenError
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(circuit_breaker.time, "time", lambda: now[0])
+    return now
+
+
+def _opened(clock):
+    breaker = CircuitBreaker("rpc", failure_threshold=3, recovery_timeout=10)
+    for _ in range(3):
+        assert breaker.allow()
+        breaker.record_failure("timeout")
+    return breaker
+
+
+def test_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker("rpc", failure_threshold=3, recovery_timeout=10)
+    breaker.record_failure("a")
+    breaker.record_failure("b")
+    assert breaker.state == CLOSED
+    breaker.record_failure("c")
+    assert breaker.state == OPEN
+    assert breaker.is_open
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+
+
+def test_success_resets_failure_count(clock):
+    breaker = CircuitBreaker("rpc", failure_threshold=3, recovery_timeout=10)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+    assert breaker.failures == 1
+
+
+def test_half_open_allows_a_single_probe(clock):
+    breaker = _opened(clock)
+    clock[0] += 10
+    assert not breaker.is_open
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    # Teste em curso: as demais chamadas falham na hora
+    assert not breaker.allow()
+    assert breaker.is_open
+
+
+def test_half_open_success_closes(clock):
+    breaker = _opened(clock)
+    clock[0] += 10
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.failures == 0
+    assert breaker.allow() and breaker.allow()
+
+
+def test_half_open_failure_reopens(clock):
+    breaker = _opened(clock)
+    clock[0] += 10
+    assert breaker.allow()
+    breaker.record_failure("still down")
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+    assert breaker.stats() == {"state": OPEN, "failures": 4, "last_error": "still down"}
+
+
+def test_abandoned_probe_expires(clock):
+    breaker = _opened(clock)
+    clock[0] += 10
+    assert breaker.allow()
+    # O teste nunca reporta (ex.: cancelado); após recovery_timeout outro pode passar
+    clock[0] += 10
+    assert breaker.allow()
+
+
+def test_registry_reuses_breakers():
+    registry = BreakerRegistry(failure_threshold=2, recovery_timeout=5)
+    breaker = registry.get("binance")
+    assert registry.get("binance") is breaker
+    assert breaker.failure_threshold == 2
+    assert set(registry.stats()) == {"binance"}
@@ -0,0 +1,89 @@
+import asyncio
+import json
+from types import SimpleNamespace
+import httpx
+from benchmarks.standins import install_exchanges, install_rpc
+from core.engine import SentinelEngine
+from core.shared_cache import MemoryBackend, SharedCache, set_shared_cache
+
+SAFE_ADDRESS = "0x742d35Cc6634C0532925a3b844Bc454e4438f44e"
+BLACKLISTED = "0xdeface0000000000000000000000000000000000"
+
+
+def _item(address, destination="okx", network="ERC20"):
+    return SimpleNamespace(asset="USDT", origin="binance", destination=destination, network=network, address=address)
+
+
+def test_batch_skips_rpc_for_items_closed_by_local_rules(tmp_path, monkeypatch):
+    monkeypatch.setenv("CAPABILITY_SNAPSHOT", str(tmp_path / "capabilities.bin"))
+    monkeypatch.setenv("CCXT_SNAPSHOT_DIR", str(tmp_path / "ccxt"))
+
+    async def run():
+        set_shared_cache(SharedCache(MemoryBackend()))
+        engine = SentinelEngine()
+        install_exchanges(engine.ccxt_conn)
+        looked_up = []
+
+        async def verify_addresses(addresses, network):
+            looked_up.extend(addresses)
+            return [{"status": "SUCCESS", "is_contract": False, "type": "Personal Wallet (EOA)"} for _ in addresses]
+
+        async def humanize_risk(gk_res):
+            return "explicação"
+
+        engine.rpc.verify_addresses = verify_addresses
+        engine.humanizer.humanize_risk = humanize_risk
+        items = [
+            _item(SAFE_ADDRESS),
+            _item(BLACKLISTED),
+            _item("0x123"),
+            _item("TJRabPrwbZy45sbavfcjinPJC18kjpRTv8", destination="MetaMask", network="TRC20"),
+        ]
+        try:
+            results = [r async for r in engine.check_batch(items)]
+        finally:
+            await engine.shutdown()
+        return looked_up, {r["index"]: r["status"] for r in results}
+
+    looked_up, statuses = asyncio.run(run())
+    assert looked_up == [SAFE_ADDRESS]
+    assert statuses[1] == "BLACK-LISTED"
+    assert statuses[2] == "INVALID_ADDRESS"
+    assert statuses[3] == "MISMATCH"
+
+
+def test_erc20_batch_reaches_the_eth_pool_once_per_address(tmp_path, monkeypatch):
+    monkeypatch.setenv("CAPABILITY_SNAPSHOT", str(tmp_path / "capabilities.bin"))
+    monkeypatch.setenv("CCXT_SNAPSHOT_DIR", str(tmp_path / "ccxt"))
+    other = "0xdAC17F958D2ee523a2206206994597C13D831ec7"
+
+    async def run():
+        set_shared_cache(SharedCache(MemoryBackend()))
+        engine = SentinelEngine()
+        install_exchanges(engine.ccxt_conn)
+        requested = []
+
+        async def handler(request):
+            body = json.loads(request.content)
+            calls = body if isinstance(body, list) else [body]
+            requested.extend(c["params"][0].lower() for c in calls if c["method"] == "eth_getCode")
+            answers = [{"jsonrpc": "2.0", "id": c["id"], "result": "0x"} for c in calls]
+            return httpx.Response(200, json=answers if isinstance(body, list) else answers[0])
+
+        await install_rpc(engine.rpc, httpx.MockTransport(handler))
+
+        async def humanize_risk(gk_res):
+            return "explicação"
+
+        engine.humanizer.humanize_risk = humanize_risk
+        items = [_item(SAFE_ADDRESS), _item(other), _item(SAFE_ADDRESS)]
+        try:
+            results = [r async for r in engine.check_batch(items)]
+        finally:
+            await engine.shutdown()
+        return requested, [r["on_chain"] for r in results]
+
+    requested, on_chain = asyncio.run(run())
+    # ERC20 vai para o pool da ETH, uma consulta por endereço distinto
+    assert sorted(requested) == sorted([SAFE_ADDRESS.lower(), other.lower()])
+    assert [r["status"] for r in on_chain] == ["SUCCESS"] * 3
@@ -0,0 +1,21 @@
+import ccxt
+import pytest
+from core.gatekeeper import DESTINATION_CEXS
+from core.intent_parser import LocalIntentParser
+
+
+@pytest.fixture(scope="module")
+def parser():
+    return LocalIntentParser(exchanges=ccxt.exchanges)
+
+
+def test_destination_cexs_are_ccxt_ids():
+    assert set(DESTINATION_CEXS) <= set(ccxt.exchanges)
+
+
+@pytest.mark.parametrize("name", ["Gate", "gate.io", "Gateio"])
+def test_gate_aliases_resolve_to_the_ccxt_id(parser, name):
+    intent, _ = parser.parse(f"enviar 100 USDT da Binance para {name} via TRC20")
+    assert intent["destination"].lower() == "gate"
+    assert intent["destination"].lower() in ccxt.exchanges
+    assert intent["destination"].lower() in DESTINATION_CEXS
@@ -0,0 +1,47 @@
+from core.metrics import Metrics
+
+
+def test_render_prometheus_text_format():
+    metrics = Metrics(enabled=True, otel=False, buckets=(0.1, 1.0))
+    metrics.inc("upstream_calls_total", upstream="okx")
+    metrics.inc("upstream_calls_total", 2, upstream="binance")
+    metrics.gauge_set("breaker_open", 1, upstream='bad"name\\x')
+    metrics.observe("upstream_seconds", 0.05, upstream="okx")
+    metrics.observe("upstream_seconds", 0.5, upstream="okx")
+    metrics.observe("upstream_seconds", 3.0, upstream="okx")
+    metrics.register_collector(lambda: [("inflight_tasks", {"kind": "rpc_lookup"}, 4)])
+
+    assert metrics.render().splitlines() == [
+        "# HELP safesentinel_breaker_open 1 enquanto o circuito do upstream estiver aberto.",
+        "# TYPE safesentinel_breaker_open gauge",
+        'safesentinel_breaker_open{upstream="bad\\"name\\\\x"} 1',
+        "# HELP safesentinel_inflight_tasks Tarefas compartilhadas (SingleFlight) em andamento.",
+        "# TYPE safesentinel_inflight_tasks gauge",
+        'safesentinel_inflight_tasks{kind="rpc_lookup"} 4',
+        "# HELP safesentinel_upstream_calls_total Chamadas a cada upstream.",
+        "# TYPE safesentinel_upstream_calls_total counter",
+        'safesentinel_upstream_calls_total{upstream="binance"} 2',
+        'safesentinel_upstream_calls_total{upstream="okx"} 1',
+        "# HELP safesentinel_upstream_seconds Duração das chamadas a cada upstream.",
+        "# TYPE safesentinel_upstream_seconds histogram",
+        'safesentinel_upstream_seconds_bucket{upstream="okx",le="0.1"} 1',
+        'safesentinel_upstream_seconds_bucket{upstream="okx",le="1.0"} 2',
+        'safesentinel_upstream_seconds_bucket{upstream="okx",le="+Inf"} 3',
+        'safesentinel_upstream_seconds_sum{upstream="okx"} 3.55',
+        'safesentinel_upstream_seconds_count{upstream="okx"} 3',
+    ]
+
+
+def test_failing_collector_does_not_break_render():
+    metrics = Metrics(enabled=True, otel=False)
+    metrics.inc("checks_total", status="SAFE")
+    metrics.register_collector(lambda: 1 / 0)
+    assert 'safesentinel_checks_total{status="SAFE"} 1' in metrics.render()
+
+
+def test_disabled_metrics_render_nothing():
+    metrics = Metrics(enabled="0")
+    metrics.inc("checks_total", status="SAFE")
+    with metrics.span("stage.format"):
+        pass
+    assert metrics.render() == "\n"
@@ -0,0 +1,55 @@
+import asyncio
+import json
+import httpx
+from core import shared_cache
+from core.connectors.web3_rpc_connector import OnChainVerifier
+from core.http_client import HTTPClient
+from core.shared_cache import MemoryBackend, SharedCache
+
+CONTRACT = "0xdac17f958d2ee523a2206206994597c13d831ec7"
+EOA = "0x742d35cc6634c0532925a3b844bc454e4438f44e"
+
+
+def _transport(codes):
+    async def handler(request):
+        body = json.loads(request.content)
+        calls = body if isinstance(body, list) else [body]
+        answers = [
+            {"jsonrpc": "2.0", "id": c["id"], "result": codes.get(c["params"][0].lower(), "0x") if c["method"] == "eth_getCode" else "0x1"}
+            for c in calls
+        ]
+        return httpx.Response(200, json=answers if isinstance(body, list) else answers[0])
+    return httpx.MockTransport(handler)
+
+
+def test_empty_code_is_cached_briefly(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(shared_cache.time, "time", lambda: now[0])
+
+    async def run():
+        cache = SharedCache(MemoryBackend(), ttls={"getcode": 86400, "getcode_eoa": 60})
+        verifier = OnChainVerifier(shared_cache=cache)
+        router = verifier.get_pool("ETH")
+        for pool in router.pools:
+            await pool.client.aclose()
+            pool.client = HTTPClient(retries=0, transport=_transport({CONTRACT: "0x6080"}))
+        try:
+            await verifier.verify_addresses([CONTRACT, EOA], "ETH")
+            now[0] += 61
+            return (await cache.get("getcode", f"ETH:{CONTRACT}"), await cache.get("getcode", f"ETH:{EOA}"))
+        finally:
+            await verifier.close()
+
+    contract, eoa = asyncio.run(run())
+    assert contract["is_contract"] is True
+    assert eoa is None
+
+
+def test_zero_ttl_skips_write():
+    async def run():
+        backend = MemoryBackend()
+        cache = SharedCache(backend, ttls={"getcode_eoa": 0})
+        await cache.set("getcode", "ETH:x", {"status": "SUCCESS"}, ttl=cache.ttls["getcode_eoa"])
+        return backend.entries
+
+    assert asyncio.run(run()) == {}
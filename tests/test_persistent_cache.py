@@ -0,0 +1,57 @@
+import asyncio
+import json
+import threading
+from core.cache import PersistentLRUCache
+
+
+def test_periodic_save_runs_off_the_event_loop(tmp_path, monkeypatch):
+    path = str(tmp_path / "humanizer.json")
+
+    async def run():
+        cache = PersistentLRUCache(path=path, flush_interval=0)
+        writers = []
+        write = cache._write
+        monkeypatch.setattr(cache, "save", lambda: (_ for _ in ()).throw(AssertionError("save() no loop")))
+
+        def spy(snapshot):
+            writers.append(threading.get_ident())
+            write(snapshot)
+
+        monkeypatch.setattr(cache, "_write", spy)
+        cache.set("a", "explicação")
+        await cache.flush()
+        return writers
+
+    writers = asyncio.run(run())
+    assert writers and threading.get_ident() not in writers
+    with open(path) as f:
+        assert [entry[:2] for entry in json.load(f)["entries"]] == [["a", "explicação"]]
+
+
+def test_workers_sharing_a_file_keep_each_others_entries(tmp_path):
+    path = str(tmp_path / "humanizer.json")
+    first = PersistentLRUCache(path=path)
+    second = PersistentLRUCache(path=path)
+    first.set("a", "1")
+    second.set("b", "2")
+    first.save()
+    second.save()
+    # Última gravação não apaga as entradas do outro processo
+    assert {k for k in PersistentLRUCache(path=path).entries} == {"a", "b"}
+
+    first.set("b", "novo")
+    first.save()
+    assert PersistentLRUCache(path=path).get("b") == "novo"
+
+
+def test_merge_respects_max_entries(tmp_path):
+    path = str(tmp_path / "humanizer.json")
+    first = PersistentLRUCache(path=path, max_entries=3)
+    second = PersistentLRUCache(path=path, max_entries=3)
+    for key in "abc":
+        first.set(key, key)
+    first.save()
+    for key in "de":
+        second.set(key, key)
+    second.save()
+    assert list(PersistentLRUCache(path=path, max_entries=3).entries) == ["c", "d", "e"]
@@ -0,0 +1,71 @@
+import asyncio
+from core.pipeline import COST_FREE, COST_NETWORK, Stage, ValidationPipeline
+
+
+def _stage(name, cost, verdict=None, calls=None, short_circuits=()):
+    async def run(ctx):
+        if calls is not None:
+            calls.append(name)
+        return verdict
+    return Stage(name, cost, run, short_circuits)
+
+
+def test_cheaper_tiers_run_first():
+    calls = []
+    pipeline = ValidationPipeline([
+        _stage("rpc", COST_NETWORK, calls=calls),
+        _stage("format", COST_FREE, calls=calls),
+    ])
+    result = asyncio.run(pipeline.run({}))
+    assert calls == ["format", "rpc"]
+    assert result["status"] == "SAFE"
+    assert result["short_circuit"] is None
+    assert result["skipped_stages"] == []
+
+
+def test_verdict_follows_declared_order_not_cost():
+    pipeline = ValidationPipeline([
+        _stage("rpc", COST_NETWORK, {"status": "CONTRACT"}),
+        _stage("format", COST_FREE, {"status": "WARNING"}),
+    ])
+    result = asyncio.run(pipeline.run({}))
+    assert result["status"] == "CONTRACT"
+
+
+def test_short_circuit_skips_more_expensive_tiers():
+    calls = []
+    pipeline = ValidationPipeline([
+        _stage("blacklist", COST_FREE, {"status": "BLOCKED"}, calls, short_circuits={"BLOCKED"}),
+        _stage("format", COST_FREE, None, calls),
+        _stage("rpc", COST_NETWORK, {"status": "CONTRACT"}, calls),
+    ])
+    result = asyncio.run(pipeline.run({}))
+    # O restante da faixa gratuita roda (em paralelo); a faixa de rede não
+    assert sorted(calls) == ["blacklist", "format"]
+    assert result["status"] == "BLOCKED"
+    assert result["short_circuit"] == "blacklist"
+    assert result["skipped_stages"] == ["rpc"]
+
+
+def test_status_outside_short_circuits_does_not_stop():
+    calls = []
+    pipeline = ValidationPipeline([
+        _stage("format", COST_FREE, {"status": "WARNING"}, calls, short_circuits={"BLOCKED"}),
+        _stage("rpc", COST_NETWORK, None, calls),
+    ])
+    result = asyncio.run(pipeline.run({}))
+    assert calls == ["format", "rpc"]
+    assert result["status"] == "WARNING"
+    assert result["short_circuit"] is None
+
+
+def test_max_cost_stops_before_network_tier():
+    calls = []
+    pipeline = ValidationPipeline([
+        _stage("format", COST_FREE, None, calls),
+        _stage("rpc", COST_NETWORK, {"status": "CONTRACT"}, calls),
+    ])
+    result = asyncio.run(pipeline.run({}, max_cost=COST_FREE))
+    assert calls == ["format"]
+    assert result["short_circuit"] is None
+    assert result["skipped_stages"] == ["rpc"]
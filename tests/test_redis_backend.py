@@ -0,0 +1,134 @@
+import asyncio
+import socket
+from core.shared_cache import RedisBackend, SharedCache
+
+
+class RESPServer:
+    """Stand-in local do Redis: AUTH, SELECT, MGET e SET ... EX, com relógio controlado pelo teste."""
+    def __init__(self, password=None):
+        self.password = password
+        self.now = 1000.0
+        self.data = {}
+        self.commands = []
+        self.connections = 0
+        self._server = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+    @staticmethod
+    async def _read_command(reader):
+        line = await reader.readline()
+        if not line:
+            return None
+        args = []
+        for _ in range(int(line[1:-2])):
+            size = int((await reader.readline())[1:-2])
+            args.append((await reader.readexactly(size + 2))[:-2])
+        return args
+
+    @staticmethod
+    def _bulk(value):
+        return b"$-1\r\n" if value is None else b"$%d\r\n%s\r\n" % (len(value), value)
+
+    def _reply(self, args):
+        name = args[0].decode().upper()
+        self.commands.append(name)
+        if name == "AUTH":
+            return b"+OK\r\n" if args[1].decode() == self.password else b"-WRONGPASS invalid password\r\n"
+        if name == "SELECT":
+            return b"+OK\r\n"
+        if name == "MGET":
+            values = []
+            for key in args[1:]:
+                entry = self.data.get(key)
+                values.append(entry[0] if entry and entry[1] > self.now else None)
+            return b"*%d\r\n" % len(values) + b"".join(self._bulk(v) for v in values)
+        if name == "SET":
+            key, value, _, seconds = args[1:5]
+            self.data[key] = (value, self.now + int(seconds))
+            return b"+OK\r\n"
+        return b"-ERR unknown command\r\n"
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        while True:
+            args = await self._read_command(reader)
+            if args is None:
+                break
+            writer.write(self._reply(args))
+            await writer.drain()
+        writer.close()
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_round_trip_with_ttl():
+    async def run():
+        server = RESPServer(password="secret")
+        port = await server.start()
+        cache = SharedCache(RedisBackend(f"redis://:secret@127.0.0.1:{port}/2"), ttls={"cmc": 10})
+        try:
+            await cache.set("cmc", "USDT", {"name": "Tether"})
+            await cache.set_many("cmc", {"USDC": {"name": "USD Coin"}, "DAI": {"name": "Dai"}})
+            one = await cache.get("cmc", "USDT")
+            many = await cache.get_many("cmc", ["USDT", "USDC", "DAI", "BUSD"])
+            server.now += 11
+            expired = await cache.get_many("cmc", ["USDT", "USDC"])
+            return one, many, expired, server
+        finally:
+            await cache.close()
+            await server.stop()
+
+    one, many, expired, server = asyncio.run(run())
+    assert one == {"name": "Tether"}
+    assert many == {"USDT": {"name": "Tether"}, "USDC": {"name": "USD Coin"}, "DAI": {"name": "Dai"}}
+    assert expired == {}
+    # Uma conexão só; get_many é um único MGET e set_many um pipeline de SETs
+    assert server.connections == 1
+    assert server.commands[:2] == ["AUTH", "SELECT"]
+    assert server.commands.count("MGET") == 3
+    assert server.commands.count("SET") == 3
+
+
+def test_reconnects_after_the_server_drops_the_connection():
+    async def run():
+        server = RESPServer()
+        port = await server.start()
+        backend = RedisBackend(f"redis://127.0.0.1:{port}/0")
+        try:
+            await backend.set_many({"k": b"v"}, 10)
+            # Conexão derrubada pelo servidor: a próxima chamada reconecta uma vez
+            backend._writer.transport.abort()
+            return await backend.get_many(["k"]), server.connections
+        finally:
+            await backend.close()
+            await server.stop()
+
+    found, connections = asyncio.run(run())
+    assert found == {"k": b"v"}
+    assert connections == 2
+
+
+def test_refused_connection_falls_back_to_memory():
+    async def run():
+        cache = SharedCache(RedisBackend(f"redis://127.0.0.1:{_free_port()}/0", timeout=0.5), ttls={"cmc": 10})
+        try:
+            missing = await cache.get("cmc", "USDT")
+            await cache.set("cmc", "USDT", {"name": "Tether"})
+            return missing, await cache.get("cmc", "USDT")
+        finally:
+            await cache.close()
+
+    missing, cached = asyncio.run(run())
+    assert missing is None
+    assert cached == {"name": "Tether"}
@@ -0,0 +1,132 @@
+import asyncio
+import json
+import httpx
+from core.connectors.rpc_pool import RPCError, RPCRouter
+from core.http_client import HTTPClient
+
+
+def _router(handlers, **options):
+    """Roteador com um endpoint por handler (async request -> httpx.Response)."""
+    router = RPCRouter("ETH", [f"https://rpc{i}.test" for i in range(len(handlers))], **options)
+    for pool, handler in zip(router.pools, handlers):
+        pool.client = HTTPClient(retries=0, transport=httpx.MockTransport(handler))
+    return router
+
+
+def _ok(delay=0.0):
+    async def handler(request):
+        await asyncio.sleep(delay)
+        return httpx.Response(200, json={"jsonrpc": "2.0", "id": json.loads(request.content)["id"], "result": "0x"})
+    return handler
+
+
+def _hang():
+    async def handler(request):
+        await asyncio.Event().wait()
+    return handler
+
+
+def _down():
+    async def handler(request):
+        raise httpx.ConnectError("down", request=request)
+    return handler
+
+
+def test_hedge_loser_latency_demotes_slow_primary():
+    async def run():
+        router = _router([_ok(0.5), _ok(0.01)], hedge_budget=1.0, hedge_min_delay=0.03, hedge_max_delay=0.03)
+        slow, fast = router.pools
+        # Histórico antigo: o endpoint lento parecia o mais rápido
+        for _ in range(5):
+            slow.record(0.001, True)
+        try:
+            for _ in range(8):
+                await router.call("eth_getCode", ["0x0", "latest"])
+            return router.ranked()[0] is fast, slow.latency_quantile(0.5)
+        finally:
+            await router.aclose()
+
+    demoted, median = asyncio.run(run())
+    assert demoted
+    assert median >= 0.03
+
+
+def test_hanging_endpoint_is_demoted_by_hedge_losses():
+    async def run():
+        router = _router([_ok(0.06), _hang()], hedge_budget=1.0, hedge_min_delay=0.03, hedge_max_delay=0.03)
+        healthy, hanging = router.pools
+        try:
+            for _ in range(30):
+                await router.call("eth_blockNumber", [])
+            return router.ranked()[0] is healthy, hanging.stats(), hanging.failures, router.hedges
+        finally:
+            await router.aclose()
+
+    demoted, stats, failures, hedges = asyncio.run(run())
+    assert demoted
+    assert stats["error_rate"] == 0 and failures == 0
+    assert stats["loss_rate"] == 1.0
+    # Nunca virou primário: toda chamada foi atendida pelo endpoint saudável
+    assert hedges == 30
+
+
+def test_cancelled_call_is_not_a_success():
+    router = _router([_ok()], eject_after=2)
+    pool = router.pools[0]
+    pool.record(0.01, False)
+    pool.record(0.01, False)
+    pool.record_cancelled(0.5)
+    # Não desfaz a ejeção nem zera as falhas
+    assert not pool.healthy
+    assert pool.failures == 2
+    assert pool.latencies[-1] == 0.5
+    pool.record_cancelled(0.001)
+    assert list(pool.latencies) == [0.5]
+    asyncio.run(router.aclose())
+
+
+def test_single_failure_does_not_eject_endpoint():
+    async def run():
+        router = _router([_down()], eject_after=3)
+        pool = router.pools[0]
+        try:
+            try:
+                await router.call("eth_blockNumber", [])
+            except RPCError:
+                pass
+            return pool.healthy
+        finally:
+            await router.aclose()
+
+    assert asyncio.run(run())
+
+
+def test_consecutive_failures_eject_until_cooldown():
+    async def run():
+        router = _router([_down()], eject_after=2, eject_cooldown=0.05)
+        pool = router.pools[0]
+        try:
+            for _ in range(2):
+                try:
+                    await router.call("eth_blockNumber", [])
+                except RPCError:
+                    pass
+            ejected = not pool.healthy
+            await asyncio.sleep(0.06)
+            return ejected, pool.healthy
+        finally:
+            await router.aclose()
+
+    ejected, recovered = asyncio.run(run())
+    assert ejected
+    assert recovered
+
+
+def test_success_resets_failures():
+    router = _router([_ok()], eject_after=2)
+    pool = router.pools[0]
+    pool.record(0.01, False)
+    pool.record(0.01, True)
+    pool.record(0.01, False)
+    assert pool.healthy
+    asyncio.run(router.aclose())
@@ -0,0 +1,82 @@
+import asyncio
+import time
+import pytest
+from core.scheduler import HostTokenBucket, SingleFlight
+
+
+def test_bucket_enforces_the_rate(tmp_path):
+    bucket = HostTokenBucket("binance", rate=20, burst=1, directory=str(tmp_path))
+
+    async def run():
+        start = time.perf_counter()
+        for _ in range(5):
+            await bucket.acquire()
+        return time.perf_counter() - start
+
+    try:
+        elapsed = asyncio.run(run())
+    finally:
+        bucket.close()
+    # 1 token no burst e 4 a 20/s
+    assert elapsed >= 4 / 20 * 0.9
+
+
+def test_bucket_is_shared_through_the_file(tmp_path):
+    # Duas instâncias com o mesmo nome (como dois workers) dividem o mesmo saldo
+    first = HostTokenBucket("okx", rate=1, burst=2, directory=str(tmp_path))
+    second = HostTokenBucket("okx", rate=1, burst=2, directory=str(tmp_path))
+    other = HostTokenBucket("bybit", rate=1, burst=2, directory=str(tmp_path))
+    try:
+        assert first._take(1) == 0
+        assert second._take(1) == 0
+        assert first._take(1) > 0
+        assert second._take(1) > 0
+        assert other._take(1) == 0
+    finally:
+        for bucket in (first, second, other):
+            bucket.close()
+
+
+def test_single_flight_coalesces_identical_calls():
+    async def run():
+        flight = SingleFlight()
+        calls = []
+
+        async def lookup():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "resultado"
+
+        results = await asyncio.gather(*(flight.do("ETH:0xabc", lookup) for _ in range(10)))
+        other = await flight.do("ETH:0xdef", lookup)
+        return results, other, len(calls), flight
+
+    results, other, calls, flight = asyncio.run(run())
+    assert results == ["resultado"] * 10
+    assert other == "resultado"
+    assert calls == 2
+    assert flight.coalesced == 9
+    assert not flight.inflight
+
+
+def test_single_flight_shares_errors_and_survives_a_cancelled_caller():
+    async def run():
+        flight = SingleFlight()
+        started = []
+
+        async def failing():
+            started.append(1)
+            await asyncio.sleep(0.01)
+            raise ValueError("upstream")
+
+        first = asyncio.ensure_future(flight.do("k", failing))
+        second = asyncio.ensure_future(flight.do("k", failing))
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(ValueError):
+            await second
+        return first.cancelled(), len(started)
+
+    cancelled, started = asyncio.run(run())
+    assert cancelled
+    assert started == 1
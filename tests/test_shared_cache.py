@@ -0,0 +1,80 @@
+import asyncio
+from core import shared_cache
+from core.shared_cache import MemoryBackend, SharedCache, SQLiteBackend
+
+
+def test_memory_entries_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(shared_cache.time, "time", lambda: now[0])
+
+    async def run():
+        cache = SharedCache(MemoryBackend(), ttls={"cmc": 10})
+        await cache.set("cmc", "USDT", {"name": "Tether"})
+        fresh = await cache.get("cmc", "USDT")
+        now[0] += 11
+        return fresh, await cache.get("cmc", "USDT")
+
+    fresh, expired = asyncio.run(run())
+    assert fresh == {"name": "Tether"}
+    assert expired is None
+
+
+def test_sqlite_entries_expire_after_ttl(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(shared_cache.time, "time", lambda: now[0])
+
+    async def run():
+        cache = SharedCache(SQLiteBackend(str(tmp_path / "shared.db")), ttls={"cmc": 10})
+        try:
+            await cache.set("cmc", "USDT", {"name": "Tether"})
+            now[0] += 5
+            fresh = await cache.get("cmc", "USDT")
+            now[0] += 6
+            return fresh, await cache.get("cmc", "USDT")
+        finally:
+            await cache.close()
+
+    fresh, expired = asyncio.run(run())
+    assert fresh == {"name": "Tether"}
+    assert expired is None
+
+
+def test_unusable_backend_falls_back_to_memory(monkeypatch):
+    monkeypatch.setenv("CACHE_BACKEND", "sqlite")
+    monkeypatch.setenv("CACHE_PATH", "/proc/nope/shared.db")
+    monkeypatch.setattr(shared_cache, "_shared_cache", None)
+    cache = shared_cache.get_shared_cache()
+    assert isinstance(cache.backend, MemoryBackend)
+    asyncio.run(shared_cache.close_shared_cache())
+
+
+def test_sqlite_purges_expired_rows_on_write(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(shared_cache.time, "time", lambda: now[0])
+
+    async def run():
+        backend = SQLiteBackend(str(tmp_path / "shared.db"), purge_every=60)
+        cache = SharedCache(backend, ttls={"getcode": 10})
+        try:
+            await cache.set_many("getcode", {f"ETH:0x{i:040x}": {"status": "SUCCESS"} for i in range(50)})
+            now[0] += 61
+            await cache.set("getcode", "ETH:new", {"status": "SUCCESS"})
+            return backend.conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+        finally:
+            await cache.close()
+
+    assert asyncio.run(run()) == 1
+
+
+def test_memory_purges_expired_entries_on_write(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(shared_cache.time, "time", lambda: now[0])
+
+    async def run():
+        backend = MemoryBackend(purge_every=60)
+        await backend.set_many({"a": b"1", "b": b"2"}, 10)
+        now[0] += 61
+        await backend.set_many({"c": b"3"}, 10)
+        return set(backend.entries)
+
+    assert asyncio.run(run()) == {"c"}
@@ -0,0 +1,95 @@
+import asyncio
+import json
+import httpx
+import pytest
+from core.transport import RECORD, REPLAY, CassetteMiss, CassetteStore, CassetteTransport, FaultInjector, wrap_ccxt_fetch
+
+URL = "https://rpc.test/v3/secret-key"
+
+
+def _rpc_upstream(seen):
+    async def handler(request):
+        body = json.loads(request.content)
+        seen.append(body)
+        calls = body if isinstance(body, list) else [body]
+        answers = [{"jsonrpc": "2.0", "id": c["id"], "result": f"code-{c['params'][0]}"} for c in calls]
+        return httpx.Response(200, json=answers if isinstance(body, list) else answers[0])
+    return httpx.MockTransport(handler)
+
+
+def _rpc(call_id, address):
+    return {"jsonrpc": "2.0", "id": call_id, "method": "eth_getCode", "params": [address, "latest"]}
+
+
+def test_record_then_replay_remaps_rpc_ids(tmp_path):
+    async def run():
+        seen = []
+        recorder = httpx.AsyncClient(transport=CassetteTransport(RECORD, CassetteStore(str(tmp_path)), _rpc_upstream(seen)))
+        await recorder.post(URL, json=_rpc(1, "0xa"))
+        await recorder.post(URL, json=[_rpc(2, "0xa"), _rpc(3, "0xb")])
+        await recorder.aclose()
+
+        # Outro processo: lê as gravações do disco, sem upstream
+        faults = FaultInjector(latency="0", error_rate=0)
+        replayer = httpx.AsyncClient(transport=CassetteTransport(REPLAY, CassetteStore(str(tmp_path)), faults=faults))
+        try:
+            # IDs e caminho (API key) diferentes da gravação
+            single = (await replayer.post("https://rpc.test/v3/other-key", json=_rpc(41, "0xa"))).json()
+            batch = (await replayer.post(URL, json=[_rpc(7, "0xa"), _rpc(8, "0xb")])).json()
+            with pytest.raises(CassetteMiss):
+                await replayer.post(URL, json=_rpc(9, "0xc"))
+            return len(seen), single, batch
+        finally:
+            await replayer.aclose()
+
+    upstream_calls, single, batch = asyncio.run(run())
+    assert upstream_calls == 2
+    assert single == {"jsonrpc": "2.0", "id": 41, "result": "code-0xa"}
+    assert [(item["id"], item["result"]) for item in batch] == [(7, "code-0xa"), (8, "code-0xb")]
+
+
+def test_replay_injects_errors(tmp_path):
+    async def run():
+        recorder = httpx.AsyncClient(transport=CassetteTransport(RECORD, CassetteStore(str(tmp_path)), _rpc_upstream([])))
+        await recorder.post(URL, json=_rpc(1, "0xa"))
+        await recorder.aclose()
+        faults = FaultInjector(latency="0", error_rate=1, error_status=503)
+        replayer = httpx.AsyncClient(transport=CassetteTransport(REPLAY, CassetteStore(str(tmp_path)), faults=faults))
+        try:
+            return (await replayer.post(URL, json=_rpc(2, "0xa"))).status_code
+        finally:
+            await replayer.aclose()
+
+    assert asyncio.run(run()) == 503
+
+
+class _Exchange:
+    def __init__(self):
+        self.calls = 0
+
+    async def fetch(self, url, method="GET", headers=None, body=None):
+        self.calls += 1
+        return {"USDT": {"networks": {"TRC20": {"withdraw": True}}}}
+
+
+def test_ccxt_fetch_record_then_replay(tmp_path, monkeypatch):
+    import ccxt.async_support as ccxt
+    url = "https://api.test/currencies?timestamp=1&signature=abc"
+
+    async def run():
+        monkeypatch.setenv("TRANSPORT_MODE", RECORD)
+        exchange = wrap_ccxt_fetch("okx", _Exchange(), store=CassetteStore(str(tmp_path)))
+        recorded = await exchange.fetch(url)
+
+        monkeypatch.setenv("TRANSPORT_MODE", REPLAY)
+        offline = _Exchange()
+        wrap_ccxt_fetch("okx", offline, store=CassetteStore(str(tmp_path)), faults=FaultInjector(latency="0", error_rate=0))
+        # Parâmetros voláteis (timestamp, assinatura) não entram na chave
+        replayed = await offline.fetch("https://api.test/currencies?timestamp=2&signature=xyz")
+        with pytest.raises(ccxt.NetworkError):
+            await offline.fetch("https://api.test/markets")
+        return recorded, replayed, offline.calls
+
+    recorded, replayed, upstream_calls = asyncio.run(run())
+    assert replayed == recorded
+    assert upstream_calls == 0